@@ -11,22 +11,22 @@ FOR UPDATE SKIP LOCKED.
 Idempotency
 ───────────
 POST /jobs accepts an optional idempotency_key. If a job with that key
-already exists, the existing job is returned (200) rather than creating
-a duplicate. This prevents double-submission from retrying clients.
+already exists, the existing job is returned rather than creating a
+duplicate. This prevents double-submission from retrying clients. The
+check and the insert are one INSERT ... ON CONFLICT statement
+(services/common/submission.py), shared with services/api and gRPC.
 """
 
-import uuid
 import hashlib
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 
 from api.db.session import get_db
 from api.db.models import Job
 from api.schemas.job import JobCreate, JobCreated
-from common.states import JobState
 from common.config import MAX_ATTEMPTS_DEFAULT
+from services.common import submission
 
 router = APIRouter()
 
@@ -58,39 +58,27 @@ def submit_job(body: JobCreate, db: Session = Depends(get_db)):
     """
     payload_hash = _payload_hash(body.payload)
 
-    # Check idempotency before inserting
-    if body.idempotency_key:
-        existing = db.query(Job).filter_by(idempotency_key=body.idempotency_key).first()
-        if existing:
-            if existing.payload_hash != payload_hash:
-                raise HTTPException(
-                    status_code=409,
-                    detail="Idempotency key reused with different payload",
-                )
-            return JobCreated(id=existing.id, state=existing.state)
-
-    job = Job(
-        id=uuid.uuid4(),
-        type=body.type,
-        payload=body.payload,
-        payload_hash=payload_hash,
-        idempotency_key=body.idempotency_key,
-        state=JobState.QUEUED.value,
-        max_attempts=MAX_ATTEMPTS_DEFAULT,
-    )
-
+    # Shared single-statement path: INSERT ... ON CONFLICT (idempotency_key),
+    # run on the session's own DBAPI connection and transaction.
     try:
-        db.add(job)
+        with db.connection().connection.cursor() as cur:
+            result = submission.submit_job(
+                cur,
+                body.payload,
+                payload_hash,
+                idempotency_key=body.idempotency_key,
+                job_type=body.type,
+                max_attempts=MAX_ATTEMPTS_DEFAULT,
+            )
         db.commit()
-    except IntegrityError:
-        # Race: another request inserted the same idempotency_key concurrently.
+    except submission.IdempotencyConflict:
         db.rollback()
-        existing = db.query(Job).filter_by(idempotency_key=body.idempotency_key).first()
-        if existing:
-            return JobCreated(id=existing.id, state=existing.state)
-        raise HTTPException(status_code=500, detail="Unexpected integrity error")
+        raise HTTPException(
+            status_code=409,
+            detail="Idempotency key reused with different payload",
+        )
 
-    return JobCreated(id=job.id, state=job.state)
+    return JobCreated(id=result.job_id, state=result.state)
 
 
 @router.get("/jobs/{job_id}", response_model=None)
@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import uuid
 
 class JobCreate(BaseModel):
     type: str = Field(..., min_length=1)
     payload: Dict[str, Any]
+    idempotency_key: Optional[str] = None
 
 class JobCreated(BaseModel):
     id: uuid.UUID
@@ -1,24 +1,13 @@
-from sdk.faultline_sdk import ClaimRequest, CompleteRequest, FailRequest, FaultlineClient, WorkerRegistration
+from sdk.faultline_sdk import FaultlineClient, Lease, Worker
 
 
-def worker_loop() -> None:
-    client = FaultlineClient("http://localhost:8000")
-    reg = client.register_worker(WorkerRegistration(worker_name="python-worker-a"))
-    print(reg)
-
-    claim = client.claim(ClaimRequest(worker_id=reg.worker_id, batch_size=1))
-    print("claim:", claim)
+def handle(lease: Lease) -> dict:
+    return {"status": "ok", "handler": "example", "job_id": lease.job_id}
 
-    items = claim.get("items", [])
-    if not items:
-        return
 
-    job = items[0]
-    try:
-        result = {"status": "ok", "handler": "example"}
-        print(client.complete(CompleteRequest(job_id=job["job_id"], fencing_token=int(job["fencing_token"]), result=result)))
-    except Exception as e:
-        print(client.fail(FailRequest(job_id=job["job_id"], fencing_token=int(job["fencing_token"]), reason=str(e))))
+def worker_loop() -> None:
+    with FaultlineClient("http://localhost:8000") as client:
+        Worker(client, handle, "python-worker-a", concurrency=8, prefetch=16).run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+-- 023_reconcile_watermarks.sql
+-- Durable high-water marks for incremental reconciliation: each pass only
+-- re-examines jobs (and ledger entries) changed since the stored watermark.
+-- ledger_entries.created_at is TIMESTAMP (UTC, migration 004): the reconciler
+-- compares it against watermark AT TIME ZONE 'UTC', not a session-zone cast.
+
+CREATE TABLE IF NOT EXISTS reconcile_watermarks (
+  name                TEXT PRIMARY KEY,
+  watermark           TIMESTAMPTZ NOT NULL,
+  last_full_sweep_at  TIMESTAMPTZ,
+  updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_updated_at
+  ON jobs(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_entries_created_at
+  ON ledger_entries(created_at);
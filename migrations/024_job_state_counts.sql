@@ -0,0 +1,94 @@
+-- 024_job_state_counts.sql
+-- Per-state job counts maintained by statement-level triggers, so queue
+-- depth is a read of a few dozen rows instead of a GROUP BY over jobs.
+--
+-- Each counted statement adds its per-state deltas to one of 16 shard rows
+-- (picked at random), so concurrent claims and commits rarely queue on the
+-- same counter row. Depth is SUM(n) per state across shards. The counts are
+-- updated in the writer's transaction and stay exact.
+
+CREATE TABLE IF NOT EXISTS job_state_counts (
+  state  TEXT     NOT NULL,
+  shard  SMALLINT NOT NULL,
+  n      BIGINT   NOT NULL DEFAULT 0,
+  PRIMARY KEY (state, shard)
+);
+
+CREATE OR REPLACE FUNCTION job_state_counts_add(p_states TEXT[], p_deltas BIGINT[])
+RETURNS void LANGUAGE sql AS $$
+  INSERT INTO job_state_counts (state, shard, n)
+  SELECT d.state, s.shard, d.delta
+  FROM unnest(p_states, p_deltas) AS d(state, delta),
+       (SELECT floor(random() * 16)::smallint AS shard) s
+  WHERE d.delta <> 0
+  ORDER BY d.state
+  ON CONFLICT (state, shard) DO UPDATE SET n = job_state_counts.n + EXCLUDED.n
+$$;
+
+CREATE OR REPLACE FUNCTION job_state_counts_on_insert()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM job_state_counts_add(array_agg(state), array_agg(n))
+  FROM (SELECT state, COUNT(*) AS n FROM new_jobs GROUP BY state) d;
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION job_state_counts_on_update()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM job_state_counts_add(array_agg(state), array_agg(n))
+  FROM (
+    SELECT state, SUM(delta)::bigint AS n
+    FROM (
+      SELECT state, -1 AS delta FROM old_jobs
+      UNION ALL
+      SELECT state, 1 FROM new_jobs
+    ) t
+    GROUP BY state
+    HAVING SUM(delta) <> 0
+  ) d;
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION job_state_counts_on_delete()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM job_state_counts_add(array_agg(state), array_agg(-n))
+  FROM (SELECT state, COUNT(*) AS n FROM old_jobs GROUP BY state) d;
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION job_state_counts_on_truncate()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  DELETE FROM job_state_counts;
+  RETURN NULL;
+END $$;
+
+-- No writer may change jobs between the backfill and the triggers going live.
+LOCK TABLE jobs IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS jobs_state_counts_insert ON jobs;
+DROP TRIGGER IF EXISTS jobs_state_counts_update ON jobs;
+DROP TRIGGER IF EXISTS jobs_state_counts_delete ON jobs;
+DROP TRIGGER IF EXISTS jobs_state_counts_truncate ON jobs;
+
+CREATE TRIGGER jobs_state_counts_insert
+  AFTER INSERT ON jobs REFERENCING NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_insert();
+
+CREATE TRIGGER jobs_state_counts_update
+  AFTER UPDATE ON jobs REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_update();
+
+CREATE TRIGGER jobs_state_counts_delete
+  AFTER DELETE ON jobs REFERENCING OLD TABLE AS old_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_delete();
+
+CREATE TRIGGER jobs_state_counts_truncate
+  AFTER TRUNCATE ON jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_truncate();
+
+DELETE FROM job_state_counts;
+INSERT INTO job_state_counts (state, shard, n)
+SELECT state, 0, COUNT(*) FROM jobs GROUP BY state;
@@ -0,0 +1,34 @@
+-- 025_job_state_events.sql
+-- Publish job state transitions on the faultline_job_events channel, for
+-- the API's long-poll and server-sent-events endpoints (services/api/job_events.py).
+--
+-- One statement-level trigger per UPDATE: every row whose state changed is
+-- sent as [id, state], batched 100 to a notification to stay well under the
+-- 8000-byte payload limit. Notifications are delivered on COMMIT, so a
+-- listener never sees a transition that was rolled back.
+
+CREATE OR REPLACE FUNCTION jobs_notify_state_change()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  chunk TEXT;
+BEGIN
+  FOR chunk IN
+    SELECT json_agg(json_build_array(c.id, c.state))::text
+    FROM (
+      SELECT n.id, n.state, (row_number() OVER () - 1) / 100 AS grp
+      FROM new_jobs n
+      JOIN old_jobs o ON o.id = n.id
+      WHERE n.state IS DISTINCT FROM o.state
+    ) c
+    GROUP BY c.grp
+  LOOP
+    PERFORM pg_notify('faultline_job_events', chunk);
+  END LOOP;
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS jobs_state_events ON jobs;
+
+CREATE TRIGGER jobs_state_events
+  AFTER UPDATE ON jobs REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION jobs_notify_state_change();
@@ -0,0 +1,87 @@
+-- 026_job_history.sql
+-- Archive for terminal jobs (services/worker/archiver.py).
+--
+-- succeeded / failed rows never change again, but they share the jobs heap
+-- and indexes with the rows every claim scans. The archiver moves them, with
+-- their ledger entries, into jobs_history / ledger_entries_history in
+-- bounded batches. Both history tables are range-partitioned by archived_at,
+-- one partition per UTC day, with matching names for the two tables
+-- (jobs_history_20260301, ledger_entries_history_20260301). Retention
+-- drops whole partitions instead of DELETEing rows.
+--
+-- Columns are spelled out rather than copied from jobs, which is a view
+-- under the lease_table layout.
+
+CREATE TABLE IF NOT EXISTS jobs_history (
+  id                UUID NOT NULL,
+  type              TEXT NOT NULL,
+  payload           JSONB NOT NULL,
+  payload_hash      TEXT,
+  state             TEXT NOT NULL,
+  attempts          INT NOT NULL,
+  max_attempts      INT NOT NULL,
+  lease_owner       TEXT,
+  lease_expires_at  TIMESTAMPTZ,
+  fencing_token     BIGINT NOT NULL,
+  next_run_at       TIMESTAMPTZ,
+  idempotency_key   TEXT,
+  last_error        TEXT,
+  created_at        TIMESTAMPTZ NOT NULL,
+  updated_at        TIMESTAMPTZ NOT NULL,
+  archived_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (archived_at);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_history_id ON jobs_history (id);
+
+CREATE TABLE IF NOT EXISTS ledger_entries_history (
+  entry_id       BIGINT NOT NULL,
+  job_id         UUID NOT NULL,
+  fencing_token  BIGINT NOT NULL,
+  account_id     TEXT NOT NULL,
+  delta          BIGINT NOT NULL,
+  created_at     TIMESTAMP NOT NULL,
+  archived_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (archived_at);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_entries_history_job ON ledger_entries_history (job_id);
+
+-- Create the day's partition of both tables; a no-op when it exists.
+CREATE OR REPLACE FUNCTION job_history_create_partitions(day DATE)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+  suffix TEXT := to_char(day, 'YYYYMMDD');
+  lo TIMESTAMPTZ := day::timestamp AT TIME ZONE 'UTC';
+  hi TIMESTAMPTZ := (day + 1)::timestamp AT TIME ZONE 'UTC';
+  parent TEXT;
+BEGIN
+  -- Two archivers starting at midnight would race on the same names.
+  PERFORM pg_advisory_xact_lock(hashtext('job_history_partitions'));
+  FOREACH parent IN ARRAY ARRAY['jobs_history', 'ledger_entries_history'] LOOP
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+      parent || '_' || suffix, parent, lo, hi
+    );
+  END LOOP;
+END $$;
+
+-- Drop every daily partition of both tables for days before cutoff; returns the dropped names.
+CREATE OR REPLACE FUNCTION job_history_drop_partitions(cutoff DATE)
+RETURNS SETOF TEXT LANGUAGE plpgsql AS $$
+DECLARE
+  part TEXT;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('job_history_partitions'));
+  FOR part IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname IN ('jobs_history', 'ledger_entries_history')
+      AND c.relname ~ '_[0-9]{8}$'
+      AND to_date(right(c.relname, 8), 'YYYYMMDD') < cutoff
+    ORDER BY c.relname
+  LOOP
+    EXECUTE format('DROP TABLE %I', part);
+    RETURN NEXT part;
+  END LOOP;
+END $$;
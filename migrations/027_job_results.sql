@@ -0,0 +1,18 @@
+-- 027_job_results.sql
+-- Results reported with a completion (CompleteJobs, POST /jobs:complete;
+-- services/common/completion.py). Written in the same statement as the
+-- fenced state change, only when the completion carries a result.
+--
+-- A side table rather than a jobs column: it needs no change to the
+-- lease_table layout's jobs view, and a completion never rewrites the wide
+-- job row (or job_bodies) just to attach a result. The archiver moves a
+-- result into jobs_history.result together with its job.
+
+CREATE TABLE IF NOT EXISTS job_results (
+  job_id         UUID PRIMARY KEY,
+  fencing_token  BIGINT NOT NULL,
+  result         JSONB NOT NULL,
+  created_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE jobs_history ADD COLUMN IF NOT EXISTS result JSONB;
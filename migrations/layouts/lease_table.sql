@@ -0,0 +1,183 @@
+-- layouts/lease_table.sql
+-- Optional narrow lease-table layout. Not applied by default:
+--
+--     python services/api/migrate.py --layout lease_table
+--
+-- and run workers, reapers, reconcilers, the API and the gRPC server with
+-- FAULTLINE_SCHEMA_LAYOUT=lease_table.
+--
+-- Every claim, heartbeat, fence and commit used to write a new version of
+-- the whole jobs row, payload JSONB included. Here the columns the lease
+-- protocol changes (state, attempts, fencing_token, lease_owner,
+-- lease_expires_at, next_run_at, updated_at) live in job_leases, a narrow
+-- table with fillfactor 70. The immutable job body (payload, hashes, keys,
+-- last_error) stays in job_bodies, the renamed jobs table. Lease writes
+-- copy ~100 bytes instead of the payload, and a heartbeat touches no indexed
+-- column, so it is a HOT update. Claims join job_bodies once, for payload and
+-- max_attempts.
+--
+-- jobs remains as a view over both tables with INSTEAD OF triggers, so
+-- reports, tests and ad-hoc SQL keep working unchanged. The hot-path
+-- statements (services/worker/statements.py) address job_leases directly.
+-- The state counters (024) and state events (025) move to job_leases.
+
+LOCK TABLE jobs IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE jobs RENAME TO job_bodies;
+
+DROP TRIGGER IF EXISTS jobs_state_counts_insert ON job_bodies;
+DROP TRIGGER IF EXISTS jobs_state_counts_update ON job_bodies;
+DROP TRIGGER IF EXISTS jobs_state_counts_delete ON job_bodies;
+DROP TRIGGER IF EXISTS jobs_state_counts_truncate ON job_bodies;
+DROP TRIGGER IF EXISTS jobs_state_events ON job_bodies;
+
+CREATE TABLE job_leases (
+  job_id            UUID PRIMARY KEY REFERENCES job_bodies(id) ON DELETE CASCADE,
+  state             TEXT NOT NULL DEFAULT 'queued'
+                    CHECK (state IN ('queued', 'running', 'succeeded', 'failed')),
+  attempts          INT NOT NULL DEFAULT 0,
+  fencing_token     BIGINT NOT NULL DEFAULT 0,
+  lease_owner       TEXT,
+  lease_expires_at  TIMESTAMPTZ,
+  next_run_at       TIMESTAMPTZ,
+  updated_at        TIMESTAMPTZ NOT NULL DEFAULT NOW()
+) WITH (fillfactor = 70);
+
+-- Claimable jobs always carry next_run_at, so claims order by it alone.
+INSERT INTO job_leases (job_id, state, attempts, fencing_token, lease_owner,
+                        lease_expires_at, next_run_at, updated_at)
+SELECT id, state, attempts, fencing_token, lease_owner, lease_expires_at,
+       CASE WHEN state IN ('queued', 'running') THEN COALESCE(next_run_at, created_at) ELSE next_run_at END,
+       updated_at
+FROM job_bodies;
+
+-- lease_expires_at is deliberately not indexed: the running set is small,
+-- and leaving it out keeps heartbeat renewals HOT.
+CREATE INDEX idx_job_leases_queued ON job_leases (next_run_at) WHERE state = 'queued';
+CREATE INDEX idx_job_leases_running ON job_leases (job_id) WHERE state = 'running';
+CREATE INDEX idx_job_leases_updated_at ON job_leases (updated_at);
+
+ALTER TABLE job_bodies
+  DROP COLUMN state,
+  DROP COLUMN attempts,
+  DROP COLUMN fencing_token,
+  DROP COLUMN lease_owner,
+  DROP COLUMN lease_expires_at,
+  DROP COLUMN next_run_at,
+  DROP COLUMN updated_at;
+
+CREATE VIEW jobs AS
+SELECT b.id, b.type, b.payload, b.payload_hash, l.state, l.attempts, b.max_attempts,
+       l.lease_owner, l.lease_expires_at, l.fencing_token, l.next_run_at,
+       b.idempotency_key, b.last_error, b.created_at, l.updated_at
+FROM job_bodies b
+JOIN job_leases l ON l.job_id = b.id;
+
+ALTER VIEW jobs ALTER COLUMN type SET DEFAULT 'default';
+ALTER VIEW jobs ALTER COLUMN payload SET DEFAULT '{}'::jsonb;
+ALTER VIEW jobs ALTER COLUMN state SET DEFAULT 'queued';
+ALTER VIEW jobs ALTER COLUMN attempts SET DEFAULT 0;
+ALTER VIEW jobs ALTER COLUMN max_attempts SET DEFAULT 3;
+ALTER VIEW jobs ALTER COLUMN fencing_token SET DEFAULT 0;
+ALTER VIEW jobs ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER VIEW jobs ALTER COLUMN updated_at SET DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION jobs_view_insert()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO job_bodies (id, type, payload, payload_hash, max_attempts,
+                          idempotency_key, last_error, created_at)
+  VALUES (NEW.id, NEW.type, NEW.payload, NEW.payload_hash, NEW.max_attempts,
+          NEW.idempotency_key, NEW.last_error, NEW.created_at);
+  IF NEW.state IN ('queued', 'running') THEN
+    NEW.next_run_at := COALESCE(NEW.next_run_at, NEW.created_at);
+  END IF;
+  INSERT INTO job_leases (job_id, state, attempts, fencing_token, lease_owner,
+                          lease_expires_at, next_run_at, updated_at)
+  VALUES (NEW.id, NEW.state, NEW.attempts, NEW.fencing_token, NEW.lease_owner,
+          NEW.lease_expires_at, NEW.next_run_at, NEW.updated_at);
+  RETURN NEW;
+END $$;
+
+CREATE OR REPLACE FUNCTION jobs_view_update()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF (NEW.state, NEW.attempts, NEW.fencing_token, NEW.lease_owner,
+      NEW.lease_expires_at, NEW.next_run_at, NEW.updated_at)
+     IS DISTINCT FROM
+     (OLD.state, OLD.attempts, OLD.fencing_token, OLD.lease_owner,
+      OLD.lease_expires_at, OLD.next_run_at, OLD.updated_at) THEN
+    UPDATE job_leases
+    SET state = NEW.state, attempts = NEW.attempts, fencing_token = NEW.fencing_token,
+        lease_owner = NEW.lease_owner, lease_expires_at = NEW.lease_expires_at,
+        next_run_at = NEW.next_run_at, updated_at = NEW.updated_at
+    WHERE job_id = OLD.id;
+  END IF;
+  IF (NEW.type, NEW.payload, NEW.payload_hash, NEW.max_attempts,
+      NEW.idempotency_key, NEW.last_error, NEW.created_at)
+     IS DISTINCT FROM
+     (OLD.type, OLD.payload, OLD.payload_hash, OLD.max_attempts,
+      OLD.idempotency_key, OLD.last_error, OLD.created_at) THEN
+    UPDATE job_bodies
+    SET type = NEW.type, payload = NEW.payload, payload_hash = NEW.payload_hash,
+        max_attempts = NEW.max_attempts, idempotency_key = NEW.idempotency_key,
+        last_error = NEW.last_error, created_at = NEW.created_at
+    WHERE id = OLD.id;
+  END IF;
+  RETURN NEW;
+END $$;
+
+CREATE OR REPLACE FUNCTION jobs_view_delete()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  DELETE FROM job_bodies WHERE id = OLD.id;
+  RETURN OLD;
+END $$;
+
+CREATE TRIGGER jobs_view_insert INSTEAD OF INSERT ON jobs
+  FOR EACH ROW EXECUTE FUNCTION jobs_view_insert();
+CREATE TRIGGER jobs_view_update INSTEAD OF UPDATE ON jobs
+  FOR EACH ROW EXECUTE FUNCTION jobs_view_update();
+CREATE TRIGGER jobs_view_delete INSTEAD OF DELETE ON jobs
+  FOR EACH ROW EXECUTE FUNCTION jobs_view_delete();
+
+-- 024 / 025 on the lease table. The counts are unchanged by the move.
+CREATE OR REPLACE FUNCTION job_leases_notify_state_change()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  chunk TEXT;
+BEGIN
+  FOR chunk IN
+    SELECT json_agg(json_build_array(c.job_id, c.state))::text
+    FROM (
+      SELECT n.job_id, n.state, (row_number() OVER () - 1) / 100 AS grp
+      FROM new_jobs n
+      JOIN old_jobs o ON o.job_id = n.job_id
+      WHERE n.state IS DISTINCT FROM o.state
+    ) c
+    GROUP BY c.grp
+  LOOP
+    PERFORM pg_notify('faultline_job_events', chunk);
+  END LOOP;
+  RETURN NULL;
+END $$;
+
+CREATE TRIGGER job_leases_state_counts_insert
+  AFTER INSERT ON job_leases REFERENCING NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_insert();
+
+CREATE TRIGGER job_leases_state_counts_update
+  AFTER UPDATE ON job_leases REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_update();
+
+CREATE TRIGGER job_leases_state_counts_delete
+  AFTER DELETE ON job_leases REFERENCING OLD TABLE AS old_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_delete();
+
+CREATE TRIGGER job_leases_state_counts_truncate
+  AFTER TRUNCATE ON job_leases
+  FOR EACH STATEMENT EXECUTE FUNCTION job_state_counts_on_truncate();
+
+CREATE TRIGGER job_leases_state_events
+  AFTER UPDATE ON job_leases REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+  FOR EACH STATEMENT EXECUTE FUNCTION job_leases_notify_state_change();
@@ -1,20 +1,30 @@
+from .async_client import AsyncFaultlineClient
 from .client import FaultlineClient
+from .transport import TransportRetry
 from .types import (
     ClaimRequest,
     CompleteRequest,
+    CompletionResult,
     FailRequest,
+    Lease,
     RetryPolicy,
     SubmitRequest,
     SubmitResponse,
     WorkerRegistration,
     WorkerRegistrationResponse,
 )
+from .worker import Worker
 
 __all__ = [
+    "AsyncFaultlineClient",
     "FaultlineClient",
+    "TransportRetry",
+    "Worker",
     "ClaimRequest",
     "CompleteRequest",
+    "CompletionResult",
     "FailRequest",
+    "Lease",
     "RetryPolicy",
     "SubmitRequest",
     "SubmitResponse",
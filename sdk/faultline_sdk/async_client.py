@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from .client import (
+    _all_keyed,
+    _batch_responses,
+    _chunks,
+    _completion_items,
+    _completion_results,
+    _failure_items,
+    _lease_items,
+    _lost_leases,
+    _ndjson,
+    _submit_response,
+)
+from .transport import TransportRetry
+from .types import (
+    ClaimRequest,
+    CompleteRequest,
+    CompletionResult,
+    FailRequest,
+    Lease,
+    SubmitRequest,
+    SubmitResponse,
+    WorkerRegistration,
+    WorkerRegistrationResponse,
+)
+
+T = TypeVar("T")
+
+
+class AsyncFaultlineClient:
+    """
+    asyncio client for the Faultline HTTP API, on httpx.
+
+    Same calls and wire format as FaultlineClient, on one keep-alive
+    connection pool of up to max_connections. Batched calls (submit_many,
+    complete_many, fail_many) send up to max_in_flight chunks concurrently
+    and still return results in input order, so one event loop can push
+    thousands of operations per second. Requires httpx.
+
+        async with AsyncFaultlineClient("http://localhost:8000") as client:
+            jobs = await client.claim(ClaimRequest(worker_id=wid, batch_size=100))
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 10.0,
+        retry: TransportRetry | None = None,
+        max_connections: int = 100,
+        max_in_flight: int = 8,
+    ) -> None:
+        import httpx
+
+        self._httpx = httpx
+        self.base_url = base_url.rstrip("/")
+        self.retry = retry or TransportRetry()
+        self.max_in_flight = max(1, max_in_flight)
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def __aenter__(self) -> AsyncFaultlineClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, idempotent: bool, **kwargs: Any):
+        httpx = self._httpx
+        attempt = 0
+        while True:
+            try:
+                resp = await self.http.request(method, path, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException) as exc:
+                not_sent = isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.retry.max_retries or not (idempotent or not_sent):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt))
+            else:
+                retryable = self.retry.retry_status(resp.status_code, idempotent)
+                if attempt >= self.retry.max_retries or not retryable:
+                    resp.raise_for_status()
+                    return resp
+                await asyncio.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+            attempt += 1
+
+    async def _gather_chunks(
+        self, items: Iterable[Any], chunk_size: int, send: Callable[[list[Any]], Awaitable[list[T]]]
+    ) -> list[T]:
+        gate = asyncio.Semaphore(self.max_in_flight)
+
+        async def bounded(chunk: list[Any]) -> list[T]:
+            async with gate:
+                return await send(chunk)
+
+        parts = await asyncio.gather(*(bounded(chunk) for chunk in _chunks(items, chunk_size)))
+        return [result for part in parts for result in part]
+
+    async def health(self) -> dict[str, Any]:
+        return (await self._request("GET", "/health", idempotent=True)).json()
+
+    async def submit(self, request: SubmitRequest) -> SubmitResponse:
+        resp = await self._request(
+            "POST", "/v1/jobs", idempotent=request.idempotency_key is not None, json=asdict(request)
+        )
+        return _submit_response(resp.json())
+
+    async def submit_many(
+        self,
+        submissions: Iterable[SubmitRequest],
+        chunk_size: int = 10_000,
+    ) -> list[SubmitResponse]:
+        """FaultlineClient.submit_many, with up to max_in_flight chunks in flight."""
+        return await self._gather_chunks(submissions, chunk_size, self._submit_chunk)
+
+    async def _submit_chunk(self, chunk: list[SubmitRequest]) -> list[SubmitResponse]:
+        resp = await self._request(
+            "POST",
+            "/v1/jobs:batch",
+            idempotent=_all_keyed(chunk),
+            content=_ndjson(chunk),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        return _batch_responses(resp.json())
+
+    async def register_worker(self, request: WorkerRegistration) -> WorkerRegistrationResponse:
+        resp = await self._request("POST", "/v1/workers/register", idempotent=False, json=asdict(request))
+        data = resp.json()
+        return WorkerRegistrationResponse(
+            worker_id=str(data["worker_id"]),
+            accepted=bool(data.get("accepted", True)),
+        )
+
+    async def claim(self, request: ClaimRequest) -> dict[str, Any]:
+        """Lease up to request.batch_size jobs in one call."""
+        return (await self._request("POST", "/v1/jobs/claim", idempotent=False, json=asdict(request))).json()
+
+    async def complete(self, request: CompleteRequest) -> dict[str, Any]:
+        resp = await self._request("POST", "/v1/jobs/complete", idempotent=True, json=asdict(request))
+        return resp.json()
+
+    async def fail(self, request: FailRequest) -> dict[str, Any]:
+        resp = await self._request("POST", "/v1/jobs/fail", idempotent=True, json=asdict(request))
+        return resp.json()
+
+    async def complete_many(
+        self,
+        completions: Iterable[CompleteRequest],
+        worker_id: str | None = None,
+        chunk_size: int = 1000,
+    ) -> list[CompletionResult]:
+        """FaultlineClient.complete_many, with up to max_in_flight chunks in flight."""
+        items = _completion_items(completions)
+        return await self._write_chunks("/v1/jobs:complete", items, worker_id, chunk_size)
+
+    async def fail_many(
+        self,
+        failures: Iterable[FailRequest],
+        worker_id: str | None = None,
+        chunk_size: int = 1000,
+    ) -> list[CompletionResult]:
+        """FaultlineClient.fail_many, with up to max_in_flight chunks in flight."""
+        return await self._write_chunks("/v1/jobs:fail", _failure_items(failures), worker_id, chunk_size)
+
+    async def _write_chunks(
+        self,
+        path: str,
+        items: Iterable[dict[str, Any]],
+        worker_id: str | None,
+        chunk_size: int,
+    ) -> list[CompletionResult]:
+        async def send(chunk: list[dict[str, Any]]) -> list[CompletionResult]:
+            body = {"worker_id": worker_id, "items": chunk}
+            resp = await self._request("POST", path, idempotent=True, json=body)
+            return _completion_results(resp.json())
+
+        return await self._gather_chunks(items, chunk_size, send)
+
+    async def renew_leases(self, worker_id: str, leases: Iterable[Lease], lease_seconds: int) -> list[str]:
+        """FaultlineClient.renew_leases."""
+        body = {"worker_id": worker_id, "lease_seconds": lease_seconds, "items": _lease_items(leases)}
+        resp = await self._request("POST", "/v1/jobs:heartbeat", idempotent=True, json=body)
+        return _lost_leases(resp.json())
+
+    async def release_leases(self, worker_id: str, leases: Iterable[Lease]) -> int:
+        """FaultlineClient.release_leases."""
+        body = {"worker_id": worker_id, "items": _lease_items(leases)}
+        resp = await self._request("POST", "/v1/jobs:release", idempotent=True, json=body)
+        return int(resp.json().get("released", 0))
+
+    async def reconcile(self) -> dict[str, Any]:
+        return (await self._request("POST", "/v1/admin/reconcile", idempotent=True)).json()
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import json
+import time
 from dataclasses import asdict
-from typing import Any
+from itertools import islice
+from typing import Any, Iterable, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
+from .transport import TransportRetry
 from .types import (
     ClaimRequest,
     CompleteRequest,
+    CompletionResult,
     FailRequest,
+    Lease,
     SubmitRequest,
     SubmitResponse,
     WorkerRegistration,
@@ -17,36 +25,98 @@ from .types import (
 
 
 class FaultlineClient:
-    def __init__(self, base_url: str, timeout_seconds: float = 10.0) -> None:
+    """
+    Blocking client for the Faultline HTTP API.
+
+    Calls share one requests.Session, so connections are kept alive and
+    reused (up to pool_maxsize per host, enough for that many threads
+    sharing the client) instead of paying a TCP / TLS handshake per call.
+    Failed calls are retried per TransportRetry. Close the client, or use
+    it as a context manager, to release its connections.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 10.0,
+        retry: TransportRetry | None = None,
+        pool_maxsize: int = 10,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout_seconds = timeout_seconds
+        self.retry = retry or TransportRetry()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> FaultlineClient:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _request(self, method: str, path: str, idempotent: bool, **kwargs: Any) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.request(
+                    method, f"{self.base_url}{path}", timeout=self.timeout_seconds, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt >= self.retry.max_retries or not (idempotent or _not_sent(exc)):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+            else:
+                retryable = self.retry.retry_status(resp.status_code, idempotent)
+                if attempt >= self.retry.max_retries or not retryable:
+                    resp.raise_for_status()
+                    return resp
+                time.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+            attempt += 1
 
     def health(self) -> dict[str, Any]:
-        resp = requests.get(f"{self.base_url}/health", timeout=self.timeout_seconds)
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("GET", "/health", idempotent=True).json()
 
     def submit(self, request: SubmitRequest) -> SubmitResponse:
-        resp = requests.post(
-            f"{self.base_url}/v1/jobs",
-            json=asdict(request),
-            timeout=self.timeout_seconds,
+        resp = self._request(
+            "POST", "/v1/jobs", idempotent=request.idempotency_key is not None, json=asdict(request)
         )
-        resp.raise_for_status()
-        data = resp.json()
-        return SubmitResponse(
-            job_id=str(data["job_id"]),
-            state=data.get("state", "queued"),
-            accepted=bool(data.get("accepted", True)),
+        return _submit_response(resp.json())
+
+    def submit_many(
+        self,
+        submissions: Iterable[SubmitRequest],
+        chunk_size: int = 10_000,
+    ) -> list[SubmitResponse]:
+        """
+        Submit many jobs through the batch endpoint, chunk_size per call.
+
+        Items are sent as NDJSON; each chunk is inserted in one server-side
+        transaction. The result has one SubmitResponse per request, in
+        order; an idempotency key reused with a different payload comes back
+        with accepted=False and the existing job's id.
+        """
+        results: list[SubmitResponse] = []
+        for chunk in _chunks(submissions, chunk_size):
+            results.extend(self._submit_chunk(chunk))
+        return results
+
+    def _submit_chunk(self, chunk: list[SubmitRequest]) -> list[SubmitResponse]:
+        resp = self._request(
+            "POST",
+            "/v1/jobs:batch",
+            idempotent=_all_keyed(chunk),
+            data=_ndjson(chunk),
+            headers={"Content-Type": "application/x-ndjson"},
         )
+        return _batch_responses(resp.json())
 
     def register_worker(self, request: WorkerRegistration) -> WorkerRegistrationResponse:
-        resp = requests.post(
-            f"{self.base_url}/v1/workers/register",
-            json=asdict(request),
-            timeout=self.timeout_seconds,
-        )
-        resp.raise_for_status()
+        resp = self._request("POST", "/v1/workers/register", idempotent=False, json=asdict(request))
         data = resp.json()
         return WorkerRegistrationResponse(
             worker_id=str(data["worker_id"]),
@@ -54,36 +124,142 @@ class FaultlineClient:
         )
 
     def claim(self, request: ClaimRequest) -> dict[str, Any]:
-        resp = requests.post(
-            f"{self.base_url}/v1/jobs/claim",
-            json=asdict(request),
-            timeout=self.timeout_seconds,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("POST", "/v1/jobs/claim", idempotent=False, json=asdict(request)).json()
 
     def complete(self, request: CompleteRequest) -> dict[str, Any]:
-        resp = requests.post(
-            f"{self.base_url}/v1/jobs/complete",
-            json=asdict(request),
-            timeout=self.timeout_seconds,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("POST", "/v1/jobs/complete", idempotent=True, json=asdict(request)).json()
 
     def fail(self, request: FailRequest) -> dict[str, Any]:
-        resp = requests.post(
-            f"{self.base_url}/v1/jobs/fail",
-            json=asdict(request),
-            timeout=self.timeout_seconds,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        return self._request("POST", "/v1/jobs/fail", idempotent=True, json=asdict(request)).json()
+
+    def complete_many(
+        self,
+        completions: Iterable[CompleteRequest],
+        worker_id: str | None = None,
+        chunk_size: int = 1000,
+    ) -> list[CompletionResult]:
+        """
+        Complete many leased jobs, chunk_size per call.
+
+        Each chunk commits in one server-side transaction, every item fenced
+        on its own fencing_token (and on worker_id, when given). The result
+        has one CompletionResult per request, in order; a stale item comes
+        back with stale_write_rejected=True and does not affect the others.
+        """
+        return self._write_chunks("/v1/jobs:complete", _completion_items(completions), worker_id, chunk_size)
+
+    def fail_many(
+        self,
+        failures: Iterable[FailRequest],
+        worker_id: str | None = None,
+        chunk_size: int = 1000,
+    ) -> list[CompletionResult]:
+        """Fail many leased jobs like complete_many; jobs with attempts left are retried."""
+        return self._write_chunks("/v1/jobs:fail", _failure_items(failures), worker_id, chunk_size)
+
+    def _write_chunks(
+        self,
+        path: str,
+        items: Iterable[dict[str, Any]],
+        worker_id: str | None,
+        chunk_size: int,
+    ) -> list[CompletionResult]:
+        results: list[CompletionResult] = []
+        for chunk in _chunks(items, chunk_size):
+            resp = self._request("POST", path, idempotent=True, json={"worker_id": worker_id, "items": chunk})
+            results.extend(_completion_results(resp.json()))
+        return results
+
+    def renew_leases(self, worker_id: str, leases: Iterable[Lease], lease_seconds: int) -> list[str]:
+        """
+        Extend the worker's leases by lease_seconds in one call.
+
+        Each lease is fenced on its token; returns the ids of the leases that
+        were not renewed (reclaimed or expired), whose work will be rejected.
+        """
+        body = {"worker_id": worker_id, "lease_seconds": lease_seconds, "items": _lease_items(leases)}
+        resp = self._request("POST", "/v1/jobs:heartbeat", idempotent=True, json=body)
+        return _lost_leases(resp.json())
+
+    def release_leases(self, worker_id: str, leases: Iterable[Lease]) -> int:
+        """Hand unstarted leases back to the queue; returns how many were released."""
+        body = {"worker_id": worker_id, "items": _lease_items(leases)}
+        resp = self._request("POST", "/v1/jobs:release", idempotent=True, json=body)
+        return int(resp.json().get("released", 0))
 
     def reconcile(self) -> dict[str, Any]:
-        resp = requests.post(
-            f"{self.base_url}/v1/admin/reconcile",
-            timeout=self.timeout_seconds,
+        return self._request("POST", "/v1/admin/reconcile", idempotent=True).json()
+
+
+# Wire format helpers, shared with AsyncFaultlineClient.
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _all_keyed(chunk: list[SubmitRequest]) -> bool:
+    return all(request.idempotency_key is not None for request in chunk)
+
+
+def _ndjson(chunk: list[SubmitRequest]) -> bytes:
+    return "\n".join(json.dumps(asdict(request)) for request in chunk).encode()
+
+
+def _submit_response(data: dict[str, Any]) -> SubmitResponse:
+    return SubmitResponse(
+        job_id=str(data["job_id"]),
+        state=data.get("state", "queued"),
+        accepted=bool(data.get("accepted", True)),
+    )
+
+
+def _batch_responses(data: dict[str, Any]) -> list[SubmitResponse]:
+    return [
+        SubmitResponse(
+            job_id=str(item["job_id"]),
+            state=item.get("state", "queued"),
+            accepted=item.get("status") != "conflict",
         )
-        resp.raise_for_status()
-        return resp.json()
+        for item in data["items"]
+    ]
+
+
+def _completion_items(completions: Iterable[CompleteRequest]) -> Iterator[dict[str, Any]]:
+    for c in completions:
+        yield {"job_id": c.job_id, "fencing_token": c.fencing_token, "result": c.result}
+
+
+def _failure_items(failures: Iterable[FailRequest]) -> Iterator[dict[str, Any]]:
+    for f in failures:
+        yield {"job_id": f.job_id, "fencing_token": f.fencing_token, "error": f.reason}
+
+
+def _completion_results(data: dict[str, Any]) -> list[CompletionResult]:
+    return [
+        CompletionResult(
+            job_id=str(item["job_id"]),
+            committed=bool(item["committed"]),
+            stale_write_rejected=bool(item["stale_write_rejected"]),
+            state=item.get("state"),
+            reason=item.get("reason", ""),
+        )
+        for item in data["items"]
+    ]
+
+
+def _lease_items(leases: Iterable[Lease]) -> list[dict[str, Any]]:
+    return [{"job_id": lease.job_id, "fencing_token": lease.fencing_token} for lease in leases]
+
+
+def _lost_leases(data: dict[str, Any]) -> list[str]:
+    return [str(item["job_id"]) for item in data["items"] if not item["renewed"]]
+
+
+def _not_sent(exc: Exception) -> bool:
+    """True when the request never reached the server (no connection was made)."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+
+# Statuses the API answers before doing any work: 429 (throttled) and 503
+# (DB pool exhausted / unavailable). Safe to retry for every call.
+NOT_PROCESSED_STATUSES = frozenset({429, 503})
+
+
+@dataclass(slots=True)
+class TransportRetry:
+    """
+    HTTP retry policy shared by FaultlineClient and AsyncFaultlineClient.
+
+    A call is retried up to max_retries times, sleeping a full-jitter
+    exponential backoff (uniform in [0, min(max, base * 2**attempt)]) so a
+    fleet of clients does not retry in lockstep. A numeric Retry-After
+    header is honoured as a lower bound.
+
+    Idempotent calls (reads, fenced complete / fail, submissions that
+    carry an idempotency key) retry on any status in retry_statuses and on
+    connection errors and timeouts. Other calls (claim, keyless submit)
+    retry only when the request provably did no work: the connection was
+    never established, or the status is 429 / 503.
+    """
+
+    max_retries: int = 3
+    backoff_base_seconds: float = 0.05
+    backoff_max_seconds: float = 2.0
+    retry_statuses: frozenset[int] = field(default_factory=lambda: frozenset({429, 502, 503, 504}))
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        try:
+            return max(delay, min(float(retry_after), self.backoff_max_seconds)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def retry_status(self, status: int, idempotent: bool) -> bool:
+        if status not in self.retry_statuses:
+            return False
+        return idempotent or status in NOT_PROCESSED_STATUSES
@@ -40,6 +40,17 @@ class ClaimRequest:
     batch_size: int = 1
     queue: str = "default"
     tenant_id: str = "default"
+    lease_seconds: int = 30
+
+
+@dataclass(slots=True)
+class Lease:
+    """One leased job, as returned by claim."""
+
+    job_id: str
+    fencing_token: int
+    payload: Any = None
+    attempts: int = 0
 
 
 @dataclass(slots=True)
@@ -56,6 +67,17 @@ class FailRequest:
     reason: str
 
 
+@dataclass(slots=True)
+class CompletionResult:
+    """Outcome of one item of complete_many / fail_many."""
+
+    job_id: str
+    committed: bool
+    stale_write_rejected: bool
+    state: JobState | None
+    reason: str
+
+
 @dataclass(slots=True)
 class WorkerRegistration:
     worker_name: str
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from collections import Counter
+from queue import Empty, Queue
+from typing import Any, Callable, Iterable
+
+from .client import FaultlineClient
+from .types import ClaimRequest, CompleteRequest, FailRequest, Lease, WorkerRegistration
+
+Handler = Callable[[Lease], "dict[str, Any] | None"]
+Outcome = CompleteRequest | FailRequest
+
+
+class Worker:
+    """
+    Worker runtime on FaultlineClient: the SDK counterpart of the native
+    worker loop.
+
+    The worker registers once, then keeps up to concurrency + prefetch
+    leases: concurrency handlers run on their own threads while up to
+    prefetch leased jobs wait, so a handler never waits on a claim round
+    trip. Claims take every free slot in one call. A heartbeat thread
+    renews all held leases in one call every heartbeat_seconds; a lease
+    reported lost is skipped if it has not started. Outcomes are committed
+    by complete_many / fail_many in batches of up to completion_batch_size,
+    flushed after completion_window_seconds, and each is fenced on its own
+    token.
+
+    A handler gets the Lease and returns the job result (a dict or None);
+    an exception fails the job, which the server retries while it has
+    attempts left. stop() stops claiming, hands unstarted leases back to
+    the queue, lets running handlers finish and flushes their outcomes.
+
+        with FaultlineClient("http://localhost:8000") as client:
+            Worker(client, handle, "python-worker-a", concurrency=8, prefetch=16).run()
+    """
+
+    def __init__(
+        self,
+        client: FaultlineClient,
+        handler: Handler,
+        worker_name: str,
+        queue: str = "default",
+        tenant_id: str = "default",
+        concurrency: int = 4,
+        prefetch: int | None = None,
+        lease_seconds: int = 30,
+        heartbeat_seconds: float | None = None,
+        completion_batch_size: int = 100,
+        completion_window_seconds: float = 0.05,
+        idle_poll_seconds: float = 1.0,
+    ) -> None:
+        self.client = client
+        self.handler = handler
+        self.registration = WorkerRegistration(worker_name=worker_name, queue=queue, tenant_id=tenant_id)
+        self.concurrency = max(1, concurrency)
+        self.prefetch = self.concurrency if prefetch is None else max(0, prefetch)
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or lease_seconds / 3
+        self.completion_batch_size = max(1, completion_batch_size)
+        self.completion_window_seconds = completion_window_seconds
+        self.idle_poll_seconds = idle_poll_seconds
+        self.worker_id: str | None = None
+
+        self._cond = threading.Condition()
+        self._free = self.concurrency + self.prefetch  # lease slots not held by this worker
+        self._held: dict[str, Lease] = {}
+        self._lost: set[str] = set()
+        self._counts: Counter[str] = Counter()
+        self._ready: Queue[Lease | None] = Queue()
+        self._outcomes: Queue[Outcome | None] = Queue()
+        self._stopping = threading.Event()
+        self._drained = threading.Event()
+        self._stop_lock = threading.Lock()
+        self._threads: dict[str, threading.Thread] = {}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counts of claimed, succeeded, failed, stale, lost and released jobs, and of call errors."""
+        with self._cond:
+            return dict(self._counts)
+
+    def start(self) -> None:
+        if self._threads:
+            raise RuntimeError("worker already started")
+        self.worker_id = self.client.register_worker(self.registration).worker_id
+        self._spawn("claim", self._claim_loop)
+        self._spawn("heartbeat", self._heartbeat_loop)
+        for i in range(self.concurrency):
+            self._spawn(f"handler-{i}", self._handler_loop)
+        self._spawn("commit", self._commit_loop)
+
+    def run(self) -> None:
+        """start(), then block until stop(), SIGTERM or Ctrl-C, and shut down gracefully."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self._stopping.set())
+        self.start()
+        try:
+            self._stopping.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Graceful shutdown: stop claiming, release unstarted leases, wait up
+        to timeout for running handlers and commit their outcomes. A claim
+        still in flight when stop() returns releases its leases on arrival.
+        """
+        self._stopping.set()
+        with self._stop_lock:
+            if not self._threads or self._drained.is_set():
+                return
+            deadline = None if timeout is None else time.monotonic() + timeout
+            with self._cond:
+                self._cond.notify_all()
+            self._join(["claim"], deadline)
+            self._release(self._take_ready())
+            for _ in range(self.concurrency):
+                self._ready.put(None)
+            self._join([n for n in self._threads if n.startswith("handler-")], deadline)
+            self._drained.set()
+            self._outcomes.put(None)
+            self._join(["heartbeat", "commit"], deadline)
+
+    def __enter__(self) -> Worker:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _spawn(self, name: str, target: Callable[[], None]) -> None:
+        thread = threading.Thread(target=target, name=f"faultline-{name}", daemon=True)
+        self._threads[name] = thread
+        thread.start()
+
+    def _join(self, names: list[str], deadline: float | None) -> None:
+        for name in names:
+            self._threads[name].join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._cond:
+            self._counts[key] += n
+
+    def _claim_loop(self) -> None:
+        while not self._stopping.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: self._free > 0 or self._stopping.is_set())
+                if self._stopping.is_set():
+                    return
+                want, self._free = self._free, 0
+            try:
+                leases = self._claim(want)
+            except Exception:
+                self._count("claim_errors")
+                leases = []
+            with self._cond:
+                self._free += want - len(leases)
+                self._held.update((lease.job_id, lease) for lease in leases)
+                self._counts["claimed"] += len(leases)
+                # Checked under the lock stop() drains _ready with: a claim that returns after
+                # stop() has given up waiting for it hands its leases back instead of queueing them.
+                late = self._stopping.is_set()
+                if not late:
+                    for lease in leases:
+                        self._ready.put(lease)
+            if late:
+                self._release(leases)
+                return
+            if not leases:
+                self._stopping.wait(self.idle_poll_seconds)
+
+    def _claim(self, n: int) -> list[Lease]:
+        request = ClaimRequest(
+            worker_id=self.worker_id,
+            batch_size=n,
+            queue=self.registration.queue,
+            tenant_id=self.registration.tenant_id,
+            lease_seconds=self.lease_seconds,
+        )
+        return [
+            Lease(
+                job_id=str(item["job_id"]),
+                fencing_token=int(item["fencing_token"]),
+                payload=item.get("payload"),
+                attempts=int(item.get("attempts", 0)),
+            )
+            for item in self.client.claim(request).get("items", [])
+        ]
+
+    def _handler_loop(self) -> None:
+        while (lease := self._ready.get()) is not None:
+            with self._cond:
+                lost = lease.job_id in self._lost
+            if lost:
+                self._forget([lease.job_id])
+                continue
+            try:
+                result = self.handler(lease)
+            except Exception as exc:
+                reason = f"{type(exc).__name__}: {exc}"
+                self._outcomes.put(
+                    FailRequest(job_id=lease.job_id, fencing_token=lease.fencing_token, reason=reason)
+                )
+            else:
+                self._outcomes.put(
+                    CompleteRequest(job_id=lease.job_id, fencing_token=lease.fencing_token, result=result)
+                )
+
+    def _commit_loop(self) -> None:
+        while (first := self._outcomes.get()) is not None:
+            batch = [first]
+            deadline = time.monotonic() + self.completion_window_seconds
+            while len(batch) < self.completion_batch_size:
+                try:
+                    outcome = self._outcomes.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    break
+                if outcome is None:
+                    self._commit(batch)
+                    return
+                batch.append(outcome)
+            self._commit(batch)
+
+    def _commit(self, batch: list[Outcome]) -> None:
+        completions = [o for o in batch if isinstance(o, CompleteRequest)]
+        failures = [o for o in batch if isinstance(o, FailRequest)]
+        try:
+            results = []
+            if completions:
+                results += [("succeeded", r) for r in self.client.complete_many(completions, self.worker_id)]
+            if failures:
+                results += [("failed", r) for r in self.client.fail_many(failures, self.worker_id)]
+        except Exception:
+            # The leases expire and the jobs are retried; the fence rejects any late duplicate.
+            self._count("commit_errors", len(batch))
+        else:
+            for outcome, result in results:
+                self._count(outcome if result.committed else "stale")
+        finally:
+            self._forget([o.job_id for o in batch])
+
+    def _heartbeat_loop(self) -> None:
+        while not self._drained.wait(self.heartbeat_seconds):
+            with self._cond:
+                leases = list(self._held.values())
+            if not leases:
+                continue
+            try:
+                lost = self.client.renew_leases(self.worker_id, leases, self.lease_seconds)
+            except Exception:
+                self._count("heartbeat_errors")
+                continue
+            with self._cond:
+                lost = [job_id for job_id in lost if job_id in self._held]
+                self._lost.update(lost)
+                self._counts["lost"] += len(lost)
+
+    def _take_ready(self) -> list[Lease]:
+        leases = []
+        with self._cond:
+            while True:
+                try:
+                    lease = self._ready.get_nowait()
+                except Empty:
+                    return leases
+                if lease is not None:
+                    leases.append(lease)
+
+    def _release(self, leases: list[Lease]) -> None:
+        with self._cond:
+            live = [lease for lease in leases if lease.job_id not in self._lost]
+        try:
+            if live:
+                self._count("released", self.client.release_leases(self.worker_id, live))
+        except Exception:
+            self._count("release_errors")
+        finally:
+            self._forget([lease.job_id for lease in leases])
+
+    def _forget(self, job_ids: Iterable[str]) -> None:
+        with self._cond:
+            for job_id in job_ids:
+                self._held.pop(job_id, None)
+                self._lost.discard(job_id)
+                self._free += 1
+            self._cond.notify_all()
@@ -5,27 +5,58 @@ services/api/app.py
 ────────────────────
 Faultline HTTP API — deployed service entrypoint.
 
-Uses raw psycopg2 (no ORM) for consistency with the worker layer.
+Raw SQL (no ORM) for consistency with the worker layer, on a shared
+asyncpg pool opened in the app lifespan (see db.py); the job routes are
+async and never block the event loop on connection setup.
 PostgreSQL is the single source of truth — no external broker.
 """
 
+import asyncio
 import hashlib
+import json
+import os
+import time
 import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, HTTPException
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request
 from services.common.tracing import init_tracing, get_tracer, input_fingerprint, inject_traceparent, start_span
 from prometheus_client import Counter, generate_latest
-from psycopg2.extras import Json
-from pydantic import BaseModel
-from starlette.responses import Response
-
-from db import get_conn
+from pydantic import BaseModel, ValidationError
+from starlette.responses import Response, StreamingResponse
+
+from db import DATABASE_URL, acquire, close_pool, open_pool, refresh_pool_gauges
+from job_events import LISTEN_KEEPALIVE_SECONDS, RESYNC, TERMINAL_STATES, JobEventHub
+from services.common.completion import InvalidJobId, complete_jobs_async, fail_jobs_async
+from services.common.queue_depth import DepthCache, fetch_depth_async
+from services.common.submission import IdempotencyConflict, submit_job_async, submit_jobs_async
+
+BATCH_MAX_ITEMS = int(os.getenv("FAULTLINE_API_BATCH_MAX_ITEMS", "500000"))
+MAX_WAIT_SECONDS = float(os.getenv("FAULTLINE_API_MAX_WAIT_SECONDS", "60"))
+EVENTS_MAX_IDS = int(os.getenv("FAULTLINE_API_EVENTS_MAX_IDS", "1000"))
+COMPLETE_MAX_ITEMS = int(os.getenv("FAULTLINE_API_COMPLETE_MAX_ITEMS", "1000"))
+_depth_cache = DepthCache()
+_events = JobEventHub(DATABASE_URL)
 
 init_tracing("faultline-api")
 tracer = get_tracer("faultline.api")
 
-app = FastAPI(title="Faultline", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app):
+    await open_pool()
+    await _events.start()
+    try:
+        yield
+    finally:
+        await _events.stop()
+        await close_pool()
+
+
+app = FastAPI(title="Faultline", version="1.0.0", lifespan=lifespan)
 
 # ── Metrics ───────────────────────────────────────────────────────────────────
 
@@ -41,6 +72,32 @@ class JobRequest(BaseModel):
     idempotency_key: str | None = None
 
 
+class CompleteItem(BaseModel):
+    job_id: str
+    fencing_token: int
+    result: Any = None
+
+
+class CompleteJobsRequest(BaseModel):
+    worker_id: str | None = None
+    items: list[CompleteItem]
+
+
+class FailItem(BaseModel):
+    job_id: str
+    fencing_token: int
+    error: str = ""
+
+
+class FailJobsRequest(BaseModel):
+    worker_id: str | None = None
+    items: list[FailItem]
+
+
+def _payload_hash(payload: dict) -> str:
+    return hashlib.sha256(str(payload).encode()).hexdigest()
+
+
 # ── Middleware ────────────────────────────────────────────────────────────────
 
 @app.middleware("http")
@@ -49,15 +106,31 @@ async def count_requests(request, call_next):
     return await call_next(request)
 
 
+# ── DB ────────────────────────────────────────────────────────────────────────
+
+@asynccontextmanager
+async def _conn():
+    """
+    Pooled connection for a request; an exhausted pool is a 503, not a hung
+    request. Only the checkout maps to 503: a timeout inside the request
+    propagates as a 500, since clients retry 503s.
+    """
+    async with AsyncExitStack() as stack:
+        try:
+            conn = await stack.enter_async_context(acquire())
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="DB pool exhausted")
+        yield conn
+
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 @app.get("/health")
-def health():
+async def health():
     """Liveness check + DB connectivity probe."""
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
+        async with acquire() as conn:
+            await conn.fetchval("SELECT 1")
         return {"status": "ok", "db": "connected"}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"DB unavailable: {e}")
@@ -66,11 +139,12 @@ def health():
 @app.get("/metrics")
 def metrics():
     """Prometheus scrape endpoint."""
+    refresh_pool_gauges()
     return Response(generate_latest(), media_type="text/plain")
 
 
 @app.post("/jobs", status_code=201)
-def create_job(req: JobRequest):
+async def create_job(req: JobRequest):
     """
     Enqueue a new job.
 
@@ -78,55 +152,217 @@ def create_job(req: JobRequest):
     return the existing job (200) rather than creating a new one.
     Payload hash mismatch on the same key returns 409.
     """
-    job_id = str(uuid.uuid4())
-    payload_hash = hashlib.sha256(str(req.payload).encode()).hexdigest()
-
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-
-            # Idempotency check
-            if req.idempotency_key:
-                cur.execute(
-                    "SELECT id, payload_hash FROM jobs WHERE idempotency_key = %s",
-                    (req.idempotency_key,),
-                )
-                row = cur.fetchone()
-                if row:
-                    existing_id, existing_hash = row
-                    if existing_hash != payload_hash:
-                        raise HTTPException(
-                            status_code=409,
-                            detail="Idempotency key reused with different payload",
-                        )
-                    jobs_duplicate.inc()
-                    return {"job_id": existing_id, "status": "existing"}
-
-            cur.execute(
-                """
-                INSERT INTO jobs (id, idempotency_key, payload_hash, state, payload)
-                VALUES (%s, %s, %s, 'queued', %s)
-                """,
-                (job_id, req.idempotency_key, payload_hash, Json(req.payload)),
+    payload_hash = _payload_hash(req.payload)
+
+    # One statement in autocommit: insert + wakeup, or the existing job.
+    async with _conn() as conn:
+        try:
+            submission = await submit_job_async(conn, req.payload, payload_hash, req.idempotency_key)
+        except IdempotencyConflict:
+            raise HTTPException(
+                status_code=409,
+                detail="Idempotency key reused with different payload",
             )
 
+    if not submission.created:
+        jobs_duplicate.inc()
+        return {"job_id": submission.job_id, "status": "existing"}
+
     jobs_submitted.inc()
-    return {"job_id": job_id, "status": "queued"}
+    return {"job_id": submission.job_id, "status": "queued"}
+
+
+@app.post("/jobs:batch")
+async def create_jobs_batch(request: Request):
+    """
+    Enqueue many jobs in one transaction.
+
+    The body is a JSON array or NDJSON (Content-Type: application/x-ndjson)
+    of {"payload": ..., "idempotency_key": ...} items. Each item gets its own
+    status: queued, existing (same key and payload), or conflict (same key,
+    different payload; job_id is the existing job). A conflict does not fail
+    the rest of the batch.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            raw = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            raw = json.loads(body)
+            if not isinstance(raw, list):
+                raise ValueError("expected a JSON array")
+        items = [JobRequest.model_validate(item) for item in raw]
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch: {e}")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+
+    async with _conn() as conn:
+        results = await submit_jobs_async(
+            conn,
+            (
+                (item.payload, _payload_hash(item.payload), item.idempotency_key)
+                for item in items
+            ),
+        )
+
+    created = sum(r.status == "queued" for r in results)
+    jobs_submitted.inc(created)
+    jobs_duplicate.inc(sum(r.status == "existing" for r in results))
+    return {
+        "submitted": created,
+        "items": [{"job_id": r.job_id, "state": r.state, "status": r.status} for r in results],
+    }
+
+
+@app.post("/jobs:complete")
+@app.post("/v1/jobs:complete")
+async def complete_jobs(req: CompleteJobsRequest):
+    """
+    Complete many leased jobs in one transaction.
+
+    Each item is fenced on its own fencing_token (and on worker_id, when
+    given): it commits only while that lease is current. The response has
+    one entry per item, in order, with committed / stale_write_rejected
+    flags; a stale item never fails the rest of the batch. Repeating a
+    completion that already committed reports committed again. Also served
+    under /v1, the path the SDK's complete_many() calls.
+    """
+    items = [(item.job_id, item.fencing_token, item.result) for item in req.items]
+    return await _write_batch(complete_jobs_async, req.worker_id, items)
+
+
+@app.post("/jobs:fail")
+@app.post("/v1/jobs:fail")
+async def fail_jobs(req: FailJobsRequest):
+    """
+    Fail many leased jobs in one transaction, fenced per item like
+    /jobs:complete. A job with attempts left is queued again after the
+    worker's backoff; otherwise it ends failed.
+    """
+    items = [(item.job_id, item.fencing_token, item.error) for item in req.items]
+    return await _write_batch(fail_jobs_async, req.worker_id, items)
+
+
+async def _write_batch(write, worker_id: str | None, items: list) -> dict:
+    if len(items) > COMPLETE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {COMPLETE_MAX_ITEMS} items")
+    try:
+        async with _conn() as conn:
+            results = await write(conn, items, owner=worker_id or None)
+    except InvalidJobId as e:
+        raise HTTPException(status_code=422, detail=f"Invalid job_id: {e}")
+    return {
+        "items": [
+            {
+                "job_id": r.job_id,
+                "committed": r.committed,
+                "stale_write_rejected": r.stale_write_rejected,
+                "state": r.state,
+                "reason": r.reason,
+            }
+            for r in results
+        ]
+    }
+
+
+@app.get("/jobs:events")
+async def job_events(ids: str):
+    """
+    Server-sent events for the comma-separated job ids in ?ids=.
+
+    Each job's current state is sent first, then every transition, as
+    `event: state` with data {"job_id", "state"}. The stream ends once every
+    job is succeeded or failed. A comment line every
+    FAULTLINE_API_LISTEN_KEEPALIVE_SECONDS keeps idle proxies from closing it.
+    """
+    keys = list(dict.fromkeys(_job_key(job_id) for job_id in ids.split(",") if job_id.strip()))
+    if not keys or len(keys) > EVENTS_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"ids must name 1 to {EVENTS_MAX_IDS} jobs")
+
+    sub = _events.subscribe(keys)
+    try:
+        states = await _load_states(keys)
+        missing = [job_id for job_id in keys if job_id not in states]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Job not found: {missing[0]}")
+    except BaseException:
+        sub.close()
+        raise
+
+    return StreamingResponse(
+        _stream_events(sub, states),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
 @app.get("/jobs/{job_id}")
-def get_job(job_id: str):
-    """Fetch current state of a job by ID."""
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, state, attempts, max_attempts,
-                       fencing_token, last_error, created_at, updated_at
-                FROM jobs WHERE id = %s
-                """,
-                (job_id,),
-            )
-            row = cur.fetchone()
+async def get_job(job_id: str, wait: str | None = None):
+    """
+    Fetch current state of a job by ID, archived jobs included.
+
+    With ?wait=30s (also 500ms, or plain seconds; capped at
+    FAULTLINE_API_MAX_WAIT_SECONDS) the request is held until the job is
+    succeeded or failed, or the wait runs out, and then answers with the
+    job as it is. Waiting holds no DB connection.
+    """
+    key = _job_key(job_id)
+    if wait is None:
+        return await _load_job(key)
+
+    deadline = time.monotonic() + _parse_wait(wait)
+    with _events.subscribe([key]) as sub:
+        job = await _load_job(key)
+        while job["state"] not in TERMINAL_STATES:
+            event = await sub.next(deadline - time.monotonic())
+            if event is None:
+                break
+            if event is RESYNC or event.state in TERMINAL_STATES:
+                job = await _load_job(key)
+    return job
+
+
+def _job_key(job_id: str) -> str:
+    """Canonical uuid text, as the jobs_state_events trigger publishes it."""
+    try:
+        return str(uuid.UUID(job_id.strip()))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+def _parse_wait(wait: str) -> float:
+    text = wait.strip().lower()
+    try:
+        if text.endswith("ms"):
+            seconds = float(text[:-2]) / 1000
+        elif text.endswith("s"):
+            seconds = float(text[:-1])
+        else:
+            seconds = float(text)
+    except ValueError:
+        seconds = -1
+    if not seconds >= 0:
+        raise HTTPException(status_code=422, detail=f"Invalid wait: {wait!r}")
+    return min(seconds, MAX_WAIT_SECONDS)
+
+
+async def _load_job(job_id: str) -> dict:
+    async with _conn() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT j.id::text, j.state, j.attempts, j.max_attempts,
+                   j.fencing_token, j.last_error, j.created_at, j.updated_at, r.result
+            FROM jobs j LEFT JOIN job_results r ON r.job_id = j.id
+            WHERE j.id = $1::uuid
+            UNION ALL
+            SELECT id::text, state, attempts, max_attempts,
+                   fencing_token, last_error, created_at, updated_at, result
+            FROM jobs_history WHERE id = $1::uuid
+            LIMIT 1
+            """,
+            job_id,
+        )
 
     if not row:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -140,18 +376,72 @@ def get_job(job_id: str):
         "last_error": row[5],
         "created_at": str(row[6]),
         "updated_at": str(row[7]),
+        "result": json.loads(row[8]) if row[8] is not None else None,
     }
 
 
-@app.get("/queue/depth")
-def queue_depth():
-    """Current count of jobs per state — useful for backlog monitoring."""
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
-            rows = cur.fetchall()
+async def _load_states(job_ids) -> dict:
+    async with _conn() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT id::text, state FROM jobs WHERE id = ANY($1::uuid[])
+            UNION ALL
+            SELECT id::text, state FROM jobs_history WHERE id = ANY($1::uuid[])
+            """,
+            list(job_ids),
+        )
     return {row[0]: row[1] for row in rows}
 
+
+def _sse(job_id: str, state: str) -> str:
+    return f"event: state\ndata: {json.dumps({'job_id': job_id, 'state': state})}\n\n"
+
+
+async def _stream_events(sub, states: dict):
+    sent: dict[str, str] = {}
+
+    def changed(job_id, state):
+        if sent.get(job_id) == state:
+            return False
+        sent[job_id] = state
+        return True
+
+    try:
+        for job_id, state in states.items():
+            if changed(job_id, state):
+                yield _sse(job_id, state)
+        pending = {job_id for job_id, state in states.items() if state not in TERMINAL_STATES}
+        while pending:
+            event = await sub.next(LISTEN_KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            updates = await _load_states(pending) if event is RESYNC else {event.job_id: event.state}
+            for job_id, state in updates.items():
+                if job_id in pending and changed(job_id, state):
+                    yield _sse(job_id, state)
+                if state in TERMINAL_STATES:
+                    pending.discard(job_id)
+    finally:
+        sub.close()
+
+
+@app.get("/queue/depth")
+async def queue_depth():
+    """
+    Current count of jobs per state — useful for backlog monitoring.
+
+    Read from the trigger-maintained job_state_counts, and cached for
+    FAULTLINE_QUEUE_DEPTH_CACHE_SECONDS.
+    """
+    return await _depth_cache.get(_load_depth)
+
+
+async def _load_depth():
+    async with _conn() as conn:
+        return await fetch_depth_async(conn)
+
+
 app.include_router(race_router)
 
 
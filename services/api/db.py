@@ -1,7 +1,101 @@
+"""
+services/api/db.py
+───────────────────
+Database access for the HTTP API.
+
+Request handlers borrow connections from one asyncpg pool, opened in the
+app lifespan (open_pool / close_pool). Submitting a job therefore costs a
+pool checkout instead of a TCP + auth handshake, and concurrent requests
+are capped by FAULTLINE_API_POOL_MAX_SIZE rather than by a threadpool.
+
+Pool saturation is exported next to faultline_api_requests_total:
+
+    faultline_api_db_pool_size             open connections
+    faultline_api_db_pool_in_use           connections checked out by requests
+    faultline_api_db_pool_waiting          requests queued for a connection
+    faultline_api_db_pool_acquire_seconds  checkout wait
+    faultline_api_db_pool_timeouts_total   checkouts that gave up after
+                                           FAULTLINE_API_POOL_ACQUIRE_TIMEOUT
+
+get_conn() still returns a plain psycopg2 connection for scripts.
+"""
+
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
 import psycopg2
+from prometheus_client import Counter, Gauge, Histogram
 
 DATABASE_URL = os.environ["DATABASE_URL"]
+API_POOL_MIN_SIZE = int(os.getenv("FAULTLINE_API_POOL_MIN_SIZE", "2"))
+API_POOL_MAX_SIZE = int(os.getenv("FAULTLINE_API_POOL_MAX_SIZE", "20"))
+API_POOL_ACQUIRE_TIMEOUT = float(os.getenv("FAULTLINE_API_POOL_ACQUIRE_TIMEOUT", "5"))
+
+pool_size = Gauge("faultline_api_db_pool_size", "Open connections in the API DB pool")
+pool_in_use = Gauge("faultline_api_db_pool_in_use", "API DB pool connections checked out")
+pool_waiting = Gauge("faultline_api_db_pool_waiting", "Requests waiting for an API DB pool connection")
+pool_acquire_seconds = Histogram(
+    "faultline_api_db_pool_acquire_seconds",
+    "Time spent waiting for an API DB pool connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+pool_timeouts = Counter("faultline_api_db_pool_timeouts_total", "API DB pool checkouts that timed out")
+
+_pool: asyncpg.Pool | None = None
+
 
 def get_conn():
     return psycopg2.connect(DATABASE_URL)
+
+
+async def open_pool() -> asyncpg.Pool:
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=min(API_POOL_MIN_SIZE, API_POOL_MAX_SIZE),
+            max_size=API_POOL_MAX_SIZE,
+        )
+        refresh_pool_gauges()
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def refresh_pool_gauges() -> None:
+    if _pool is None:
+        return
+    size = _pool.get_size()
+    pool_size.set(size)
+    pool_in_use.set(size - _pool.get_idle_size())
+
+
+@asynccontextmanager
+async def acquire():
+    """Borrow a pooled connection; raises asyncio.TimeoutError when the pool stays exhausted."""
+    if _pool is None:
+        raise RuntimeError("API DB pool is not open")
+    started = time.monotonic()
+    pool_waiting.inc()
+    try:
+        conn = await _pool.acquire(timeout=API_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        pool_timeouts.inc()
+        raise
+    finally:
+        pool_waiting.dec()
+        pool_acquire_seconds.observe(time.monotonic() - started)
+    refresh_pool_gauges()
+    try:
+        yield conn
+    finally:
+        await _pool.release(conn)
+        refresh_pool_gauges()
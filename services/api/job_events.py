@@ -0,0 +1,189 @@
+"""
+services/api/job_events.py
+───────────────────────────
+Job state transitions for waiting clients, fed by one LISTEN connection.
+
+The jobs_state_events trigger (migration 025) publishes every state change
+on the faultline_job_events channel. The API process holds a single
+dedicated asyncpg connection that LISTENs there and fans each event out to
+the subscriptions registered for that job id. Long-polls
+(GET /jobs/{job_id}?wait=30s) and SSE streams (GET /jobs:events) therefore
+cost one DB connection per API process, however many clients are waiting.
+They only borrow a pool connection to read job rows.
+
+Subscribe before reading the current state: a transition that commits
+between the read and the subscription is then queued, not lost. After the
+LISTEN connection drops, or when a subscriber falls more than
+FAULTLINE_API_EVENT_BUFFER events behind, the subscriber gets RESYNC and
+must re-read the job rows. Notifications sent while no one was listening
+are gone.
+
+    faultline_api_job_waiters        open subscriptions
+    faultline_api_job_events_total   transitions received on the channel
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+
+import asyncpg
+from prometheus_client import Counter, Gauge
+
+JOB_EVENTS_CHANNEL = "faultline_job_events"
+TERMINAL_STATES = frozenset({"succeeded", "failed"})
+
+EVENT_BUFFER = int(os.getenv("FAULTLINE_API_EVENT_BUFFER", "256"))
+LISTEN_KEEPALIVE_SECONDS = float(os.getenv("FAULTLINE_API_LISTEN_KEEPALIVE_SECONDS", "15"))
+LISTEN_RECONNECT_MAX_SECONDS = 10.0
+
+job_waiters = Gauge("faultline_api_job_waiters", "Open job state subscriptions")
+job_events_total = Counter("faultline_api_job_events_total", "Job state transitions received")
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    job_id: str
+    state: str
+
+
+RESYNC = JobEvent(job_id="", state="resync")
+
+
+class Subscription:
+    """Transitions for a fixed set of job ids, in commit order. close() (or with) unsubscribes."""
+
+    def __init__(self, hub: JobEventHub, job_ids, maxsize: int = EVENT_BUFFER):
+        self.job_ids = frozenset(job_ids)
+        self._hub = hub
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._lost = False
+        self._closed = False
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._hub._unsubscribe(self)
+
+    def _deliver(self, event: JobEvent) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._lost = True
+
+    async def next(self, timeout: float) -> JobEvent | None:
+        """The next event, RESYNC if events were lost, or None after timeout seconds."""
+        if self._lost:
+            self._lost = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return RESYNC
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            return None
+
+
+class JobEventHub:
+    def __init__(self, dsn: str, channel: str = JOB_EVENTS_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._subs: dict[str, set[Subscription]] = {}
+        self._conn = None
+        self._closed = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start the LISTEN loop and wait for the first connection."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._disconnect()
+
+    def subscribe(self, job_ids) -> Subscription:
+        """Start queueing transitions for job_ids (canonical uuid text)."""
+        sub = Subscription(self, job_ids)
+        for job_id in sub.job_ids:
+            self._subs.setdefault(job_id, set()).add(sub)
+        job_waiters.inc()
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        job_waiters.dec()
+        for job_id in sub.job_ids:
+            subs = self._subs.get(job_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[job_id]
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        for job_id, state in json.loads(payload):
+            job_events_total.inc()
+            for sub in self._subs.get(job_id, ()):
+                sub._deliver(JobEvent(job_id=job_id, state=state))
+
+    def _on_terminate(self, _conn) -> None:
+        self._closed.set()
+
+    def _resync_all(self) -> None:
+        for sub in {s for subs in self._subs.values() for s in subs}:
+            sub._deliver(RESYNC)
+
+    async def _connect(self) -> None:
+        self._closed.clear()
+        conn = await asyncpg.connect(self.dsn)
+        conn.add_termination_listener(self._on_terminate)
+        await conn.add_listener(self.channel, self._on_notify)
+        self._conn = conn
+
+    async def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
+
+    async def _run(self) -> None:
+        backoff = 0.1
+        connected_before = False
+        while True:
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, LISTEN_RECONNECT_MAX_SECONDS)
+                continue
+            backoff = 0.1
+            if connected_before:
+                # Whatever was published while the connection was down is lost.
+                self._resync_all()
+            connected_before = True
+            self._ready.set()
+
+            while not self._closed.is_set():
+                try:
+                    await asyncio.wait_for(self._closed.wait(), timeout=LISTEN_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # A half-open socket never terminates on its own.
+                    try:
+                        await asyncio.wait_for(self._conn.fetchval("SELECT 1"), timeout=LISTEN_KEEPALIVE_SECONDS)
+                    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                        break
+            await self._disconnect()
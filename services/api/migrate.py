@@ -1,3 +1,4 @@
+import argparse
 import os
 from pathlib import Path
 
@@ -19,12 +20,26 @@ def list_sql_migrations(dirpath: Path) -> list[Path]:
     return sorted([p for p in dirpath.glob("*.sql") if p.is_file()])
 
 
+def layout_migration(name: str) -> Path:
+    """Optional schema layout, applied after the regular migrations (migrations/layouts/<name>.sql)."""
+    path = migrations_dir() / "layouts" / f"{name}.sql"
+    if not path.is_file():
+        raise RuntimeError(f"Unknown schema layout: {name}")
+    return path
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Apply pending SQL migrations.")
+    parser.add_argument("--layout", help="also convert to an optional schema layout, e.g. lease_table")
+    args = parser.parse_args()
+
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is not set")
 
     mdir = migrations_dir()
     files = list_sql_migrations(mdir)
+    if args.layout:
+        files.append(layout_migration(args.layout))
 
     if not files:
         print(f"No migration files found in {mdir}")
@@ -46,7 +61,7 @@ def main():
 
             applied_now = 0
             for path in files:
-                name = path.name
+                name = path.relative_to(mdir).as_posix()
                 if name in applied:
                     continue
 
@@ -1,20 +1,40 @@
+"""
+Correctness audit over race artifacts (artifacts/races/*.json).
+
+Runs are incremental: the audit state file keeps the newest artifact mtime
+already analyzed (plus the artifacts sharing that mtime) and the report so
+far, so each run parses only artifacts written since the last one and folds
+them into the stored totals. `--full` re-reads everything.
+"""
+
 import json
+import sys
 from pathlib import Path
 from collections import defaultdict
 
 ARTIFACT_DIR = Path("artifacts/races")
 OUT_DIR = Path("artifacts/reports")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
+STATE_PATH = OUT_DIR / "correctness_audit_state.json"
 
 
-def load_race_artifacts():
+def load_race_artifacts(since_ns: int = 0, seen_at_watermark=()):
+    """Artifacts modified at or after since_ns, minus those already seen; returns (artifacts, watermark, seen)."""
     artifacts = []
+    watermark, seen = since_ns, set(seen_at_watermark)
     for f in ARTIFACT_DIR.glob("*.json"):
+        mtime = f.stat().st_mtime_ns
+        if mtime < since_ns or (mtime == since_ns and f.name in seen_at_watermark):
+            continue
         try:
             artifacts.append(json.loads(f.read_text()))
         except Exception:
             continue
-    return artifacts
+        if mtime > watermark:
+            watermark, seen = mtime, set()
+        if mtime == watermark:
+            seen.add(f.name)
+    return artifacts, watermark, sorted(seen)
 
 
 def analyze(artifacts):
@@ -61,6 +81,26 @@ def analyze(artifacts):
     }
 
 
+def merge(previous, report):
+    heatmap = defaultdict(int, previous["correctness_heatmap"])
+    for k, v in report["correctness_heatmap"].items():
+        heatmap[k] += v
+    return {
+        "total_runs": previous["total_runs"] + report["total_runs"],
+        "violations_detected": previous["violations_detected"] + report["violations_detected"],
+        "near_miss_races_detected": previous["near_miss_races_detected"] + report["near_miss_races_detected"],
+        "correctness_heatmap": dict(heatmap),
+        "details": previous["details"] + report["details"],
+    }
+
+
+def load_state():
+    try:
+        return json.loads(STATE_PATH.read_text())
+    except Exception:
+        return None
+
+
 def write_report(report):
     Path("artifacts/reports/correctness_audit.json").write_text(
         json.dumps(report, indent=2)
@@ -81,12 +121,18 @@ def write_report(report):
     Path("artifacts/reports/correctness_audit.md").write_text(md)
 
 
-def main():
-    artifacts = load_race_artifacts()
-    report = analyze(artifacts)
+def main(full: bool = False):
+    state = None if full else load_state()
+    if state is None:
+        artifacts, watermark, seen = load_race_artifacts()
+        report = analyze(artifacts)
+    else:
+        artifacts, watermark, seen = load_race_artifacts(state["watermark_ns"], state["seen"])
+        report = merge(state["report"], analyze(artifacts))
     write_report(report)
+    STATE_PATH.write_text(json.dumps({"watermark_ns": watermark, "seen": seen, "report": report}))
     print("artifacts/reports/correctness_audit.md")
 
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv[1:])
@@ -0,0 +1,344 @@
+"""
+services/common/completion.py
+──────────────────────────────
+Fenced batch completion and failure, shared by the HTTP API
+(POST /jobs:complete, POST /jobs:fail) and gRPC CompleteJobs / FailJobs /
+CompleteJob / StreamLeases.
+
+A batch is one statement in one transaction, shaped like the worker's
+FENCED_COMMIT: every named job row is locked in id order, and each item is
+then checked on its own against the locked row. An item is applied only
+while the job is running under the item's fencing token, the lease has not
+expired, and (when the caller names one) the lease owner matches. One stale
+item never affects the others.
+
+    complete   ledger entry (ON CONFLICT (job_id, fencing_token) DO NOTHING),
+               state 'succeeded', and the result in job_results if one was sent
+    fail       attempts + 1; 'queued' again after the worker's backoff
+               (2s doubling, capped at 300s), or 'failed' once attempts
+               reach max_attempts
+
+Every item gets a CompletionResult, in item order:
+
+    committed             applied now, or (complete only) a repeat of a
+                          completion that already committed with this token
+    stale_write_rejected  the token, owner, state or lease no longer allows
+                          the write
+    neither               no such job
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass
+
+from services.common.queue_notify import QUEUE_CHANNEL, notify_queue
+from services.worker import statements
+
+COMMITTED = frozenset({"committed", "duplicate"})
+STALE = frozenset({"stale_token", "not_running", "not_owner", "lease_expired"})
+
+# Shared tail: one row per request item, in item order.
+_VERDICT = """
+    SELECT req.id::text,
+           CASE
+               WHEN fence.id IS NULL THEN 'not_found'
+               WHEN EXISTS (SELECT 1 FROM done d WHERE d.id = req.id AND d.token = req.token) THEN 'committed'
+               {duplicate}
+               WHEN fence.fencing_token <> req.token THEN 'stale_token'
+               WHEN fence.state <> 'running' THEN 'not_running'
+               WHEN NOT fence.owned THEN 'not_owner'
+               ELSE 'lease_expired'
+           END,
+           COALESCE((SELECT d.state FROM done d WHERE d.id = req.id), fence.state)
+    FROM req
+    LEFT JOIN (SELECT DISTINCT ON (id) * FROM fence) fence ON fence.id = req.id
+    ORDER BY req.ord
+"""
+
+_COMPLETE_DUPLICATE = """WHEN fence.state = 'succeeded' AND fence.fencing_token = req.token
+                    AND EXISTS (SELECT 1 FROM ledger_entries l
+                                WHERE l.job_id = fence.id AND l.fencing_token = req.token)
+                   THEN 'duplicate'"""
+
+_FENCE_COLUMNS = """
+               j.fencing_token,
+               j.state,
+               (%(owner)s::text IS NULL OR j.lease_owner = %(owner)s) AS owned,
+               (j.lease_expires_at IS NOT NULL AND j.lease_expires_at < NOW()) AS lease_expired"""
+
+_ALLOWED = "state = 'running' AND fencing_token = token AND owned AND NOT lease_expired"
+
+COMPLETE_JOBS = statements.register(
+    "faultline_complete_jobs",
+    f"""
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[], %(results)s::jsonb[])
+                      WITH ORDINALITY AS r(id, token, result, ord)
+    ),
+    fence AS (
+        SELECT j.id, req.token, req.result,{_FENCE_COLUMNS}
+        FROM jobs j
+        JOIN req ON req.id = j.id
+        ORDER BY j.id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT DISTINCT ON (id) id, token, result FROM fence WHERE {_ALLOWED}
+    ),
+    ledger AS (
+        INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
+        SELECT id, token, 'default', 1 FROM allowed
+        ON CONFLICT (job_id, fencing_token) DO NOTHING
+        RETURNING job_id
+    ),
+    results AS (
+        INSERT INTO job_results (job_id, fencing_token, result)
+        SELECT id, token, result FROM allowed WHERE result IS NOT NULL
+        ON CONFLICT (job_id) DO NOTHING
+        RETURNING job_id
+    ),
+    done AS (
+        UPDATE jobs j
+        SET state='succeeded',
+            lease_owner=NULL,
+            lease_expires_at=NULL,
+            next_run_at=NULL,
+            updated_at=NOW()
+        FROM allowed
+        WHERE j.id = allowed.id
+        RETURNING j.id, j.state, allowed.token
+    )
+    {_VERDICT.format(duplicate=_COMPLETE_DUPLICATE)}
+    """,
+    [("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("results", "jsonb[]"), ("owner", "text")],
+    "commit",
+    lease_table_sql=f"""
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[], %(results)s::jsonb[])
+                      WITH ORDINALITY AS r(id, token, result, ord)
+    ),
+    fence AS (
+        SELECT j.job_id AS id, req.token, req.result,{_FENCE_COLUMNS}
+        FROM job_leases j
+        JOIN req ON req.id = j.job_id
+        ORDER BY j.job_id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT DISTINCT ON (id) id, token, result FROM fence WHERE {_ALLOWED}
+    ),
+    ledger AS (
+        INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
+        SELECT id, token, 'default', 1 FROM allowed
+        ON CONFLICT (job_id, fencing_token) DO NOTHING
+        RETURNING job_id
+    ),
+    results AS (
+        INSERT INTO job_results (job_id, fencing_token, result)
+        SELECT id, token, result FROM allowed WHERE result IS NOT NULL
+        ON CONFLICT (job_id) DO NOTHING
+        RETURNING job_id
+    ),
+    done AS (
+        UPDATE job_leases j
+        SET state='succeeded',
+            lease_owner=NULL,
+            lease_expires_at=NULL,
+            next_run_at=NULL,
+            updated_at=NOW()
+        FROM allowed
+        WHERE j.job_id = allowed.id
+        RETURNING j.job_id AS id, j.state, allowed.token
+    )
+    {_VERDICT.format(duplicate=_COMPLETE_DUPLICATE)}
+    """,
+)
+
+FAIL_JOBS = statements.register(
+    "faultline_fail_jobs",
+    f"""
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[], %(errors)s::text[])
+                      WITH ORDINALITY AS r(id, token, error, ord)
+    ),
+    fence AS (
+        SELECT j.id, req.token, req.error, j.attempts, j.max_attempts,{_FENCE_COLUMNS}
+        FROM jobs j
+        JOIN req ON req.id = j.id
+        ORDER BY j.id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT DISTINCT ON (id) id, token, error,
+               attempts + 1 AS attempts, attempts + 1 >= max_attempts AS exhausted
+        FROM fence WHERE {_ALLOWED}
+    ),
+    done AS (
+        UPDATE jobs j
+        SET state = CASE WHEN a.exhausted THEN 'failed' ELSE 'queued' END,
+            attempts = a.attempts,
+            last_error = left(a.error, 500),
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            next_run_at = CASE
+                WHEN a.exhausted THEN j.next_run_at
+                ELSE NOW() + make_interval(secs => LEAST(2 * power(2, a.attempts - 1), 300))
+            END,
+            updated_at = NOW()
+        FROM allowed a
+        WHERE j.id = a.id
+        RETURNING j.id, j.state, a.token
+    )
+    {_VERDICT.format(duplicate="")}
+    """,
+    [("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("errors", "text[]"), ("owner", "text")],
+    "commit",
+    lease_table_sql=f"""
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[], %(errors)s::text[])
+                      WITH ORDINALITY AS r(id, token, error, ord)
+    ),
+    fence AS (
+        SELECT j.job_id AS id, req.token, req.error, j.attempts, b.max_attempts,{_FENCE_COLUMNS}
+        FROM job_leases j
+        JOIN req ON req.id = j.job_id
+        JOIN job_bodies b ON b.id = j.job_id
+        ORDER BY j.job_id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT DISTINCT ON (id) id, token, error,
+               attempts + 1 AS attempts, attempts + 1 >= max_attempts AS exhausted
+        FROM fence WHERE {_ALLOWED}
+    ),
+    done AS (
+        UPDATE job_leases j
+        SET state = CASE WHEN a.exhausted THEN 'failed' ELSE 'queued' END,
+            attempts = a.attempts,
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            next_run_at = CASE
+                WHEN a.exhausted THEN j.next_run_at
+                ELSE NOW() + make_interval(secs => LEAST(2 * power(2, a.attempts - 1), 300))
+            END,
+            updated_at = NOW()
+        FROM allowed a
+        WHERE j.job_id = a.id
+        RETURNING j.job_id AS id, j.state, a.token
+    ),
+    errors AS (
+        UPDATE job_bodies b
+        SET last_error = left(a.error, 500)
+        FROM allowed a
+        WHERE b.id = a.id
+        RETURNING b.id
+    )
+    {_VERDICT.format(duplicate="")}
+    """,
+)
+
+
+@dataclass(frozen=True)
+class CompletionResult:
+    job_id: str
+    committed: bool
+    stale_write_rejected: bool
+    state: str | None
+    reason: str  # committed | duplicate | stale_token | not_running | not_owner | lease_expired | not_found
+
+
+class InvalidJobId(ValueError):
+    """An item names something that is not a job uuid; the batch is rejected as a whole."""
+
+
+def _job_ids(items) -> list[str]:
+    try:
+        return [str(uuid.UUID(str(item[0]))) for item in items]
+    except ValueError as exc:
+        raise InvalidJobId(str(exc)) from None
+
+
+def _json(result):
+    if result is None or isinstance(result, str):
+        return result
+    return json.dumps(result)
+
+
+def _complete_params(items, owner) -> dict:
+    return {
+        "job_ids": _job_ids(items),
+        "tokens": [int(item[1]) for item in items],
+        "results": [_json(item[2]) for item in items],
+        "owner": owner,
+    }
+
+
+def _fail_params(items, owner) -> dict:
+    return {
+        "job_ids": _job_ids(items),
+        "tokens": [int(item[1]) for item in items],
+        "errors": [str(item[2] or "") for item in items],
+        "owner": owner,
+    }
+
+
+def _results(rows) -> list[CompletionResult]:
+    return [
+        CompletionResult(
+            job_id=job_id,
+            committed=reason in COMMITTED,
+            stale_write_rejected=reason in STALE,
+            state=state,
+            reason=reason,
+        )
+        for job_id, reason, state in rows
+    ]
+
+
+def _requeued(results) -> bool:
+    return any(r.reason == "committed" and r.state == "queued" for r in results)
+
+
+def complete_jobs(cur, items, owner: str | None = None) -> list[CompletionResult]:
+    """Complete (job_id, fencing_token, result) items on a psycopg2 cursor; the caller commits."""
+    items = list(items)
+    if not items:
+        return []
+    statements.execute(cur, COMPLETE_JOBS, _complete_params(items, owner))
+    return _results(cur.fetchall())
+
+
+def fail_jobs(cur, items, owner: str | None = None) -> list[CompletionResult]:
+    """Fail (job_id, fencing_token, error) items on a psycopg2 cursor; the caller commits."""
+    items = list(items)
+    if not items:
+        return []
+    statements.execute(cur, FAIL_JOBS, _fail_params(items, owner))
+    results = _results(cur.fetchall())
+    if _requeued(results):
+        notify_queue(cur)
+    return results
+
+
+async def complete_jobs_async(conn, items, owner: str | None = None) -> list[CompletionResult]:
+    """complete_jobs() for an asyncpg connection."""
+    items = list(items)
+    if not items:
+        return []
+    rows = await conn.fetch(COMPLETE_JOBS.numbered_sql, *COMPLETE_JOBS.args(_complete_params(items, owner)))
+    return _results(rows)
+
+
+async def fail_jobs_async(conn, items, owner: str | None = None) -> list[CompletionResult]:
+    """fail_jobs() for an asyncpg connection; the wakeup is sent in the same transaction."""
+    items = list(items)
+    if not items:
+        return []
+    async with conn.transaction():
+        rows = await conn.fetch(FAIL_JOBS.numbered_sql, *FAIL_JOBS.args(_fail_params(items, owner)))
+        results = _results(rows)
+        if _requeued(results):
+            await conn.execute("SELECT pg_notify($1, '')", QUEUE_CHANNEL)
+    return results
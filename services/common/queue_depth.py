@@ -0,0 +1,67 @@
+"""
+services/common/queue_depth.py
+───────────────────────────────
+Job counts per state, read from job_state_counts (migration 024).
+
+Triggers on jobs keep one counter row per (state, shard) up to date in
+every writer's transaction, so depth is SUM(n) over a few dozen rows.
+It stays exact however much job history accumulates, and no GROUP BY over
+jobs is needed.
+
+GET /queue/depth is polled every few seconds by autoscalers and
+dashboards, so the API also keeps the last answer for
+FAULTLINE_QUEUE_DEPTH_CACHE_SECONDS (default 1; 0 disables). Concurrent
+requests during a refresh share a single read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+QUEUE_DEPTH_CACHE_SECONDS = float(os.getenv("FAULTLINE_QUEUE_DEPTH_CACHE_SECONDS", "1"))
+
+QUEUE_DEPTH_SQL = """
+SELECT state, SUM(n)::bigint
+FROM job_state_counts
+GROUP BY state
+HAVING SUM(n) <> 0
+ORDER BY state
+"""
+
+
+def fetch_depth(cur) -> dict[str, int]:
+    """{state: job count} on a psycopg2 cursor; states with no jobs are omitted."""
+    cur.execute(QUEUE_DEPTH_SQL)
+    return {state: int(n) for state, n in cur.fetchall()}
+
+
+async def fetch_depth_async(conn) -> dict[str, int]:
+    """fetch_depth() for an asyncpg connection."""
+    rows = await conn.fetch(QUEUE_DEPTH_SQL)
+    return {row[0]: int(row[1]) for row in rows}
+
+
+class DepthCache:
+    """Last depth reading, reused for ttl_seconds."""
+
+    def __init__(self, ttl_seconds: float = QUEUE_DEPTH_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._value: dict[str, int] | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._value is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    async def get(self, load) -> dict[str, int]:
+        """Return the cached depth, or await load() when it is older than the TTL."""
+        if self._fresh():
+            return self._value
+        async with self._lock:
+            if self._fresh():
+                return self._value
+            value = await load()
+            self._value, self._loaded_at = value, time.monotonic()
+            return value
@@ -0,0 +1,107 @@
+"""
+services/common/queue_notify.py
+────────────────────────────────
+LISTEN/NOTIFY wakeups for the job queue.
+
+Every path that makes a job claimable (submit, retry reschedule, lease
+release/reap) calls notify_queue() inside its transaction. PostgreSQL only
+delivers the notification on COMMIT, so a worker never wakes for a row it
+cannot see yet, and identical notifications in one transaction collapse
+into one.
+
+Idle workers block in QueueListener.wait() on a dedicated autocommit
+connection instead of polling the jobs table. The LISTEN is registered
+before the worker's first claim, so a NOTIFY that lands between an empty
+claim and the next wait() is queued on the socket rather than lost.
+AsyncQueueListener is the asyncio counterpart (asyncio worker, grpc.aio
+server).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import select
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+QUEUE_CHANNEL = os.getenv("FAULTLINE_QUEUE_CHANNEL", "faultline_jobs")
+
+
+def notify_queue(cur, payload: str = "") -> None:
+    """Queue a wakeup for listening workers; delivered when cur's transaction commits."""
+    cur.execute("SELECT pg_notify(%s, %s)", (QUEUE_CHANNEL, payload))
+
+
+class QueueListener:
+    def __init__(self, dsn: str, channel: str = QUEUE_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+
+    def listen(self):
+        """Open the LISTEN connection if it is not already open."""
+        if self._conn is None or self._conn.closed:
+            conn = psycopg2.connect(self.dsn)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            self._conn = conn
+        return self._conn
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until a notification arrives or timeout seconds pass.
+
+        Returns True when woken by a notification. On connection errors it
+        sleeps out (at most 1s of) the timeout like a plain poll and
+        re-establishes the LISTEN connection on the next call.
+        """
+        try:
+            conn = self.listen()
+            conn.poll()
+            if not conn.notifies and timeout > 0:
+                if select.select([conn], [], [], timeout)[0]:
+                    conn.poll()
+            notified = bool(conn.notifies)
+            conn.notifies.clear()
+            return notified
+        except (psycopg2.Error, OSError):
+            self.close()
+            time.sleep(max(0.0, min(timeout, 1.0)))
+            return False
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class AsyncQueueListener:
+    """QueueListener for asyncio: LISTEN on a dedicated asyncpg connection and set notified."""
+
+    def __init__(self, dsn: str, channel: str = QUEUE_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self.notified = asyncio.Event()
+        self._conn = None
+
+    async def listen(self) -> None:
+        if self._conn is None or self._conn.is_closed():
+            import asyncpg
+
+            self._conn = await asyncpg.connect(self.dsn)
+            await self._conn.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, *_args) -> None:
+        self.notified.set()
+
+    async def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
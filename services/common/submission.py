@@ -0,0 +1,290 @@
+"""
+services/common/submission.py
+──────────────────────────────
+Idempotent job submission, shared by the HTTP API (services/api/app.py),
+the SQLAlchemy routes (api/routes/jobs.py) and gRPC SubmitJob.
+
+A submission is one statement:
+
+    INSERT ... ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
+    DO NOTHING RETURNING ...
+
+backed by the partial unique index uq_jobs_idempotency_key. The queue
+wakeup (pg_notify) rides in the same statement and fires only when a row
+was inserted. Only when the insert hit an existing key does a second read
+fetch that row to compare payload hashes. Concurrent retries with the same
+key cannot both insert: the loser waits on the winner's index entry and
+then takes the conflict path.
+
+Same key, same payload hash  → Submission(created=False) for the existing job
+Same key, different hash     → IdempotencyConflict (HTTP 409)
+
+Bulk submission (submit_jobs_async, POST /jobs:batch) applies the same rules
+set-wise in one transaction. Rows are COPYed into a temp table, and one
+INSERT ... SELECT ... ON CONFLICT DO NOTHING inserts them in item order, so
+the first occurrence of a key within a batch wins. One join against jobs
+then resolves every item to its job id and status: queued, existing or
+conflict. Workers get a single NOTIFY per batch.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass
+
+from services.common.queue_notify import QUEUE_CHANNEL
+from services.worker import statements
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+INSERT_JOB = statements.register(
+    "faultline_submit_job",
+    """
+    WITH ins AS (
+        INSERT INTO jobs (
+            id, type, payload, payload_hash, idempotency_key,
+            state, attempts, max_attempts, fencing_token, next_run_at
+        )
+        VALUES (
+            %(job_id)s, %(job_type)s, %(payload)s, %(payload_hash)s, %(idempotency_key)s,
+            'queued', 0, %(max_attempts)s, 0, NOW()
+        )
+        ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+        RETURNING id::text, state
+    )
+    SELECT ins.id, ins.state, pg_notify(%(channel)s, '')::text
+    FROM ins
+    """,
+    [
+        ("job_id", "uuid"),
+        ("job_type", "text"),
+        ("payload", "jsonb"),
+        ("payload_hash", "text"),
+        ("idempotency_key", "text"),
+        ("max_attempts", "int"),
+        ("channel", "text"),
+    ],
+    "commit",
+    lease_table_sql="""
+    WITH body AS (
+        INSERT INTO job_bodies (id, type, payload, payload_hash, idempotency_key, max_attempts)
+        VALUES (
+            %(job_id)s, %(job_type)s, %(payload)s, %(payload_hash)s, %(idempotency_key)s,
+            %(max_attempts)s
+        )
+        ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+        RETURNING id
+    ),
+    ins AS (
+        INSERT INTO job_leases (job_id, state, attempts, fencing_token, next_run_at)
+        SELECT id, 'queued', 0, 0, NOW() FROM body
+        RETURNING job_id::text AS id, state
+    )
+    SELECT ins.id, ins.state, pg_notify(%(channel)s, '')::text
+    FROM ins
+    """,
+)
+
+EXISTING_JOB = statements.register(
+    "faultline_submit_existing",
+    "SELECT id::text, state, payload_hash FROM jobs WHERE idempotency_key = %(idempotency_key)s",
+    [("idempotency_key", "text")],
+    "query",
+)
+
+
+_CREATE_BATCH_TABLE = """
+CREATE TEMP TABLE job_batch (
+    ord int NOT NULL,
+    id uuid NOT NULL,
+    payload jsonb NOT NULL,
+    payload_hash text NOT NULL,
+    idempotency_key text
+) ON COMMIT DROP
+"""
+
+_INSERT_BATCH = statements.layout_sql(
+    """
+    WITH ins AS (
+        INSERT INTO jobs (
+            id, type, payload, payload_hash, idempotency_key,
+            state, attempts, max_attempts, fencing_token, next_run_at
+        )
+        SELECT id, $1, payload, payload_hash, idempotency_key, 'queued', 0, $2, 0, NOW()
+        FROM job_batch
+        ORDER BY ord
+        ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+        RETURNING 1
+    )
+    SELECT inserted, pg_notify($3, '')::text
+    FROM (SELECT COUNT(*) AS inserted FROM ins) c
+    WHERE inserted > 0
+    """,
+    """
+    WITH body AS (
+        INSERT INTO job_bodies (id, type, payload, payload_hash, idempotency_key, max_attempts)
+        SELECT id, $1, payload, payload_hash, idempotency_key, $2
+        FROM job_batch
+        ORDER BY ord
+        ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+        RETURNING id
+    ),
+    ins AS (
+        INSERT INTO job_leases (job_id, state, attempts, fencing_token, next_run_at)
+        SELECT id, 'queued', 0, 0, NOW() FROM body
+        RETURNING 1
+    )
+    SELECT inserted, pg_notify($3, '')::text
+    FROM (SELECT COUNT(*) AS inserted FROM ins) c
+    WHERE inserted > 0
+    """,
+)
+
+_RESOLVE_BATCH = """
+SELECT b.ord, j.id::text, j.state, j.payload_hash = b.payload_hash, j.id = b.id
+FROM job_batch b
+JOIN jobs j ON j.idempotency_key = b.idempotency_key
+UNION ALL
+SELECT b.ord, b.id::text, 'queued', true, true
+FROM job_batch b
+WHERE b.idempotency_key IS NULL
+"""
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key already belongs to a job with a different payload."""
+
+    def __init__(self, job_id: str):
+        super().__init__("Idempotency key reused with different payload")
+        self.job_id = job_id
+
+
+@dataclass(frozen=True)
+class Submission:
+    job_id: str
+    state: str
+    created: bool
+
+
+@dataclass(frozen=True)
+class BatchSubmission:
+    job_id: str
+    state: str
+    status: str  # queued | existing | conflict
+
+
+def _json(payload) -> str:
+    return payload if isinstance(payload, str) else json.dumps(payload)
+
+
+def _insert_params(payload, payload_hash, idempotency_key, job_type, max_attempts) -> dict:
+    return {
+        "job_id": str(uuid.uuid4()),
+        "job_type": job_type,
+        "payload": _json(payload),
+        "payload_hash": payload_hash,
+        "idempotency_key": idempotency_key,
+        "max_attempts": max_attempts,
+        "channel": QUEUE_CHANNEL,
+    }
+
+
+def _existing(row) -> Submission | None:
+    if row is None:
+        return None
+    return Submission(job_id=row[0], state=row[1], created=False)
+
+
+def _check_hash(row, payload_hash: str) -> None:
+    if row is not None and row[2] != payload_hash:
+        raise IdempotencyConflict(row[0])
+
+
+def submit_job(
+    cur,
+    payload,
+    payload_hash: str,
+    idempotency_key: str | None = None,
+    job_type: str = "default",
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Submission:
+    """Insert a job (or find its idempotent twin) on a psycopg2 cursor; the caller commits."""
+    params = _insert_params(payload, payload_hash, idempotency_key, job_type, max_attempts)
+    # A conflicting row can vanish (archived/deleted) between the insert and
+    # the read; one more insert attempt settles it.
+    for _ in range(2):
+        statements.execute(cur, INSERT_JOB, params)
+        row = cur.fetchone()
+        if row is not None:
+            return Submission(job_id=row[0], state=row[1], created=True)
+        statements.execute(cur, EXISTING_JOB, {"idempotency_key": idempotency_key})
+        row = cur.fetchone()
+        _check_hash(row, payload_hash)
+        if row is not None:
+            return _existing(row)
+    raise RuntimeError(f"submission for idempotency key {idempotency_key!r} did not settle")
+
+
+async def submit_job_async(
+    conn,
+    payload,
+    payload_hash: str,
+    idempotency_key: str | None = None,
+    job_type: str = "default",
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Submission:
+    """submit_job() for an asyncpg connection, in autocommit or the caller's transaction."""
+    params = _insert_params(payload, payload_hash, idempotency_key, job_type, max_attempts)
+    for _ in range(2):
+        row = await conn.fetchrow(INSERT_JOB.numbered_sql, *INSERT_JOB.args(params))
+        if row is not None:
+            return Submission(job_id=row[0], state=row[1], created=True)
+        row = await conn.fetchrow(EXISTING_JOB.numbered_sql, idempotency_key)
+        _check_hash(row, payload_hash)
+        if row is not None:
+            return _existing(row)
+    raise RuntimeError(f"submission for idempotency key {idempotency_key!r} did not settle")
+
+
+async def submit_jobs_async(
+    conn,
+    items,
+    job_type: str = "default",
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> list[BatchSubmission]:
+    """
+    Submit (payload, payload_hash, idempotency_key) items in one transaction.
+
+    Returns one BatchSubmission per item, in item order.
+    """
+    records = [
+        (ord_, uuid.uuid4(), _json(payload), payload_hash, idempotency_key)
+        for ord_, (payload, payload_hash, idempotency_key) in enumerate(items)
+    ]
+    if not records:
+        return []
+
+    async with conn.transaction():
+        await conn.execute(_CREATE_BATCH_TABLE)
+        await conn.copy_records_to_table(
+            "job_batch",
+            records=records,
+            columns=["ord", "id", "payload", "payload_hash", "idempotency_key"],
+        )
+        await conn.execute("ANALYZE job_batch")
+        await conn.fetchrow(_INSERT_BATCH, job_type, max_attempts, QUEUE_CHANNEL)
+        rows = await conn.fetch(_RESOLVE_BATCH)
+
+    results: list[BatchSubmission | None] = [None] * len(records)
+    for ord_, job_id, state, same_hash, created in rows:
+        if created:
+            status = "queued"
+        elif same_hash:
+            status = "existing"
+        else:
+            status = "conflict"
+        results[ord_] = BatchSubmission(job_id=job_id, state=state, status=status)
+    if any(r is None for r in results):
+        raise RuntimeError("batch submission did not resolve every item")
+    return results
@@ -0,0 +1,226 @@
+"""
+services/worker/archiver.py
+────────────────────────────
+Moves terminal jobs out of the claim path, and drops expired history.
+
+succeeded / failed rows never change again, yet they stay in the jobs heap
+and in the indexes every claim scans, so claim latency degrades as they pile
+up. Each pass:
+
+    1. PARTITIONS  makes sure today's and tomorrow's (UTC) partitions of
+                   jobs_history / ledger_entries_history exist
+                   (migration 026).
+    2. ARCHIVE     moves jobs that have been terminal for ARCHIVE_AFTER_SECONDS,
+                   together with their ledger entries, into the history tables.
+                   Each batch is one SKIP LOCKED statement in its own short
+                   transaction, repeated until a batch comes back short, as in
+                   services/worker/reconciler.py.
+    3. RETENTION   drops history partitions older than ARCHIVE_RETENTION_DAYS,
+                   a catalog operation rather than a DELETE (0 keeps history
+                   forever).
+
+A job, its ledger entries and its completion result (job_results, migration
+027; kept in jobs_history.result) move in the same statement, so the reconciler
+never sees a ledger entry without its job. A stale worker cannot commit to an
+archived job either, since the fenced commit needs the job row. The
+idempotency key is released with the row: submissions dedupe only against
+jobs that have not been archived yet. GET /jobs/{job_id} still finds
+archived jobs.
+
+    ARCHIVE_AFTER_SECONDS      terminal age before archival (default 604800, 7 days)
+    ARCHIVE_BATCH_SIZE         jobs per batch (default 1000)
+    ARCHIVE_RETENTION_DAYS     days of history partitions kept (default 90)
+    ARCHIVE_INTERVAL_SECONDS   pause between passes when run standalone (default 300)
+
+Run standalone with python -m services.worker.archiver (ARCHIVE_ONCE=1 for a
+single pass, e.g. from cron).
+"""
+
+import json
+import os
+import time
+
+from psycopg2 import OperationalError
+
+from services.common.tracing import init_tracing, get_tracer, start_span
+from services.worker import metrics, statements
+from services.worker.transport_db import get_conn
+
+ARCHIVE_AFTER_SECONDS = float(os.environ.get("ARCHIVE_AFTER_SECONDS", str(7 * 24 * 3600)))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_RETENTION_DAYS = int(os.environ.get("ARCHIVE_RETENTION_DAYS", "90"))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "300"))
+
+init_tracing("faultline-archiver")
+tracer = get_tracer("faultline.archiver")
+
+_JOB_COLUMNS = """
+    id, type, payload, payload_hash, state, attempts, max_attempts, lease_owner,
+    lease_expires_at, fencing_token, next_run_at, idempotency_key, last_error,
+    created_at, updated_at
+"""
+_LEDGER_COLUMNS = "entry_id, job_id, fencing_token, account_id, delta, created_at"
+
+ARCHIVE_TERMINAL = statements.register(
+    "faultline_archive_terminal",
+    f"""
+    WITH doomed AS (
+        SELECT id
+        FROM jobs
+        WHERE state IN ('succeeded', 'failed')
+          AND updated_at < NOW() - make_interval(secs => %(after_seconds)s)
+        ORDER BY updated_at
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM jobs j USING doomed d
+        WHERE j.id = d.id
+        RETURNING j.*
+    ),
+    ledger AS (
+        DELETE FROM ledger_entries l USING doomed d
+        WHERE l.job_id = d.id
+        RETURNING {_LEDGER_COLUMNS}
+    ),
+    results AS (
+        DELETE FROM job_results r USING doomed d
+        WHERE r.job_id = d.id
+        RETURNING r.job_id, r.result
+    ),
+    jobs_copied AS (
+        INSERT INTO jobs_history ({_JOB_COLUMNS}, result)
+        SELECT {_JOB_COLUMNS}, results.result
+        FROM moved LEFT JOIN results ON results.job_id = moved.id
+        RETURNING 1
+    ),
+    ledger_copied AS (
+        INSERT INTO ledger_entries_history ({_LEDGER_COLUMNS})
+        SELECT {_LEDGER_COLUMNS} FROM ledger
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM jobs_copied), (SELECT COUNT(*) FROM ledger_copied)
+    """,
+    [("after_seconds", "float8"), ("batch_size", "int")],
+    "commit",
+    # jobs is a view here: copy from it (same snapshot), delete the body and
+    # let the cascade remove the lease row.
+    lease_table_sql=f"""
+    WITH doomed AS (
+        SELECT job_id AS id
+        FROM job_leases
+        WHERE state IN ('succeeded', 'failed')
+          AND updated_at < NOW() - make_interval(secs => %(after_seconds)s)
+        ORDER BY updated_at
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ),
+    gone AS (
+        DELETE FROM job_bodies b USING doomed d
+        WHERE b.id = d.id
+        RETURNING b.id
+    ),
+    ledger AS (
+        DELETE FROM ledger_entries l USING doomed d
+        WHERE l.job_id = d.id
+        RETURNING {_LEDGER_COLUMNS}
+    ),
+    results AS (
+        DELETE FROM job_results r USING doomed d
+        WHERE r.job_id = d.id
+        RETURNING r.job_id, r.result
+    ),
+    jobs_copied AS (
+        INSERT INTO jobs_history ({_JOB_COLUMNS}, result)
+        SELECT {_JOB_COLUMNS}, results.result
+        FROM jobs LEFT JOIN results ON results.job_id = jobs.id
+        WHERE id IN (SELECT id FROM gone)
+        RETURNING 1
+    ),
+    ledger_copied AS (
+        INSERT INTO ledger_entries_history ({_LEDGER_COLUMNS})
+        SELECT {_LEDGER_COLUMNS} FROM ledger
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM jobs_copied), (SELECT COUNT(*) FROM ledger_copied)
+    """,
+)
+
+
+def ensure_partitions(cur, days_ahead: int = 1) -> None:
+    """Create today's partitions (UTC) and the next days_ahead days'."""
+    cur.execute(
+        """
+        SELECT job_history_create_partitions(((NOW() AT TIME ZONE 'UTC')::date + d)::date)
+        FROM generate_series(0, %s) AS d
+        """,
+        (days_ahead,),
+    )
+
+
+def archive_batch(cur, batch_size: int = ARCHIVE_BATCH_SIZE,
+                  after_seconds: float = ARCHIVE_AFTER_SECONDS) -> tuple[int, int]:
+    """Move one batch of terminal jobs and their ledger entries; returns (jobs, ledger_entries)."""
+    statements.execute(cur, ARCHIVE_TERMINAL, {"after_seconds": after_seconds, "batch_size": batch_size})
+    jobs, entries = cur.fetchone()
+    return jobs, entries
+
+
+def drop_expired_partitions(cur, retention_days: int = ARCHIVE_RETENTION_DAYS) -> list:
+    """Drop history partitions for UTC days more than retention_days ago; returns their names."""
+    if retention_days <= 0:
+        return []
+    cur.execute(
+        "SELECT job_history_drop_partitions(((NOW() AT TIME ZONE 'UTC')::date - %s)::date)",
+        (retention_days,),
+    )
+    dropped = [row[0] for row in cur.fetchall()]
+    metrics.archive_partitions_dropped_total.inc(len(dropped))
+    return dropped
+
+
+def archive_terminal_jobs(batch_size: int = ARCHIVE_BATCH_SIZE,
+                          after_seconds: float = ARCHIVE_AFTER_SECONDS,
+                          retention_days: int = ARCHIVE_RETENTION_DAYS) -> dict:
+    """One pass: partitions, archive in batches until drained, then retention."""
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            ensure_partitions(cur)
+        conn.commit()
+
+    archived = ledger_entries = 0
+    while True:
+        started = time.monotonic()
+        with start_span(tracer, "archiver.batch", batch_size=batch_size) as span:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    jobs, entries = archive_batch(cur, batch_size, after_seconds)
+                conn.commit()
+            span.set_attribute("jobs", jobs)
+            span.set_attribute("ledger_entries", entries)
+
+        metrics.archive_batch_seconds.observe(time.monotonic() - started)
+        metrics.archived_rows_total.labels(table="jobs").inc(jobs)
+        metrics.archived_rows_total.labels(table="ledger_entries").inc(entries)
+        archived += jobs
+        ledger_entries += entries
+        if jobs < batch_size:
+            break
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            dropped = drop_expired_partitions(cur, retention_days)
+        conn.commit()
+
+    return {"archived": archived, "ledger_entries": ledger_entries, "dropped_partitions": dropped}
+
+
+if __name__ == "__main__":
+    while True:
+        try:
+            print(json.dumps({"event": "archive_pass_complete", **archive_terminal_jobs()}), flush=True)
+        except OperationalError as e:
+            print(json.dumps({"event": "archiver_db_error", "error": str(e)}), flush=True)
+        if os.environ.get("ARCHIVE_ONCE") == "1":
+            break
+        time.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,410 @@
+"""
+services/worker/async_worker.py
+────────────────────────────────
+asyncio worker runtime on asyncpg.
+
+Same claim / fence / commit / retry semantics as services/worker/worker.py —
+it runs the same registered statements (services/worker/statements.py),
+which asyncpg prepares and caches per connection on its own —
+but keeps WORKER_CONCURRENCY (default 100) I/O-bound jobs in flight on one
+event loop, together with their lease heartbeats, the LISTEN wakeup
+connection and the Prometheus endpoint.
+
+Differences from the threaded worker:
+  - A job does not hold a connection while it executes. The pre-execution
+    fence, the fenced commit and the retry update each borrow a pooled
+    connection, so hundreds of in-flight jobs share FAULTLINE_ASYNC_POOL_MAX_SIZE
+    connections. The commit checks the lease against the commit time rather
+    than the start of the job's transaction; pair long jobs with
+    FAULTLINE_LEASE_HEARTBEAT=1.
+  - Drill hooks that need a synchronous cursor (BARRIER_*, CLAIM_JOB_ID)
+    are not supported; run the lease-race drills against worker.py.
+
+Run with:  python -m services.worker.async_worker
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+
+import asyncpg
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from services.common.queue_notify import QUEUE_CHANNEL, AsyncQueueListener
+from services.worker import statements
+from services.worker.autopsy import log_event
+from services.worker.heartbeat import RENEW_LEASES, LeaseHeartbeat
+from services.worker.spans import start_job_span_from_payload
+from services.worker.worker import (
+    CLAIM_BATCH,
+    FENCED_COMMIT,
+    MARK_FAILED,
+    MARK_RETRY,
+    NEXT_DUE,
+    DATABASE_URL,
+    LEASE_HEARTBEAT,
+    LEASE_RENEW_FRACTION,
+    LEASE_SECONDS,
+    LISTEN_ENABLED,
+    MAX_LOOPS,
+    METRICS_ENABLED,
+    METRICS_PORT,
+    SIMULATE_FAILURE,
+    STALE_ERRORS,
+    WAKEUP_POLL_SECONDS,
+    WORK_SLEEP_SECONDS,
+    WORKER_ID,
+    _append_trace_event,
+    _exit_reason,
+    _on_lease_acquired,
+    backoff_seconds,
+    heartbeat,
+    job_duration,
+    jobs_claimed,
+    jobs_failed_perm,
+    jobs_in_flight,
+    jobs_retried,
+    jobs_succeeded,
+    maybe_crash,
+    notify_wakeups,
+    raise_for_commit_status,
+    stale_commits,
+    tracer,
+)
+
+CONCURRENCY = max(1, int(os.getenv("WORKER_CONCURRENCY", "100")))
+ASYNC_POOL_MAX_SIZE = int(os.getenv("FAULTLINE_ASYNC_POOL_MAX_SIZE", "10"))
+IDLE_POLL_SECONDS = 0.25
+
+
+_FENCE_SQL = statements.layout_sql(
+    """
+    SELECT fencing_token,
+           CASE
+               WHEN fencing_token <> $2 THEN 'stale_token'
+               WHEN lease_expires_at IS NOT NULL AND lease_expires_at < NOW() THEN 'lease_expired'
+               ELSE 'ok'
+           END
+    FROM jobs
+    WHERE id = $1
+    """,
+    """
+    SELECT fencing_token,
+           CASE
+               WHEN fencing_token <> $2 THEN 'stale_token'
+               WHEN lease_expires_at IS NOT NULL AND lease_expires_at < NOW() THEN 'lease_expired'
+               ELSE 'ok'
+           END
+    FROM job_leases
+    WHERE job_id = $1
+    """,
+)
+
+class LeaseLost(Exception):
+    pass
+
+
+class AsyncLeaseHeartbeat(LeaseHeartbeat):
+    """LeaseHeartbeat bookkeeping driven by an event-loop task instead of a thread."""
+
+    def __init__(self, pool, worker_id: str, lease_seconds: float, interval_seconds: float):
+        super().__init__(worker_id, lease_seconds, interval_seconds)
+        self.pool = pool
+
+    def _new_cancel_event(self):
+        return asyncio.Event()
+
+    async def renew_async(self) -> int:
+        keys = self._snapshot()
+        if not keys:
+            return 0
+        started = time.monotonic()
+        params = self._params(keys)
+        try:
+            params["lease_seconds"] = float(params["lease_seconds"])
+            rows = await self.pool.fetch(RENEW_LEASES.numbered_sql, *RENEW_LEASES.args(params))
+        except Exception as exc:
+            self._renewal_failed(keys, exc)
+            return 0
+        return self._renewed(keys, {(row[0], int(row[1])) for row in rows}, started)
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.renew_async()
+
+
+async def _init_connection(conn) -> None:
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def claim_batch(pool, n: int):
+    """Lease up to n jobs; returns (jobs, seconds until the next job falls due or None)."""
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            rows = await conn.fetch(
+                CLAIM_BATCH.numbered_sql,
+                *CLAIM_BATCH.args({"limit": n, "owner": WORKER_ID, "lease_seconds": float(LEASE_SECONDS)}),
+            )
+        due = await conn.fetchval(NEXT_DUE.numbered_sql) if len(rows) < n else None
+
+    jobs = [_on_lease_acquired((str(row[0]), *row[1:]), forced=False) for row in rows]
+    if jobs:
+        maybe_crash("after_lease_acquire")
+    return jobs, due
+
+
+async def execute_job(job_id, token, attempts):
+    if SIMULATE_FAILURE and attempts == 0:
+        raise RuntimeError("simulated_execution_failure")
+    _append_trace_event("execute_start", job_id=str(job_id), token=int(token), attempts=int(attempts))
+    await asyncio.sleep(WORK_SLEEP_SECONDS)
+    _append_trace_event("execute_done", job_id=str(job_id), token=int(token), attempts=int(attempts))
+
+
+async def _execute(job_id, token, attempts, cancel):
+    if cancel is None:
+        await execute_job(job_id, token, attempts)
+        return
+    work = asyncio.ensure_future(execute_job(job_id, token, attempts))
+    lost = asyncio.ensure_future(cancel.wait())
+    try:
+        await asyncio.wait({work, lost}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        lost.cancel()
+    if not work.done():
+        work.cancel()
+        raise LeaseLost()
+    work.result()
+
+
+async def mark_for_retry(pool, job_id, token, attempts, max_attempts, error_text):
+    next_attempt = attempts + 1
+    params = {"attempts": next_attempt, "error": error_text[:500], "job_id": job_id, "token": token}
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if next_attempt >= max_attempts:
+                await conn.execute(MARK_FAILED.numbered_sql, *MARK_FAILED.args(params))
+                return "failed"
+            params["delay"] = float(backoff_seconds(next_attempt))
+            await conn.execute(MARK_RETRY.numbered_sql, *MARK_RETRY.args(params))
+            await conn.execute("SELECT pg_notify($1, '')", QUEUE_CHANNEL)
+    return "retry"
+
+
+async def mark_succeeded(pool, job_id, token):
+    maybe_crash("before_commit")
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            rows = await conn.fetch(
+                FENCED_COMMIT.numbered_sql,
+                *FENCED_COMMIT.args({"job_ids": [job_id], "tokens": [token], "owner": WORKER_ID}),
+            )
+    # Only 'ok' rows were written, so committing before checking is safe.
+    results = {str(r[0]): (int(r[1]), r[2]) for r in rows}
+    raise_for_commit_status(job_id, token, results.get(job_id))
+
+
+async def run_claimed_job(pool, job, lease_heartbeat=None) -> str:
+    """
+    Fence, execute and commit one claimed job.
+
+    Returns "succeeded", "retry" or "failed". Stale ownership is raised as
+    RuntimeError(<stale code>).
+    """
+    job_id, payload, token, attempts, max_attempts = job
+    log_event(
+        "execution_started",
+        job_id=job_id,
+        token=token,
+        attempts=attempts,
+        max_attempts=max_attempts,
+    )
+    jobs_in_flight.inc()
+    cancel = lease_heartbeat.track(job_id, token) if lease_heartbeat is not None else None
+    start = time.monotonic()
+    try:
+        row = await pool.fetchrow(_FENCE_SQL, job_id, token)
+        raise_for_commit_status(job_id, token, (int(row[0]), row[1]) if row else None)
+
+        try:
+            with start_job_span_from_payload(tracer, "job.execute", payload, job_id=str(job_id)):
+                await _execute(job_id, token, attempts, cancel)
+        except LeaseLost:
+            log_event("execution_cancelled", job_id=job_id, token=token, reason="lease_lost")
+            stale_commits.inc()
+            raise RuntimeError("lease_expired")
+        except Exception as exec_err:
+            outcome = await mark_for_retry(pool, job_id, token, attempts, max_attempts, str(exec_err))
+            job_duration.observe(time.monotonic() - start)
+            if outcome == "failed":
+                jobs_failed_perm.inc()
+                log_event("job_failed_permanently", job_id=job_id, attempts=attempts + 1)
+            else:
+                jobs_retried.inc()
+                log_event(
+                    "job_scheduled_retry",
+                    job_id=job_id,
+                    attempt=attempts + 1,
+                    backoff_seconds=backoff_seconds(attempts + 1),
+                )
+            return outcome
+
+        await mark_succeeded(pool, job_id, token)
+        elapsed = time.monotonic() - start
+        job_duration.observe(elapsed)
+        jobs_succeeded.inc()
+        _append_trace_event(
+            "complete",
+            job_id=str(job_id),
+            worker_id=WORKER_ID,
+            token=int(token),
+            duration_s=round(elapsed, 3),
+        )
+        log_event("commit_ok", job_id=job_id, token=token, duration_s=round(elapsed, 3))
+        return "succeeded"
+    finally:
+        if lease_heartbeat is not None:
+            lease_heartbeat.untrack(job_id, token)
+        jobs_in_flight.dec()
+
+
+async def serve_metrics(port: int):
+    """Minimal Prometheus scrape endpoint on the worker's event loop."""
+
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = generate_latest()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE_LATEST}\r\n".encode()
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "0.0.0.0", port)
+
+
+async def _wait_for_work(listener, due, in_flight) -> None:
+    """Idle until a NOTIFY, a job finishing, a retry/lease falling due, or the poll timeout."""
+    if listener is None:
+        timeout = IDLE_POLL_SECONDS
+    else:
+        timeout = WAKEUP_POLL_SECONDS if due is None else min(WAKEUP_POLL_SECONDS, due + 0.01)
+        try:
+            await listener.listen()
+        except (OSError, asyncpg.PostgresError) as e:
+            log_event("db_error", error=str(e)[:200])
+            listener = None
+            timeout = min(timeout, 1.0)
+
+    if listener is None and not in_flight:
+        await asyncio.sleep(timeout)
+        return
+
+    waiters = set(in_flight)
+    notified = None
+    if listener is not None:
+        notified = asyncio.ensure_future(listener.notified.wait())
+        waiters.add(notified)
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if notified is not None:
+            notified.cancel()
+    if listener is not None and listener.notified.is_set():
+        listener.notified.clear()
+        notify_wakeups.inc()
+
+
+async def run(run_once: bool = False):
+    pool = await asyncpg.create_pool(
+        DATABASE_URL, min_size=1, max_size=ASYNC_POOL_MAX_SIZE, init=_init_connection
+    )
+    listener = AsyncQueueListener(DATABASE_URL) if LISTEN_ENABLED else None
+    lease_heartbeat = None
+    heartbeat_task = None
+    if LEASE_HEARTBEAT:
+        lease_heartbeat = AsyncLeaseHeartbeat(
+            pool, WORKER_ID, LEASE_SECONDS, max(0.1, LEASE_SECONDS * LEASE_RENEW_FRACTION)
+        )
+        heartbeat_task = asyncio.ensure_future(lease_heartbeat.run_forever())
+
+    loops = 0
+    exit_reason = None
+    in_flight = set()
+    try:
+        if listener is not None:
+            await listener.listen()
+        while exit_reason is None:
+            if MAX_LOOPS and loops >= MAX_LOOPS:
+                exit_reason = "max_loops"
+                break
+
+            loops += 1
+            heartbeat.inc()
+
+            free = CONCURRENCY - len(in_flight)
+            due = None
+            if free > 0:
+                try:
+                    claimed, due = await claim_batch(pool, free)
+                except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    log_event("db_error", error=str(e)[:200])
+                    await asyncio.sleep(0.5)
+                    continue
+                jobs_claimed.inc(len(claimed))
+                for job in claimed:
+                    in_flight.add(asyncio.ensure_future(run_claimed_job(pool, job, lease_heartbeat)))
+
+            if len(in_flight) >= CONCURRENCY:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                # Queue drained below our free capacity: idle until woken.
+                await _wait_for_work(listener, due, in_flight)
+                done = {t for t in in_flight if t.done()}
+                in_flight -= done
+
+            for task in done:
+                try:
+                    outcome = task.result()
+                except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    log_event("db_error", error=str(e)[:200])
+                    continue
+                except RuntimeError as e:
+                    if str(e) not in STALE_ERRORS:
+                        raise
+                    outcome = "stale"
+                exit_reason = exit_reason or _exit_reason(outcome, run_once)
+    finally:
+        if in_flight:
+            await asyncio.wait(in_flight)
+        if heartbeat_task is not None:
+            heartbeat_task.cancel()
+        if listener is not None:
+            await listener.close()
+        await pool.close()
+    return exit_reason
+
+
+async def main():
+    metrics_server = await serve_metrics(METRICS_PORT) if METRICS_ENABLED else None
+    try:
+        reason = await run(run_once=os.getenv("FAULTLINE_SINGLE_RUN", "0") == "1")
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+    log_event("worker_exit", reason=reason)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,21 +1,250 @@
+"""
+services/worker/autopsy.py
+───────────────────────────
+Structured autopsy events: one JSON object per line on stdout and in
+AUTOPSY_LOG_PATH.
+
+log_event() never touches the disk or stdout itself. It stamps the event and
+appends it to a bounded in-memory buffer; a background writer thread drains
+whatever has accumulated, serializes it once and writes the batch with one
+stdout write and one file append. When the buffer is full the event is
+dropped and counted (faultline_autopsy_events_dropped_total) instead of
+blocking the caller, so logging can never hold up a lease.
+
+Tuning (environment):
+    FAULTLINE_AUTOPSY_BUFFER                  events buffered before dropping (10000)
+    FAULTLINE_AUTOPSY_FSYNC                   none | batch | interval (none)
+    FAULTLINE_AUTOPSY_FSYNC_INTERVAL_SECONDS  max seconds between fsyncs for "interval" (1)
+    FAULTLINE_AUTOPSY_MAX_BYTES               rotate the file past this size; 0 = never (0)
+    FAULTLINE_AUTOPSY_BACKUPS                 rotated files kept as <path>.1 .. <path>.N (3)
+    FAULTLINE_AUTOPSY_ASYNC=0                 write inline on the caller's thread
+
+Buffered events are flushed at interpreter exit and on SIGTERM (docker
+compose stop, the drill targets), which skips atexit: unless the process has
+its own SIGTERM handler, the sinks are closed and the signal is re-raised, so
+the process still dies by it. A process killed with SIGKILL loses at most the
+events still in the buffer.
+"""
+
+from __future__ import annotations
+
+import atexit
 import json
 import os
+import signal
+import sys
+import threading
+import time
+import weakref
+from collections import deque
 from datetime import datetime
 
+from services.worker import metrics
+
 LOG_PATH = os.getenv("AUTOPSY_LOG_PATH", "autopsy.jsonl")
+BUFFER_SIZE = int(os.getenv("FAULTLINE_AUTOPSY_BUFFER", "10000"))
+FSYNC_POLICY = os.getenv("FAULTLINE_AUTOPSY_FSYNC", "none")
+FSYNC_INTERVAL_SECONDS = float(os.getenv("FAULTLINE_AUTOPSY_FSYNC_INTERVAL_SECONDS", "1"))
+MAX_BYTES = int(os.getenv("FAULTLINE_AUTOPSY_MAX_BYTES", "0"))
+BACKUP_COUNT = int(os.getenv("FAULTLINE_AUTOPSY_BACKUPS", "3"))
+ASYNC_ENABLED = os.getenv("FAULTLINE_AUTOPSY_ASYNC", "1") != "0"
+
+_LIVE: weakref.WeakSet = weakref.WeakSet()  # sinks with a background writer
+
+
+class EventSink:
+    """Bounded, batching JSON-lines writer with an optional stdout echo."""
+
+    def __init__(
+        self,
+        path: str | None,
+        echo: bool = False,
+        sort_keys: bool = False,
+        buffer_size: int = BUFFER_SIZE,
+        fsync: str = FSYNC_POLICY,
+        fsync_interval_seconds: float = FSYNC_INTERVAL_SECONDS,
+        max_bytes: int = MAX_BYTES,
+        backup_count: int = BACKUP_COUNT,
+        background: bool = ASYNC_ENABLED,
+    ):
+        self.path = path
+        self.echo = echo
+        self.sort_keys = sort_keys
+        self.buffer_size = max(1, buffer_size)
+        self.fsync = fsync
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.max_bytes = max_bytes
+        self.backup_count = max(0, backup_count)
+        self.background = background
+        self.dropped = 0
+
+        self._cond = threading.Condition()
+        self._buffer: deque = deque()
+        self._enqueued = 0
+        self._written = 0
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_fsync = 0.0
+        self._label = os.path.basename(path) if path else "stdout"
+
+    def emit(self, record: dict) -> bool:
+        """Queue one event; returns False if it was dropped because the buffer is full."""
+        if not self.background:
+            self._write([record])
+            return True
+        self._ensure_writer()
+        with self._cond:
+            if len(self._buffer) >= self.buffer_size:
+                self.dropped += 1
+                metrics.autopsy_events_dropped_total.labels(sink=self._label).inc()
+                return False
+            self._buffer.append(record)
+            self._enqueued += 1
+            self._cond.notify()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is written; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self._enqueued
+            while self._written < target and self._thread is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # After a fork the parent's writer thread does not exist here.
+            self._buffer.clear()
+            self._enqueued = self._written = 0
+            self._closing = False
+            self._file = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="autopsy-writer", daemon=True)
+            self._thread.start()
+            _LIVE.add(self)
+        atexit.register(self.close)
+        _install_sigterm_handler()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closing:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                batch = list(self._buffer)
+                self._buffer.clear()
+            self._write(batch)
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch) -> None:
+        lines = "".join(json.dumps(record, sort_keys=self.sort_keys, default=str) + "\n" for record in batch)
+        with self._write_lock:
+            if self.echo:
+                try:
+                    sys.stdout.write(lines)
+                    sys.stdout.flush()
+                except Exception:
+                    pass
+            if self.path:
+                try:
+                    self._append(lines)
+                except Exception:
+                    pass
+
+    def _append(self, lines: str) -> None:
+        if self._file is None:
+            self._open()
+        if self.max_bytes and self._size and self._size + len(lines) > self.max_bytes:
+            self._rotate()
+            self._open()
+        self._file.write(lines)
+        self._file.flush()
+        self._size += len(lines)
+
+        now = time.monotonic()
+        if self.fsync == "batch" or (
+            self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval_seconds
+        ):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        if self.backup_count == 0:
+            open(self.path, "w").close()
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def _close_on_sigterm(signum, frame) -> None:
+    for sink in list(_LIVE):
+        if sink._pid == os.getpid():
+            sink.close()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def _install_sigterm_handler() -> None:
+    """Close the sinks on SIGTERM, unless the process already handles it (only possible on the main thread)."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _close_on_sigterm)
+
+
+_SINK = EventSink(LOG_PATH, echo=True)
+_install_sigterm_handler()
 
 
 def log_event(event: str, **fields):
-    record = {
-        "event": event,
-        "ts": datetime.utcnow().isoformat(),
-        **fields,
-    }
-
-    print(json.dumps(record), flush=True)
-
-    try:
-        with open(LOG_PATH, "a") as f:
-            f.write(json.dumps(record) + "\n")
-    except Exception:
-        pass
\ No newline at end of file
+    _SINK.emit(
+        {
+            "event": event,
+            "ts": datetime.utcnow().isoformat(),
+            **fields,
+        }
+    )
+
+
+def flush(timeout: float = 5.0) -> bool:
+    return _SINK.flush(timeout)
@@ -0,0 +1,494 @@
+"""asyncio variant of the Faultline gRPC worker service (grpc.aio).
+
+Same RPCs, statements and fencing as services/worker/grpc/server.py, but
+every handler is a coroutine on one event loop over an asyncpg pool. An
+in-flight RPC holds no thread, and holds a connection only while its
+statement runs, so concurrent calls — StreamLeases streams in particular,
+which stay open for the life of a remote worker — are capped by
+FAULTLINE_GRPC_MAX_CONCURRENT_RPCS and memory instead of
+FAULTLINE_GRPC_MAX_WORKERS threads.
+
+StreamLeases is served by an AsyncLeaseDispatcher: one task claiming for all
+open streams in a single statement, as LeaseDispatcher does in the threaded
+server, woken by credit and by the queue LISTEN channel.
+
+Every RPC's latency lands in faultline_grpc_rpc_seconds{method, code},
+exported on FAULTLINE_GRPC_METRICS_PORT. Keepalive and per-connection
+stream limits are the threaded server's SERVER_OPTIONS.
+
+    FAULTLINE_GRPC_AIO_POOL_MAX_SIZE         asyncpg pool size (default 20)
+    FAULTLINE_GRPC_AIO_POOL_ACQUIRE_TIMEOUT  seconds before UNAVAILABLE (default 5)
+    FAULTLINE_GRPC_MAX_CONCURRENT_RPCS       RESOURCE_EXHAUSTED beyond this (default 0, unlimited)
+    FAULTLINE_GRPC_METRICS_PORT              Prometheus endpoint (default 9109, 0 disables)
+
+Run with:  python -m services.worker.grpc.aio_server
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+import grpc
+from prometheus_client import start_http_server
+
+from common.observability.tracing import get_tracer
+from services.common.completion import InvalidJobId, complete_jobs_async, fail_jobs_async
+from services.common.queue_notify import QUEUE_CHANNEL, AsyncQueueListener
+from services.common.submission import IdempotencyConflict, submit_job_async
+from services.worker import metrics
+from services.worker.autopsy import log_event
+from services.worker.grpc.server import (
+    CLAIM_FOR_STREAMS,
+    CLAIM_NEXT,
+    CLAIM_PINNED,
+    PORT,
+    RELEASE,
+    SERVER_OPTIONS,
+    STREAM_POLL_SECONDS,
+    WRITE_BATCH_MAX,
+    _payload_hash,
+    _write_results,
+    take_slots,
+)
+from services.worker.heartbeat import RENEW_LEASES
+from services.worker.spans import start_span
+
+# Generated at build time from worker.proto.
+from services.worker.grpc import worker_pb2, worker_pb2_grpc  # type: ignore
+
+AIO_POOL_MAX_SIZE = int(os.getenv("FAULTLINE_GRPC_AIO_POOL_MAX_SIZE", "20"))
+AIO_POOL_ACQUIRE_TIMEOUT = float(os.getenv("FAULTLINE_GRPC_AIO_POOL_ACQUIRE_TIMEOUT", "5"))
+MAX_CONCURRENT_RPCS = int(os.getenv("FAULTLINE_GRPC_MAX_CONCURRENT_RPCS", "0"))
+METRICS_PORT = int(os.getenv("FAULTLINE_GRPC_METRICS_PORT", "9109"))
+tracer = get_tracer("faultline.grpc")
+
+_DB_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+async def _release(pool, owner: str, leases: dict) -> int:
+    if not leases:
+        return 0
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            status = await conn.execute(
+                RELEASE.numbered_sql,
+                *RELEASE.args({"job_ids": list(leases), "tokens": list(leases.values()), "owner": owner}),
+            )
+            released = int(status.split()[-1])
+            if released:
+                await conn.execute("SELECT pg_notify($1, '')", QUEUE_CHANNEL)
+    return released
+
+
+async def _complete_job(pool, owner: str, job_id: str, token: int, result: str | None = None):
+    """Fenced completion of one job; returns the new state, or None when stale."""
+    async with pool.acquire() as conn:
+        (outcome,) = await complete_jobs_async(conn, [(job_id, token, result)], owner=owner)
+    return outcome.state if outcome.committed else None
+
+
+class AsyncLeaseStream:
+    """LeaseStream for the event loop: everything runs on one thread, so no locks."""
+
+    def __init__(self, worker_id: str, lease_seconds: float):
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.credit = 0
+        self.closed = False
+        self.leases: dict[str, int] = {}
+        self.outbox: asyncio.Queue = asyncio.Queue()
+
+    def hold(self, job_id: str, token: int) -> None:
+        self.leases[job_id] = token
+
+    def drop(self, job_ids) -> None:
+        for job_id in job_ids:
+            self.leases.pop(job_id, None)
+
+    def held(self) -> dict:
+        return dict(self.leases)
+
+    def send(self, **msg) -> None:
+        self.outbox.put_nowait(worker_pb2.LeaseStreamResponse(**msg))
+
+    async def heartbeat(self, pool) -> None:
+        """Renew every lease the stream holds; leases that did not renew are forgotten."""
+        leases = self.held()
+        renewed = set()
+        if leases:
+            params = {
+                "lease_seconds": float(self.lease_seconds),
+                "job_ids": list(leases),
+                "tokens": list(leases.values()),
+                "owner": self.worker_id,
+            }
+            rows = await pool.fetch(RENEW_LEASES.numbered_sql, *RENEW_LEASES.args(params))
+            renewed = {row[0] for row in rows}
+        lost = [job_id for job_id in leases if job_id not in renewed]
+        self.drop(lost)
+        self.send(renewed=worker_pb2.LeasesRenewed(renewed=len(renewed), lost_job_ids=lost))
+
+
+class AsyncLeaseDispatcher:
+    """LeaseDispatcher as one event-loop task."""
+
+    def __init__(self, pool, dsn: str | None = None):
+        self.pool = pool
+        self._streams: list[AsyncLeaseStream] = []
+        self._credit = asyncio.Event()
+        self._listener = AsyncQueueListener(dsn or os.environ["DATABASE_URL"])
+        self._task: asyncio.Task | None = None
+        self._closing: set[asyncio.Task] = set()
+
+    def add(self, stream: AsyncLeaseStream) -> None:
+        self._streams.append(stream)
+        metrics.grpc_lease_streams.inc()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def remove(self, stream: AsyncLeaseStream) -> int:
+        """Close the stream and hand the leases it still holds back to the queue."""
+        if stream.closed:
+            return 0
+        stream.closed = True
+        stream.credit = 0
+        self._streams.remove(stream)
+        metrics.grpc_lease_streams.dec()
+        return await _release(self.pool, stream.worker_id, stream.held())
+
+    def close_stream(self, stream: AsyncLeaseStream) -> asyncio.Task:
+        """remove() as a task that survives the call's cancellation; close() waits for it."""
+        task = asyncio.ensure_future(self.remove(stream))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+        return task
+
+    def grant(self, stream: AsyncLeaseStream, jobs: int) -> None:
+        if not stream.closed and jobs > 0:
+            stream.credit += jobs
+            self._credit.set()
+
+    async def dispatch_once(self) -> int:
+        """Claim for the currently reserved credit and push the jobs; returns how many were leased."""
+        slots = take_slots(self._streams)
+        if not slots:
+            return 0
+        try:
+            rows = await self.pool.fetch(
+                CLAIM_FOR_STREAMS.numbered_sql,
+                *CLAIM_FOR_STREAMS.args({
+                    "owners": [s.worker_id for s in slots],
+                    "lease_seconds": [float(s.lease_seconds) for s in slots],
+                }),
+            )
+        except BaseException:
+            self._refund(slots)
+            raise
+        metrics.grpc_stream_claim_batch.observe(len(rows))
+
+        filled = set()
+        orphaned: dict[str, dict] = {}
+        for slot, job_id, payload, token in rows:
+            stream = slots[slot - 1]
+            filled.add(slot - 1)
+            if stream.closed:
+                orphaned.setdefault(stream.worker_id, {})[job_id] = token
+                continue
+            stream.hold(job_id, token)
+            stream.send(job=worker_pb2.LeasedJob(job_id=job_id, payload=payload, fencing_token=token))
+        self._refund([s for i, s in enumerate(slots) if i not in filled])
+        for owner, leases in orphaned.items():
+            await _release(self.pool, owner, leases)
+        return len(rows)
+
+    def _refund(self, streams) -> None:
+        for stream in streams:
+            if not stream.closed:
+                stream.credit += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # LISTEN before the first claim, so a NOTIFY after an empty claim is not lost.
+                await self._listener.listen()
+                if not any(s.credit > 0 for s in self._streams):
+                    self._credit.clear()
+                    await self._credit.wait()
+                    continue
+                self._listener.notified.clear()
+                if await self.dispatch_once() == 0:
+                    try:
+                        await asyncio.wait_for(self._listener.notified.wait(), STREAM_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+            except _DB_ERRORS as exc:
+                log_event("db_error", error=str(exc)[:200])
+                await self._listener.close()
+                await asyncio.sleep(1.0)
+            except Exception as exc:
+                # The only task serving every stream: log and keep going, or all streams starve.
+                log_event("lease_dispatch_error", error=repr(exc)[:200])
+                await asyncio.sleep(1.0)
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        await self._listener.close()
+
+
+class AsyncFaultlineWorkerService(worker_pb2_grpc.FaultlineWorkerServicer):
+    def __init__(self, pool, dsn: str | None = None):
+        self.pool = pool
+        self.dispatcher = AsyncLeaseDispatcher(pool, dsn)
+
+    @asynccontextmanager
+    async def _conn(self, context):
+        """Pooled connection for one RPC; an exhausted pool is UNAVAILABLE, not a hung call."""
+        try:
+            conn = await self.pool.acquire(timeout=AIO_POOL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "DB pool exhausted")
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    async def SubmitJob(self, request, context):
+        with start_span(tracer, "grpc.submit"):
+            payload = request.payload or "{}"
+            try:
+                async with self._conn(context) as conn:
+                    submission = await submit_job_async(
+                        conn,
+                        payload,
+                        _payload_hash(payload),
+                        idempotency_key=request.idempotency_key or None,
+                        max_attempts=5,
+                    )
+            except IdempotencyConflict as exc:
+                await context.abort(grpc.StatusCode.ALREADY_EXISTS, str(exc))
+            return worker_pb2.SubmitJobResponse(job_id=submission.job_id, state=submission.state)
+
+    async def ClaimNextJob(self, request, context):
+        force_job_id = request.force_job_id or None
+        with start_span(tracer, "grpc.claim"):
+            params = {"owner": request.worker_id, "lease_seconds": float(request.lease_seconds or 30)}
+            async with self._conn(context) as conn:
+                if force_job_id:
+                    stmt, params = CLAIM_PINNED, {**params, "job_id": force_job_id}
+                else:
+                    stmt = CLAIM_NEXT
+                row = await conn.fetchrow(stmt.numbered_sql, *stmt.args(params))
+            if not row:
+                return worker_pb2.ClaimNextJobResponse(claimed=False)
+            return worker_pb2.ClaimNextJobResponse(
+                claimed=True,
+                job_id=row[0],
+                payload=row[1],
+                fencing_token=int(row[2]),
+                lease_owner=row[3] or "",
+            )
+
+    async def CompleteJob(self, request, context):
+        with start_span(tracer, "grpc.complete"):
+            try:
+                state = await _complete_job(
+                    self.pool, request.worker_id, request.job_id, int(request.fencing_token)
+                )
+            except InvalidJobId as exc:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"invalid job_id: {exc}")
+            return worker_pb2.CompleteJobResponse(ok=state is not None, state=state or "stale")
+
+    async def _write_batch(self, write, owner: str, items: list, context) -> list:
+        if len(items) > WRITE_BATCH_MAX:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"at most {WRITE_BATCH_MAX} items per call")
+        try:
+            async with self._conn(context) as conn:
+                return await write(conn, items, owner=owner or None)
+        except InvalidJobId as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"invalid job_id: {exc}")
+
+    async def CompleteJobs(self, request, context):
+        items = [(i.job_id, i.fencing_token, i.result_json or None) for i in request.items]
+        with start_span(tracer, "grpc.complete_jobs", batch_size=len(items)):
+            results = await self._write_batch(complete_jobs_async, request.worker_id, items, context)
+            return worker_pb2.JobWritesResponse(results=_write_results(results))
+
+    async def FailJobs(self, request, context):
+        items = [(i.job_id, i.fencing_token, i.error) for i in request.items]
+        with start_span(tracer, "grpc.fail_jobs", batch_size=len(items)):
+            results = await self._write_batch(fail_jobs_async, request.worker_id, items, context)
+            return worker_pb2.JobWritesResponse(results=_write_results(results))
+
+    async def GetJob(self, request, context):
+        async with self._conn(context) as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT id::text, state, COALESCE(lease_owner, ''), fencing_token
+                FROM jobs WHERE id=$1::uuid
+                UNION ALL
+                SELECT id::text, state, COALESCE(lease_owner, ''), fencing_token
+                FROM jobs_history WHERE id=$1::uuid
+                LIMIT 1
+                """,
+                request.job_id,
+            )
+        if not row:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "job not found")
+        return worker_pb2.GetJobResponse(
+            job_id=row[0],
+            state=row[1],
+            lease_owner=row[2],
+            fencing_token=int(row[3] or 0),
+        )
+
+    async def StreamLeases(self, request_iterator, context):
+        hello = await anext(request_iterator, None)
+        if hello is None or hello.WhichOneof("msg") != "hello" or not hello.hello.worker_id:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "first message must be hello with a worker_id")
+        stream = AsyncLeaseStream(hello.hello.worker_id, hello.hello.lease_seconds or 30)
+        self.dispatcher.add(stream)
+        reader = asyncio.ensure_future(self._read_stream(request_iterator, stream))
+        self.dispatcher.grant(stream, hello.hello.credit)
+        try:
+            with start_span(tracer, "grpc.stream_leases", worker_id=stream.worker_id):
+                while True:
+                    msg = await stream.outbox.get()
+                    if msg is None:
+                        break
+                    yield msg
+        finally:
+            reader.cancel()
+            # A cancelled call still hands its leases back.
+            await asyncio.shield(self.dispatcher.close_stream(stream))
+
+    async def _read_stream(self, request_iterator, stream: AsyncLeaseStream) -> None:
+        """Requests after hello; the stream ends when the client half-closes or goes away."""
+        try:
+            async for request in request_iterator:
+                kind = request.WhichOneof("msg")
+                if kind == "credit":
+                    self.dispatcher.grant(stream, request.credit.jobs)
+                elif kind == "complete":
+                    complete = request.complete
+                    job_id, token = complete.job_id, int(complete.fencing_token)
+                    try:
+                        state = await _complete_job(
+                            self.pool, stream.worker_id, job_id, token, complete.result_json or None
+                        )
+                    except InvalidJobId:
+                        state = None
+                    stream.drop([job_id])
+                    stream.send(completed=worker_pb2.LeaseCompleted(
+                        job_id=job_id, ok=state is not None, state=state or "stale"
+                    ))
+                elif kind == "heartbeat":
+                    await stream.heartbeat(self.pool)
+        except (grpc.RpcError, asyncio.CancelledError):
+            pass
+        finally:
+            stream.outbox.put_nowait(None)
+
+
+class RpcLatencyInterceptor(grpc.aio.ServerInterceptor):
+    """Observe faultline_grpc_rpc_seconds{method, code} around every handler."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=_timed_unary(handler.unary_unary, method))
+        if handler.stream_stream is not None:
+            return handler._replace(stream_stream=_timed_stream(handler.stream_stream, method))
+        return handler
+
+
+def _observe(method: str, context, started: float, failed: bool) -> None:
+    code = grpc.StatusCode.UNKNOWN if failed else (context.code() or grpc.StatusCode.OK)
+    name = code.name if isinstance(code, grpc.StatusCode) else str(code)
+    metrics.grpc_rpc_seconds.labels(method=method, code=name).observe(time.monotonic() - started)
+
+
+def _timed_unary(behavior, method: str):
+    async def timed(request, context):
+        started = time.monotonic()
+        failed = False
+        try:
+            return await behavior(request, context)
+        except grpc.aio.AbortError:
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _observe(method, context, started, failed)
+
+    return timed
+
+
+def _timed_stream(behavior, method: str):
+    async def timed(request_iterator, context):
+        started = time.monotonic()
+        failed = False
+        try:
+            async for response in behavior(request_iterator, context):
+                yield response
+        except (grpc.aio.AbortError, asyncio.CancelledError, GeneratorExit):
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _observe(method, context, started, failed)
+
+    return timed
+
+
+async def open_pool(dsn: str | None = None) -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        dsn or os.environ["DATABASE_URL"], min_size=1, max_size=AIO_POOL_MAX_SIZE
+    )
+
+
+def build_server(pool, dsn: str | None = None) -> tuple[grpc.aio.Server, AsyncFaultlineWorkerService]:
+    server = grpc.aio.server(
+        interceptors=[RpcLatencyInterceptor()],
+        options=SERVER_OPTIONS,
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS or None,
+    )
+    service = AsyncFaultlineWorkerService(pool, dsn)
+    worker_pb2_grpc.add_FaultlineWorkerServicer_to_server(service, server)
+    return server, service
+
+
+async def serve() -> None:
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+    pool = await open_pool()
+    server, service = build_server(pool)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    print(f"faultline grpc (asyncio) listening on :{PORT}", flush=True)
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(5)
+        await service.dispatcher.close()
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
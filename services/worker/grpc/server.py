@@ -3,104 +3,525 @@
 This is intentionally thin: the goal is not to duplicate the worker runtime,
 but to expose a network boundary that makes exactly-once / fencing behavior
 observable across service-to-service communication.
+
+CompleteJobs and FailJobs settle a batch of leases in one transaction, each
+item fenced on its own token (services/common/completion.py); a stale item
+is reported as stale_write_rejected in its result instead of failing the
+call. FAULTLINE_GRPC_WRITE_BATCH_MAX caps the items per call (default 1000).
+
+StreamLeases is the long-lived alternative to one ClaimNextJob RPC per job.
+A remote worker opens one bidirectional stream, says hello, and grants credit
+(how many more jobs it can take). One LeaseDispatcher thread per server
+claims for every open stream in a single statement, filling credit round
+robin, and pushes each job down its stream; it sleeps on the queue LISTEN
+channel when nothing is claimable. Completions and heartbeats travel on the
+same stream. When a stream ends, the leases it still holds go straight back
+to the queue instead of waiting for the reaper. Each open stream occupies
+one FAULTLINE_GRPC_MAX_WORKERS thread; services/worker/grpc/aio_server.py
+serves the same RPCs on asyncio without that cap.
+
+    FAULTLINE_GRPC_STREAM_CLAIM_MAX        jobs per pooled claim (default 100)
+    FAULTLINE_GRPC_STREAM_POLL_SECONDS     idle re-check without a NOTIFY (default 1)
+    FAULTLINE_GRPC_KEEPALIVE_TIME_MS       server keepalive ping interval (default 30000)
+    FAULTLINE_GRPC_KEEPALIVE_TIMEOUT_MS    ping ack deadline (default 10000)
+    FAULTLINE_GRPC_MAX_CONCURRENT_STREAMS  HTTP/2 streams per connection (default 1000)
 """
 
 from __future__ import annotations
 
 import hashlib
 import os
-import uuid
+import queue
+import threading
+import time
 from concurrent import futures
 
 import grpc
+import psycopg2
 
 from common.observability.tracing import get_tracer
-from services.worker.transport_db import get_conn
+from services.common.completion import InvalidJobId, complete_jobs, fail_jobs
+from services.common.queue_notify import QueueListener, notify_queue
+from services.common.submission import IdempotencyConflict, submit_job
+from services.worker import metrics, statements
+from services.worker.autopsy import log_event
+from services.worker.heartbeat import RENEW_LEASES
+from services.worker.transport_db import DB_POOL_MAX_SIZE, get_conn, init_pool
 from services.worker.spans import start_span
 
 # Generated at build time from worker.proto.
 from services.worker.grpc import worker_pb2, worker_pb2_grpc  # type: ignore
 
 PORT = int(os.getenv("FAULTLINE_GRPC_PORT", "50051"))
+MAX_WORKERS = int(os.getenv("FAULTLINE_GRPC_MAX_WORKERS", "8"))
+STREAM_CLAIM_MAX = int(os.getenv("FAULTLINE_GRPC_STREAM_CLAIM_MAX", "100"))
+STREAM_POLL_SECONDS = float(os.getenv("FAULTLINE_GRPC_STREAM_POLL_SECONDS", "1"))
+WRITE_BATCH_MAX = int(os.getenv("FAULTLINE_GRPC_WRITE_BATCH_MAX", "1000"))
+KEEPALIVE_TIME_MS = int(os.getenv("FAULTLINE_GRPC_KEEPALIVE_TIME_MS", "30000"))
+KEEPALIVE_TIMEOUT_MS = int(os.getenv("FAULTLINE_GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+MAX_CONCURRENT_STREAMS = int(os.getenv("FAULTLINE_GRPC_MAX_CONCURRENT_STREAMS", "1000"))
+
+# Shared by both servers. The server pings idle connections every
+# KEEPALIVE_TIME_MS, so a worker that vanished without a FIN (and the leases
+# its stream holds) is noticed within KEEPALIVE_TIME_MS + KEEPALIVE_TIMEOUT_MS,
+# and accepts client keepalive pings down to 10s apart.
+SERVER_OPTIONS = [
+    ("grpc.keepalive_time_ms", KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.http2.min_recv_ping_interval_without_data_ms", 10000),
+    ("grpc.max_concurrent_streams", MAX_CONCURRENT_STREAMS),
+]
 tracer = get_tracer("faultline.grpc")
 
 
+CLAIM_PINNED = statements.register(
+    "faultline_grpc_claim_pinned",
+    """
+    UPDATE jobs
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=fencing_token+1,
+        updated_at=NOW()
+    WHERE id=%(job_id)s
+      AND (
+            state='queued'
+         OR (state='running' AND lease_expires_at < NOW())
+      )
+    RETURNING id::text, payload::text, fencing_token, lease_owner
+    """,
+    [("owner", "text"), ("lease_seconds", "float8"), ("job_id", "uuid")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases l
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=l.fencing_token+1,
+        updated_at=NOW()
+    FROM job_bodies b
+    WHERE l.job_id=%(job_id)s
+      AND b.id = l.job_id
+      AND (
+            l.state='queued'
+         OR (l.state='running' AND l.lease_expires_at < NOW())
+      )
+    RETURNING l.job_id::text, b.payload::text, l.fencing_token, l.lease_owner
+    """,
+)
+
+CLAIM_NEXT = statements.register(
+    "faultline_grpc_claim_next",
+    """
+    UPDATE jobs
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=fencing_token+1,
+        updated_at=NOW()
+    WHERE id = (
+        SELECT id
+        FROM jobs
+        WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY COALESCE(next_run_at, created_at)
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id::text, payload::text, fencing_token, lease_owner
+    """,
+    [("owner", "text"), ("lease_seconds", "float8")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases l
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=l.fencing_token+1,
+        updated_at=NOW()
+    FROM job_bodies b
+    WHERE l.job_id = (
+        SELECT job_id
+        FROM job_leases
+        WHERE (state='queued' AND next_run_at <= NOW())
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY next_run_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+      AND b.id = l.job_id
+    RETURNING l.job_id::text, b.payload::text, l.fencing_token, l.lease_owner
+    """,
+)
+
+# One slot per unit of credit: slot n's job is leased to owners[n] and pushed
+# down that slot's stream. Jobs are matched to slots in run order.
+CLAIM_FOR_STREAMS = statements.register(
+    "faultline_grpc_claim_for_streams",
+    """
+    WITH slots AS (
+        SELECT slot, owner, lease_seconds
+        FROM unnest(%(owners)s::text[], %(lease_seconds)s::float8[])
+             WITH ORDINALITY AS s(owner, lease_seconds, slot)
+    ),
+    candidates AS (
+        SELECT id, row_number() OVER (ORDER BY run_at) AS slot
+        FROM (
+            SELECT id, COALESCE(next_run_at, created_at) AS run_at
+            FROM jobs
+            WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
+               OR (state='running' AND lease_expires_at < NOW())
+            ORDER BY COALESCE(next_run_at, created_at)
+            FOR UPDATE SKIP LOCKED
+            LIMIT cardinality(%(owners)s::text[])
+        ) picked
+    )
+    UPDATE jobs
+    SET state='running',
+        lease_owner=s.owner,
+        lease_expires_at = NOW() + make_interval(secs => s.lease_seconds),
+        fencing_token=jobs.fencing_token+1,
+        updated_at=NOW()
+    FROM candidates c
+    JOIN slots s ON s.slot = c.slot
+    WHERE jobs.id = c.id
+    RETURNING s.slot, jobs.id::text, jobs.payload::text, jobs.fencing_token
+    """,
+    [("owners", "text[]"), ("lease_seconds", "float8[]")],
+    "claim",
+    lease_table_sql="""
+    WITH slots AS (
+        SELECT slot, owner, lease_seconds
+        FROM unnest(%(owners)s::text[], %(lease_seconds)s::float8[])
+             WITH ORDINALITY AS s(owner, lease_seconds, slot)
+    ),
+    candidates AS (
+        SELECT job_id, row_number() OVER (ORDER BY next_run_at) AS slot
+        FROM (
+            SELECT job_id, next_run_at
+            FROM job_leases
+            WHERE (state='queued' AND next_run_at <= NOW())
+               OR (state='running' AND lease_expires_at < NOW())
+            ORDER BY next_run_at
+            FOR UPDATE SKIP LOCKED
+            LIMIT cardinality(%(owners)s::text[])
+        ) picked
+    )
+    UPDATE job_leases l
+    SET state='running',
+        lease_owner=s.owner,
+        lease_expires_at = NOW() + make_interval(secs => s.lease_seconds),
+        fencing_token=l.fencing_token+1,
+        updated_at=NOW()
+    FROM candidates c
+    JOIN slots s ON s.slot = c.slot
+    JOIN job_bodies b ON b.id = c.job_id
+    WHERE l.job_id = c.job_id
+    RETURNING s.slot, l.job_id::text, b.payload::text, l.fencing_token
+    """,
+)
+
+RELEASE = statements.register(
+    "faultline_grpc_release",
+    """
+    UPDATE jobs
+    SET state='queued',
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        updated_at=NOW()
+    FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS released(job_id, token)
+    WHERE jobs.id = released.job_id
+      AND jobs.fencing_token = released.token
+      AND jobs.state='running'
+      AND jobs.lease_owner=%(owner)s
+    """,
+    [("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("owner", "text")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases
+    SET state='queued',
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        updated_at=NOW()
+    FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS released(job_id, token)
+    WHERE job_leases.job_id = released.job_id
+      AND job_leases.fencing_token = released.token
+      AND job_leases.state='running'
+      AND job_leases.lease_owner=%(owner)s
+    """,
+)
+
+
 def _payload_hash(payload: str) -> str:
     return hashlib.sha256(payload.encode()).hexdigest()
 
 
+def _write_results(results) -> list:
+    return [
+        worker_pb2.JobWriteResult(
+            job_id=r.job_id,
+            committed=r.committed,
+            stale_write_rejected=r.stale_write_rejected,
+            state=r.state or "",
+            reason=r.reason,
+        )
+        for r in results
+    ]
+
+
+def _write_batch(write, owner: str, items: list, context) -> list:
+    if len(items) > WRITE_BATCH_MAX:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"at most {WRITE_BATCH_MAX} items per call")
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                results = write(cur, items, owner=owner or None)
+            conn.commit()
+    except InvalidJobId as exc:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"invalid job_id: {exc}")
+    return results
+
+
+def _complete_job(owner: str, job_id: str, token: int, result: str | None = None):
+    """Fenced completion of one job; returns the new state, or None when stale."""
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            (outcome,) = complete_jobs(cur, [(job_id, token, result)], owner=owner)
+        conn.commit()
+    return outcome.state if outcome.committed else None
+
+
+def _release(owner: str, leases: dict) -> int:
+    if not leases:
+        return 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            statements.execute(
+                cur, RELEASE, {"job_ids": list(leases), "tokens": list(leases.values()), "owner": owner}
+            )
+            released = cur.rowcount
+            if released:
+                notify_queue(cur)
+        conn.commit()
+    return released
+
+
+def take_slots(streams) -> list:
+    """Reserve up to STREAM_CLAIM_MAX units of credit, round robin across streams."""
+    slots = []
+    while len(slots) < STREAM_CLAIM_MAX:
+        takers = [s for s in streams if s.credit > 0]
+        if not takers:
+            break
+        for stream in takers[: STREAM_CLAIM_MAX - len(slots)]:
+            stream.credit -= 1
+            slots.append(stream)
+    return slots
+
+
+class LeaseStream:
+    """One StreamLeases call: its credit, the leases pushed to it, and its outbound messages."""
+
+    def __init__(self, worker_id: str, lease_seconds: float):
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.credit = 0
+        self.closed = False
+        self.leases: dict[str, int] = {}
+        self.outbox: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def hold(self, job_id: str, token: int) -> None:
+        with self._lock:
+            self.leases[job_id] = token
+
+    def drop(self, job_ids) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self.leases.pop(job_id, None)
+
+    def held(self) -> dict:
+        with self._lock:
+            return dict(self.leases)
+
+    def send(self, **msg) -> None:
+        self.outbox.put(worker_pb2.LeaseStreamResponse(**msg))
+
+    def heartbeat(self) -> None:
+        """Renew every lease the stream holds; leases that did not renew are forgotten."""
+        leases = self.held()
+        renewed = set()
+        if leases:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    statements.execute(
+                        cur,
+                        RENEW_LEASES,
+                        {
+                            "lease_seconds": self.lease_seconds,
+                            "job_ids": list(leases),
+                            "tokens": list(leases.values()),
+                            "owner": self.worker_id,
+                        },
+                    )
+                    renewed = {row[0] for row in cur.fetchall()}
+                conn.commit()
+        lost = [job_id for job_id in leases if job_id not in renewed]
+        self.drop(lost)
+        self.send(renewed=worker_pb2.LeasesRenewed(renewed=len(renewed), lost_job_ids=lost))
+
+
+class LeaseDispatcher:
+    """Claims on behalf of every open lease stream, one statement per round."""
+
+    def __init__(self, dsn: str | None = None):
+        self._cond = threading.Condition()
+        self._streams: list[LeaseStream] = []
+        self._listener = QueueListener(dsn or os.environ["DATABASE_URL"])
+        self._thread: threading.Thread | None = None
+
+    def add(self, stream: LeaseStream) -> None:
+        with self._cond:
+            self._streams.append(stream)
+            metrics.grpc_lease_streams.inc()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lease-dispatcher", daemon=True)
+                self._thread.start()
+
+    def remove(self, stream: LeaseStream) -> int:
+        """Close the stream and hand the leases it still holds back to the queue."""
+        with self._cond:
+            if stream.closed:
+                return 0
+            stream.closed = True
+            stream.credit = 0
+            self._streams.remove(stream)
+            metrics.grpc_lease_streams.dec()
+        return _release(stream.worker_id, stream.held())
+
+    def grant(self, stream: LeaseStream, jobs: int) -> None:
+        with self._cond:
+            if not stream.closed and jobs > 0:
+                stream.credit += jobs
+                self._cond.notify()
+
+    def dispatch_once(self) -> int:
+        """Claim for the currently reserved credit and push the jobs; returns how many were leased."""
+        with self._cond:
+            slots = take_slots(self._streams)
+        if not slots:
+            return 0
+        try:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    statements.execute(
+                        cur,
+                        CLAIM_FOR_STREAMS,
+                        {
+                            "owners": [s.worker_id for s in slots],
+                            "lease_seconds": [float(s.lease_seconds) for s in slots],
+                        },
+                    )
+                    rows = cur.fetchall()
+                conn.commit()
+        except BaseException:
+            self._refund(slots)
+            raise
+        metrics.grpc_stream_claim_batch.observe(len(rows))
+
+        filled = set()
+        orphaned: dict[str, dict] = {}
+        for slot, job_id, payload, token in rows:
+            stream = slots[slot - 1]
+            filled.add(slot - 1)
+            # Held before the closed check, so remove() either releases it or we do.
+            stream.hold(job_id, token)
+            if stream.closed:
+                stream.drop([job_id])
+                orphaned.setdefault(stream.worker_id, {})[job_id] = token
+                continue
+            stream.send(job=worker_pb2.LeasedJob(job_id=job_id, payload=payload, fencing_token=token))
+        self._refund([s for i, s in enumerate(slots) if i not in filled])
+        for owner, leases in orphaned.items():
+            _release(owner, leases)
+        return len(rows)
+
+    def _refund(self, streams) -> None:
+        with self._cond:
+            for stream in streams:
+                if not stream.closed:
+                    stream.credit += 1
+
+    def _run(self) -> None:
+        # The only thread serving every stream: it must outlive any error, or all streams starve.
+        while True:
+            try:
+                # LISTEN before the first claim, so a NOTIFY after an empty claim is not lost.
+                self._listener.listen()
+                with self._cond:
+                    while not any(s.credit > 0 for s in self._streams):
+                        self._cond.wait()
+                if self.dispatch_once() == 0:
+                    self._listener.wait(STREAM_POLL_SECONDS)
+            except (psycopg2.Error, OSError) as exc:
+                log_event("db_error", error=str(exc)[:200])
+                self._listener.close()
+                time.sleep(1.0)
+            except Exception as exc:
+                log_event("lease_dispatch_error", error=repr(exc)[:200])
+                time.sleep(1.0)
+
+
+_dispatcher: LeaseDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def lease_dispatcher() -> LeaseDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = LeaseDispatcher()
+        return _dispatcher
+
+
 class FaultlineWorkerService(worker_pb2_grpc.FaultlineWorkerServicer):
     def SubmitJob(self, request, context):
         with start_span(tracer, "grpc.submit"):
-            job_id = str(uuid.uuid4())
             payload = request.payload or "{}"
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        INSERT INTO jobs (
-                            id, payload, payload_hash, state, attempts, max_attempts,
-                            lease_owner, lease_expires_at, fencing_token, next_run_at
+            try:
+                with get_conn() as conn:
+                    with conn.cursor() as cur:
+                        submission = submit_job(
+                            cur,
+                            payload,
+                            _payload_hash(payload),
+                            idempotency_key=request.idempotency_key or None,
+                            max_attempts=5,
                         )
-                        VALUES (%s, %s, %s, 'queued', 0, 5, NULL, NULL, 0, NOW())
-                        """,
-                        (job_id, payload, _payload_hash(payload)),
-                    )
                     conn.commit()
-            return worker_pb2.SubmitJobResponse(job_id=job_id, state="queued")
+            except IdempotencyConflict as exc:
+                context.abort(grpc.StatusCode.ALREADY_EXISTS, str(exc))
+            return worker_pb2.SubmitJobResponse(job_id=submission.job_id, state=submission.state)
 
     def ClaimNextJob(self, request, context):
         force_job_id = request.force_job_id or None
         with start_span(tracer, "grpc.claim"):
             with get_conn() as conn:
                 with conn.cursor() as cur:
+                    params = {"owner": request.worker_id, "lease_seconds": int(request.lease_seconds or 30)}
                     if force_job_id:
-                        cur.execute(
-                            """
-                            UPDATE jobs
-                            SET state='running',
-                                lease_owner=%s,
-                                lease_expires_at = NOW() + make_interval(secs => %s),
-                                fencing_token=fencing_token+1,
-                                updated_at=NOW()
-                            WHERE id=%s
-                              AND (
-                                    state='queued'
-                                 OR (state='running' AND lease_expires_at < NOW())
-                              )
-                            RETURNING id, payload, fencing_token, lease_owner
-                            """,
-                            (request.worker_id, int(request.lease_seconds or 30), force_job_id),
-                        )
+                        statements.execute(cur, CLAIM_PINNED, {**params, "job_id": force_job_id})
                     else:
-                        cur.execute(
-                            """
-                            UPDATE jobs
-                            SET state='running',
-                                lease_owner=%s,
-                                lease_expires_at = NOW() + make_interval(secs => %s),
-                                fencing_token=fencing_token+1,
-                                updated_at=NOW()
-                            WHERE id = (
-                                SELECT id
-                                FROM jobs
-                                WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
-                                   OR (state='running' AND lease_expires_at < NOW())
-                                ORDER BY COALESCE(next_run_at, created_at)
-                                FOR UPDATE SKIP LOCKED
-                                LIMIT 1
-                            )
-                            RETURNING id, payload, fencing_token, lease_owner
-                            """,
-                            (request.worker_id, int(request.lease_seconds or 30)),
-                        )
+                        statements.execute(cur, CLAIM_NEXT, params)
                     row = cur.fetchone()
                     conn.commit()
             if not row:
                 return worker_pb2.ClaimNextJobResponse(claimed=False)
             return worker_pb2.ClaimNextJobResponse(
                 claimed=True,
-                job_id=str(row[0]),
+                job_id=row[0],
                 payload=row[1],
                 fencing_token=int(row[2]),
                 lease_owner=row[3] or "",
@@ -108,52 +529,38 @@ class FaultlineWorkerService(worker_pb2_grpc.FaultlineWorkerServicer):
 
     def CompleteJob(self, request, context):
         with start_span(tracer, "grpc.complete"):
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
-                        VALUES (%s, %s, 'default', 1)
-                        ON CONFLICT (job_id, fencing_token) DO NOTHING
-                        """,
-                        (request.job_id, int(request.fencing_token)),
-                    )
-                    cur.execute(
-                        """
-                        UPDATE jobs
-                        SET state='succeeded',
-                            lease_owner=NULL,
-                            lease_expires_at=NULL,
-                            next_run_at=NULL,
-                            updated_at=NOW()
-                        WHERE id=%s
-                          AND state='running'
-                          AND lease_owner=%s
-                          AND fencing_token=%s
-                          AND EXISTS (
-                                SELECT 1 FROM ledger_entries
-                                WHERE job_id=%s AND fencing_token=%s
-                          )
-                        RETURNING state
-                        """,
-                        (
-                            request.job_id,
-                            request.worker_id,
-                            int(request.fencing_token),
-                            request.job_id,
-                            int(request.fencing_token),
-                        ),
-                    )
-                    row = cur.fetchone()
-                    conn.commit()
-            return worker_pb2.CompleteJobResponse(ok=bool(row), state=(row[0] if row else "stale"))
+            try:
+                state = _complete_job(request.worker_id, request.job_id, int(request.fencing_token))
+            except InvalidJobId as exc:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"invalid job_id: {exc}")
+            return worker_pb2.CompleteJobResponse(ok=state is not None, state=state or "stale")
+
+    def CompleteJobs(self, request, context):
+        items = [(i.job_id, i.fencing_token, i.result_json or None) for i in request.items]
+        with start_span(tracer, "grpc.complete_jobs", batch_size=len(items)):
+            results = _write_batch(complete_jobs, request.worker_id, items, context)
+            return worker_pb2.JobWritesResponse(results=_write_results(results))
+
+    def FailJobs(self, request, context):
+        items = [(i.job_id, i.fencing_token, i.error) for i in request.items]
+        with start_span(tracer, "grpc.fail_jobs", batch_size=len(items)):
+            results = _write_batch(fail_jobs, request.worker_id, items, context)
+            return worker_pb2.JobWritesResponse(results=_write_results(results))
 
     def GetJob(self, request, context):
         with get_conn() as conn:
             with conn.cursor() as cur:
+                # Archived jobs stay readable, as on GET /jobs/{job_id}.
                 cur.execute(
-                    "SELECT id, state, COALESCE(lease_owner, ''), fencing_token FROM jobs WHERE id=%s",
-                    (request.job_id,),
+                    """
+                    SELECT id, state, COALESCE(lease_owner, ''), fencing_token
+                    FROM jobs WHERE id=%(id)s
+                    UNION ALL
+                    SELECT id, state, COALESCE(lease_owner, ''), fencing_token
+                    FROM jobs_history WHERE id=%(id)s
+                    LIMIT 1
+                    """,
+                    {"id": request.job_id},
                 )
                 row = cur.fetchone()
         if not row:
@@ -165,9 +572,58 @@ class FaultlineWorkerService(worker_pb2_grpc.FaultlineWorkerServicer):
             fencing_token=int(row[3] or 0),
         )
 
+    def StreamLeases(self, request_iterator, context):
+        hello = next(request_iterator, None)
+        if hello is None or hello.WhichOneof("msg") != "hello" or not hello.hello.worker_id:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "first message must be hello with a worker_id")
+        stream = LeaseStream(hello.hello.worker_id, hello.hello.lease_seconds or 30)
+        dispatcher = lease_dispatcher()
+        dispatcher.add(stream)
+        context.add_callback(lambda: stream.outbox.put(None))
+        threading.Thread(
+            target=self._read_stream, args=(request_iterator, stream, dispatcher), daemon=True
+        ).start()
+        dispatcher.grant(stream, hello.hello.credit)
+        try:
+            with start_span(tracer, "grpc.stream_leases", worker_id=stream.worker_id):
+                while True:
+                    msg = stream.outbox.get()
+                    if msg is None:
+                        break
+                    yield msg
+        finally:
+            dispatcher.remove(stream)
+
+    @staticmethod
+    def _read_stream(request_iterator, stream: LeaseStream, dispatcher: LeaseDispatcher) -> None:
+        """Requests after hello; the stream ends when the client half-closes or goes away."""
+        try:
+            for request in request_iterator:
+                kind = request.WhichOneof("msg")
+                if kind == "credit":
+                    dispatcher.grant(stream, request.credit.jobs)
+                elif kind == "complete":
+                    complete = request.complete
+                    job_id, token = complete.job_id, int(complete.fencing_token)
+                    try:
+                        state = _complete_job(stream.worker_id, job_id, token, complete.result_json or None)
+                    except InvalidJobId:
+                        state = None
+                    stream.drop([job_id])
+                    stream.send(completed=worker_pb2.LeaseCompleted(
+                        job_id=job_id, ok=state is not None, state=state or "stale"
+                    ))
+                elif kind == "heartbeat":
+                    stream.heartbeat()
+        except grpc.RpcError:
+            pass
+        finally:
+            stream.outbox.put(None)
+
 
 def serve() -> None:
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    init_pool(max_size=max(DB_POOL_MAX_SIZE, MAX_WORKERS))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS), options=SERVER_OPTIONS)
     worker_pb2_grpc.add_FaultlineWorkerServicer_to_server(FaultlineWorkerService(), server)
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
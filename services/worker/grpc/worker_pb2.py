@@ -2,7 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
 # source: worker.proto
-# Protobuf Python Version: 6.31.1
+# Protobuf Python Version: 7.35.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -11,8 +11,8 @@ from google.protobuf import symbol_database as _symbol_database
 from google.protobuf.internal import builder as _builder
 _runtime_version.ValidateProtobufRuntimeVersion(
     _runtime_version.Domain.PUBLIC,
-    6,
-    31,
+    7,
+    35,
     1,
     '',
     'worker.proto'
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cworker.proto\x12\x10\x66\x61ultline.worker\"8\n\x10SubmitJobRequest\x12\x0f\n\x07payload\x18\x01 \x01(\t\x12\x13\n\x0btraceparent\x18\x02 \x01(\t\"2\n\x11SubmitJobResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\"U\n\x13\x43laimNextJobRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x15\n\rlease_seconds\x18\x02 \x01(\x05\x12\x14\n\x0c\x66orce_job_id\x18\x03 \x01(\t\"t\n\x14\x43laimNextJobResponse\x12\x0f\n\x07\x63laimed\x18\x01 \x01(\x08\x12\x0e\n\x06job_id\x18\x02 \x01(\t\x12\x0f\n\x07payload\x18\x03 \x01(\t\x12\x15\n\rfencing_token\x18\x04 \x01(\x03\x12\x13\n\x0blease_owner\x18\x05 \x01(\t\"N\n\x12\x43ompleteJobRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0e\n\x06job_id\x18\x02 \x01(\t\x12\x15\n\rfencing_token\x18\x03 \x01(\x03\"0\n\x13\x43ompleteJobResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05state\x18\x02 \x01(\t\"\x1f\n\rGetJobRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"[\n\x0eGetJobResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\x12\x13\n\x0blease_owner\x18\x03 \x01(\t\x12\x15\n\rfencing_token\x18\x04 \x01(\x03\x32\xef\x02\n\x0f\x46\x61ultlineWorker\x12T\n\tSubmitJob\x12\".faultline.worker.SubmitJobRequest\x1a#.faultline.worker.SubmitJobResponse\x12]\n\x0c\x43laimNextJob\x12%.faultline.worker.ClaimNextJobRequest\x1a&.faultline.worker.ClaimNextJobResponse\x12Z\n\x0b\x43ompleteJob\x12$.faultline.worker.CompleteJobRequest\x1a%.faultline.worker.CompleteJobResponse\x12K\n\x06GetJob\x12\x1f.faultline.worker.GetJobRequest\x1a .faultline.worker.GetJobResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cworker.proto\x12\x10\x66\x61ultline.worker\"Q\n\x10SubmitJobRequest\x12\x0f\n\x07payload\x18\x01 \x01(\t\x12\x13\n\x0btraceparent\x18\x02 \x01(\t\x12\x17\n\x0fidempotency_key\x18\x03 \x01(\t\"2\n\x11SubmitJobResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\"U\n\x13\x43laimNextJobRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x15\n\rlease_seconds\x18\x02 \x01(\x05\x12\x14\n\x0c\x66orce_job_id\x18\x03 \x01(\t\"t\n\x14\x43laimNextJobResponse\x12\x0f\n\x07\x63laimed\x18\x01 \x01(\x08\x12\x0e\n\x06job_id\x18\x02 \x01(\t\x12\x0f\n\x07payload\x18\x03 \x01(\t\x12\x15\n\rfencing_token\x18\x04 \x01(\x03\x12\x13\n\x0blease_owner\x18\x05 \x01(\t\"N\n\x12\x43ompleteJobRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x0e\n\x06job_id\x18\x02 \x01(\t\x12\x15\n\rfencing_token\x18\x03 \x01(\x03\"0\n\x13\x43ompleteJobResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\r\n\x05state\x18\x02 \x01(\t\"J\n\x0c\x43ompleteItem\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x15\n\rfencing_token\x18\x02 \x01(\x03\x12\x13\n\x0bresult_json\x18\x03 \x01(\t\"W\n\x13\x43ompleteJobsRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12-\n\x05items\x18\x02 \x03(\x0b\x32\x1e.faultline.worker.CompleteItem\"@\n\x08\x46\x61ilItem\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x15\n\rfencing_token\x18\x02 \x01(\x03\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"O\n\x0f\x46\x61ilJobsRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12)\n\x05items\x18\x02 \x03(\x0b\x32\x1a.faultline.worker.FailItem\"p\n\x0eJobWriteResult\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x11\n\tcommitted\x18\x02 \x01(\x08\x12\x1c\n\x14stale_write_rejected\x18\x03 \x01(\x08\x12\r\n\x05state\x18\x04 \x01(\t\x12\x0e\n\x06reason\x18\x05 \x01(\t\"F\n\x11JobWritesResponse\x12\x31\n\x07results\x18\x01 \x03(\x0b\x32 .faultline.worker.JobWriteResult\"\x1f\n\rGetJobRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"[\n\x0eGetJobResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\x12\x13\n\x0blease_owner\x18\x03 \x01(\t\x12\x15\n\rfencing_token\x18\x04 \x01(\x03\"L\n\x10LeaseStreamHello\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x15\n\rlease_seconds\x18\x02 \x01(\x05\x12\x0e\n\x06\x63redit\x18\x03 \x01(\x05\"\x1b\n\x0bLeaseCredit\x12\x0c\n\x04jobs\x18\x01 \x01(\x05\"K\n\rLeaseComplete\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x15\n\rfencing_token\x18\x02 \x01(\x03\x12\x13\n\x0bresult_json\x18\x03 \x01(\t\"\x10\n\x0eLeaseHeartbeat\"\xed\x01\n\x12LeaseStreamRequest\x12\x33\n\x05hello\x18\x01 \x01(\x0b\x32\".faultline.worker.LeaseStreamHelloH\x00\x12/\n\x06\x63redit\x18\x02 \x01(\x0b\x32\x1d.faultline.worker.LeaseCreditH\x00\x12\x33\n\x08\x63omplete\x18\x03 \x01(\x0b\x32\x1f.faultline.worker.LeaseCompleteH\x00\x12\x35\n\theartbeat\x18\x04 \x01(\x0b\x32 .faultline.worker.LeaseHeartbeatH\x00\x42\x05\n\x03msg\"C\n\tLeasedJob\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x0f\n\x07payload\x18\x02 \x01(\t\x12\x15\n\rfencing_token\x18\x03 \x01(\x03\";\n\x0eLeaseCompleted\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\n\n\x02ok\x18\x02 \x01(\x08\x12\r\n\x05state\x18\x03 \x01(\t\"6\n\rLeasesRenewed\x12\x0f\n\x07renewed\x18\x01 \x01(\x05\x12\x14\n\x0clost_job_ids\x18\x02 \x03(\t\"\xb3\x01\n\x13LeaseStreamResponse\x12*\n\x03job\x18\x01 \x01(\x0b\x32\x1b.faultline.worker.LeasedJobH\x00\x12\x35\n\tcompleted\x18\x02 \x01(\x0b\x32 .faultline.worker.LeaseCompletedH\x00\x12\x32\n\x07renewed\x18\x03 \x01(\x0b\x32\x1f.faultline.worker.LeasesRenewedH\x00\x42\x05\n\x03msg2\x80\x05\n\x0f\x46\x61ultlineWorker\x12T\n\tSubmitJob\x12\".faultline.worker.SubmitJobRequest\x1a#.faultline.worker.SubmitJobResponse\x12]\n\x0c\x43laimNextJob\x12%.faultline.worker.ClaimNextJobRequest\x1a&.faultline.worker.ClaimNextJobResponse\x12Z\n\x0b\x43ompleteJob\x12$.faultline.worker.CompleteJobRequest\x1a%.faultline.worker.CompleteJobResponse\x12Z\n\x0c\x43ompleteJobs\x12%.faultline.worker.CompleteJobsRequest\x1a#.faultline.worker.JobWritesResponse\x12R\n\x08\x46\x61ilJobs\x12!.faultline.worker.FailJobsRequest\x1a#.faultline.worker.JobWritesResponse\x12K\n\x06GetJob\x12\x1f.faultline.worker.GetJobRequest\x1a .faultline.worker.GetJobResponse\x12_\n\x0cStreamLeases\x12$.faultline.worker.LeaseStreamRequest\x1a%.faultline.worker.LeaseStreamResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,21 +32,51 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'worker_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_SUBMITJOBREQUEST']._serialized_start=34
-  _globals['_SUBMITJOBREQUEST']._serialized_end=90
-  _globals['_SUBMITJOBRESPONSE']._serialized_start=92
-  _globals['_SUBMITJOBRESPONSE']._serialized_end=142
-  _globals['_CLAIMNEXTJOBREQUEST']._serialized_start=144
-  _globals['_CLAIMNEXTJOBREQUEST']._serialized_end=229
-  _globals['_CLAIMNEXTJOBRESPONSE']._serialized_start=231
-  _globals['_CLAIMNEXTJOBRESPONSE']._serialized_end=347
-  _globals['_COMPLETEJOBREQUEST']._serialized_start=349
-  _globals['_COMPLETEJOBREQUEST']._serialized_end=427
-  _globals['_COMPLETEJOBRESPONSE']._serialized_start=429
-  _globals['_COMPLETEJOBRESPONSE']._serialized_end=477
-  _globals['_GETJOBREQUEST']._serialized_start=479
-  _globals['_GETJOBREQUEST']._serialized_end=510
-  _globals['_GETJOBRESPONSE']._serialized_start=512
-  _globals['_GETJOBRESPONSE']._serialized_end=603
-  _globals['_FAULTLINEWORKER']._serialized_start=606
-  _globals['_FAULTLINEWORKER']._serialized_end=973
+  _globals['_SUBMITJOBREQUEST']._serialized_end=115
+  _globals['_SUBMITJOBRESPONSE']._serialized_start=117
+  _globals['_SUBMITJOBRESPONSE']._serialized_end=167
+  _globals['_CLAIMNEXTJOBREQUEST']._serialized_start=169
+  _globals['_CLAIMNEXTJOBREQUEST']._serialized_end=254
+  _globals['_CLAIMNEXTJOBRESPONSE']._serialized_start=256
+  _globals['_CLAIMNEXTJOBRESPONSE']._serialized_end=372
+  _globals['_COMPLETEJOBREQUEST']._serialized_start=374
+  _globals['_COMPLETEJOBREQUEST']._serialized_end=452
+  _globals['_COMPLETEJOBRESPONSE']._serialized_start=454
+  _globals['_COMPLETEJOBRESPONSE']._serialized_end=502
+  _globals['_COMPLETEITEM']._serialized_start=504
+  _globals['_COMPLETEITEM']._serialized_end=578
+  _globals['_COMPLETEJOBSREQUEST']._serialized_start=580
+  _globals['_COMPLETEJOBSREQUEST']._serialized_end=667
+  _globals['_FAILITEM']._serialized_start=669
+  _globals['_FAILITEM']._serialized_end=733
+  _globals['_FAILJOBSREQUEST']._serialized_start=735
+  _globals['_FAILJOBSREQUEST']._serialized_end=814
+  _globals['_JOBWRITERESULT']._serialized_start=816
+  _globals['_JOBWRITERESULT']._serialized_end=928
+  _globals['_JOBWRITESRESPONSE']._serialized_start=930
+  _globals['_JOBWRITESRESPONSE']._serialized_end=1000
+  _globals['_GETJOBREQUEST']._serialized_start=1002
+  _globals['_GETJOBREQUEST']._serialized_end=1033
+  _globals['_GETJOBRESPONSE']._serialized_start=1035
+  _globals['_GETJOBRESPONSE']._serialized_end=1126
+  _globals['_LEASESTREAMHELLO']._serialized_start=1128
+  _globals['_LEASESTREAMHELLO']._serialized_end=1204
+  _globals['_LEASECREDIT']._serialized_start=1206
+  _globals['_LEASECREDIT']._serialized_end=1233
+  _globals['_LEASECOMPLETE']._serialized_start=1235
+  _globals['_LEASECOMPLETE']._serialized_end=1310
+  _globals['_LEASEHEARTBEAT']._serialized_start=1312
+  _globals['_LEASEHEARTBEAT']._serialized_end=1328
+  _globals['_LEASESTREAMREQUEST']._serialized_start=1331
+  _globals['_LEASESTREAMREQUEST']._serialized_end=1568
+  _globals['_LEASEDJOB']._serialized_start=1570
+  _globals['_LEASEDJOB']._serialized_end=1637
+  _globals['_LEASECOMPLETED']._serialized_start=1639
+  _globals['_LEASECOMPLETED']._serialized_end=1698
+  _globals['_LEASESRENEWED']._serialized_start=1700
+  _globals['_LEASESRENEWED']._serialized_end=1754
+  _globals['_LEASESTREAMRESPONSE']._serialized_start=1757
+  _globals['_LEASESTREAMRESPONSE']._serialized_end=1936
+  _globals['_FAULTLINEWORKER']._serialized_start=1939
+  _globals['_FAULTLINEWORKER']._serialized_end=2579
 # @@protoc_insertion_point(module_scope)
@@ -5,7 +5,7 @@ import warnings
 
 import worker_pb2 as worker__pb2
 
-GRPC_GENERATED_VERSION = '1.80.0'
+GRPC_GENERATED_VERSION = '1.84.0'
 GRPC_VERSION = grpc.__version__
 _version_not_supported = False
 
@@ -25,7 +25,7 @@ if _version_not_supported:
     )
 
 
-class FaultlineWorkerStub(object):
+class FaultlineWorkerStub:
     """Missing associated documentation comment in .proto file."""
 
     def __init__(self, channel):
@@ -49,14 +49,29 @@ class FaultlineWorkerStub(object):
                 request_serializer=worker__pb2.CompleteJobRequest.SerializeToString,
                 response_deserializer=worker__pb2.CompleteJobResponse.FromString,
                 _registered_method=True)
+        self.CompleteJobs = channel.unary_unary(
+                '/faultline.worker.FaultlineWorker/CompleteJobs',
+                request_serializer=worker__pb2.CompleteJobsRequest.SerializeToString,
+                response_deserializer=worker__pb2.JobWritesResponse.FromString,
+                _registered_method=True)
+        self.FailJobs = channel.unary_unary(
+                '/faultline.worker.FaultlineWorker/FailJobs',
+                request_serializer=worker__pb2.FailJobsRequest.SerializeToString,
+                response_deserializer=worker__pb2.JobWritesResponse.FromString,
+                _registered_method=True)
         self.GetJob = channel.unary_unary(
                 '/faultline.worker.FaultlineWorker/GetJob',
                 request_serializer=worker__pb2.GetJobRequest.SerializeToString,
                 response_deserializer=worker__pb2.GetJobResponse.FromString,
                 _registered_method=True)
+        self.StreamLeases = channel.stream_stream(
+                '/faultline.worker.FaultlineWorker/StreamLeases',
+                request_serializer=worker__pb2.LeaseStreamRequest.SerializeToString,
+                response_deserializer=worker__pb2.LeaseStreamResponse.FromString,
+                _registered_method=True)
 
 
-class FaultlineWorkerServicer(object):
+class FaultlineWorkerServicer:
     """Missing associated documentation comment in .proto file."""
 
     def SubmitJob(self, request, context):
@@ -77,12 +92,30 @@ class FaultlineWorkerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CompleteJobs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FailJobs(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetJob(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamLeases(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_FaultlineWorkerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -101,11 +134,26 @@ def add_FaultlineWorkerServicer_to_server(servicer, server):
                     request_deserializer=worker__pb2.CompleteJobRequest.FromString,
                     response_serializer=worker__pb2.CompleteJobResponse.SerializeToString,
             ),
+            'CompleteJobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.CompleteJobs,
+                    request_deserializer=worker__pb2.CompleteJobsRequest.FromString,
+                    response_serializer=worker__pb2.JobWritesResponse.SerializeToString,
+            ),
+            'FailJobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.FailJobs,
+                    request_deserializer=worker__pb2.FailJobsRequest.FromString,
+                    response_serializer=worker__pb2.JobWritesResponse.SerializeToString,
+            ),
             'GetJob': grpc.unary_unary_rpc_method_handler(
                     servicer.GetJob,
                     request_deserializer=worker__pb2.GetJobRequest.FromString,
                     response_serializer=worker__pb2.GetJobResponse.SerializeToString,
             ),
+            'StreamLeases': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamLeases,
+                    request_deserializer=worker__pb2.LeaseStreamRequest.FromString,
+                    response_serializer=worker__pb2.LeaseStreamResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'faultline.worker.FaultlineWorker', rpc_method_handlers)
@@ -114,7 +162,7 @@ def add_FaultlineWorkerServicer_to_server(servicer, server):
 
 
  # This class is part of an EXPERIMENTAL API.
-class FaultlineWorker(object):
+class FaultlineWorker:
     """Missing associated documentation comment in .proto file."""
 
     @staticmethod
@@ -198,6 +246,60 @@ class FaultlineWorker(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CompleteJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/faultline.worker.FaultlineWorker/CompleteJobs',
+            worker__pb2.CompleteJobsRequest.SerializeToString,
+            worker__pb2.JobWritesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FailJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/faultline.worker.FaultlineWorker/FailJobs',
+            worker__pb2.FailJobsRequest.SerializeToString,
+            worker__pb2.JobWritesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetJob(request,
             target,
@@ -224,3 +326,30 @@ class FaultlineWorker(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamLeases(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/faultline.worker.FaultlineWorker/StreamLeases',
+            worker__pb2.LeaseStreamRequest.SerializeToString,
+            worker__pb2.LeaseStreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
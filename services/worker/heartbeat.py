@@ -0,0 +1,184 @@
+"""
+services/worker/heartbeat.py
+─────────────────────────────
+Lease renewal heartbeats for in-flight jobs.
+
+One LeaseHeartbeat thread per worker process renews every lease the worker
+is executing in a single fencing-token-guarded UPDATE each interval, so
+LEASE_SECONDS can stay short (fast failover after a crash) while long jobs
+keep their lease for as long as the worker is alive and connected.
+
+Renewal never resurrects a lease: a row is only extended while it is still
+running under this worker, with the same fencing token, and not yet expired.
+A job whose row is not renewed has lost its lease (reaped, reclaimed, or
+expired while the DB was unreachable); its cancel event is set so the
+executing code can stop early. The fenced commit stays the correctness
+boundary — cancellation only saves wasted work. Rows are locked in id
+order, like the fenced commit, so renewals and group commits never deadlock.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from services.worker import metrics, statements
+from services.worker.autopsy import log_event
+from services.worker.transport_db import get_conn
+
+RENEW_LEASES = statements.register(
+    "faultline_renew_leases",
+    """
+    UPDATE jobs j
+    SET lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM (
+        SELECT l.id
+        FROM jobs l
+        JOIN unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS h(id, token)
+          ON h.id = l.id AND h.token = l.fencing_token
+        WHERE l.lease_owner = %(owner)s
+          AND l.state = 'running'
+          AND l.lease_expires_at >= NOW()
+        ORDER BY l.id
+        FOR UPDATE OF l
+    ) locked
+    WHERE j.id = locked.id
+    RETURNING j.id::text, j.fencing_token
+    """,
+    [("lease_seconds", "float8"), ("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("owner", "text")],
+    "heartbeat",
+    lease_table_sql="""
+    UPDATE job_leases j
+    SET lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM (
+        SELECT l.job_id
+        FROM job_leases l
+        JOIN unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS h(id, token)
+          ON h.id = l.job_id AND h.token = l.fencing_token
+        WHERE l.lease_owner = %(owner)s
+          AND l.state = 'running'
+          AND l.lease_expires_at >= NOW()
+        ORDER BY l.job_id
+        FOR UPDATE OF l
+    ) locked
+    WHERE j.job_id = locked.job_id
+    RETURNING j.job_id::text, j.fencing_token
+    """,
+)
+
+
+class LeaseHeartbeat:
+    def __init__(self, worker_id: str, lease_seconds: float, interval_seconds: float):
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        # (job_id, token) -> [cancel event, local lease deadline (monotonic)]
+        self._jobs: dict[tuple[str, int], list] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "LeaseHeartbeat":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 1)
+            self._thread = None
+
+    def track(self, job_id, token: int) -> threading.Event:
+        """
+        Start renewing (job_id, token); returns the job's cancel event.
+
+        Tracking an already tracked lease returns its existing event, so a
+        lease tracked at claim time keeps its renewal deadline and any loss
+        already recorded when its job starts.
+        """
+        key = (str(job_id), int(token))
+        with self._lock:
+            entry = self._jobs.get(key)
+            if entry is None:
+                entry = self._jobs[key] = [self._new_cancel_event(), time.monotonic() + self.lease_seconds]
+            return entry[0]
+
+    def untrack(self, job_id, token: int) -> None:
+        with self._lock:
+            self._jobs.pop((str(job_id), int(token)), None)
+
+    def renew(self) -> int:
+        """Renew every tracked lease in one round trip; returns how many were renewed."""
+        keys = self._snapshot()
+        if not keys:
+            return 0
+
+        started = time.monotonic()
+        try:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    statements.execute(cur, RENEW_LEASES, self._params(keys))
+                    renewed = {(row[0], int(row[1])) for row in cur.fetchall()}
+        except Exception as exc:
+            self._renewal_failed(keys, exc)
+            return 0
+        return self._renewed(keys, renewed, started)
+
+    def _new_cancel_event(self):
+        return threading.Event()
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._jobs)
+
+    def _params(self, keys) -> dict:
+        return {
+            "lease_seconds": self.lease_seconds,
+            "job_ids": [job_id for job_id, _ in keys],
+            "tokens": [token for _, token in keys],
+            "owner": self.worker_id,
+        }
+
+    def _renewed(self, keys, renewed, started: float) -> int:
+        deadline = started + self.lease_seconds
+        lost = []
+        with self._lock:
+            for key in keys:
+                entry = self._jobs.get(key)
+                if entry is None:
+                    continue  # finished while the renewal was in flight
+                if key in renewed:
+                    entry[1] = deadline
+                else:
+                    lost.append((key, entry[0]))
+        metrics.lease_renewals_total.inc(len(renewed))
+        for (job_id, token), cancel in lost:
+            self._lose(job_id, token, cancel, "not_renewed")
+        return len(renewed)
+
+    def _renewal_failed(self, keys, exc: Exception) -> None:
+        metrics.lease_renewal_failures_total.inc()
+        log_event("lease_renewal_failed", error=str(exc)[:200], jobs=len(keys))
+        self._expire_overdue()
+
+    def _expire_overdue(self) -> None:
+        # Renewal could not reach the DB: once the last confirmed lease has
+        # run out locally, another worker may already own the job.
+        now = time.monotonic()
+        with self._lock:
+            overdue = [(key, entry[0]) for key, entry in self._jobs.items() if entry[1] <= now]
+        for (job_id, token), cancel in overdue:
+            self._lose(job_id, token, cancel, "renewal_unreachable")
+
+    def _lose(self, job_id, token, cancel, reason: str) -> None:
+        if cancel.is_set():
+            return
+        cancel.set()
+        metrics.leases_lost_total.inc()
+        log_event("lease_lost", job_id=job_id, token=token, worker_id=self.worker_id, reason=reason)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.renew()
@@ -52,3 +52,139 @@ worker_degraded_mode = Gauge(
     "faultline_worker_degraded_mode",
     "Whether worker is in degraded mode",
 )
+
+
+db_pool_open_connections = Gauge(
+    "faultline_db_pool_open_connections",
+    "Open connections held by the DB pool",
+)
+
+db_pool_idle_connections = Gauge(
+    "faultline_db_pool_idle_connections",
+    "Idle connections in the DB pool",
+)
+
+db_pool_checkout_wait_seconds = Histogram(
+    "faultline_db_pool_checkout_wait_seconds",
+    "Time spent waiting to borrow a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+
+db_pool_timeouts_total = Counter(
+    "faultline_db_pool_timeouts_total",
+    "Pool checkouts that timed out",
+)
+
+db_pool_discarded_total = Counter(
+    "faultline_db_pool_discarded_total",
+    "Pooled connections discarded after a transport error",
+)
+
+db_pool_retired_total = Counter(
+    "faultline_db_pool_retired_total",
+    "Pooled connections retired after reaching max lifetime",
+)
+
+db_pool_health_check_failures_total = Counter(
+    "faultline_db_pool_health_check_failures_total",
+    "Idle pooled connections that failed their health check",
+)
+
+lease_renewals_total = Counter(
+    "faultline_lease_renewals_total",
+    "Leases extended by the worker heartbeat",
+)
+
+lease_renewal_failures_total = Counter(
+    "faultline_lease_renewal_failures_total",
+    "Heartbeat renewal rounds that failed to reach the DB",
+)
+
+leases_lost_total = Counter(
+    "faultline_leases_lost_total",
+    "In-flight jobs cancelled because their lease could not be renewed",
+)
+
+group_commit_size = Histogram(
+    "faultline_group_commit_size",
+    "Completed jobs committed per group-commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+group_commit_failures_total = Counter(
+    "faultline_group_commit_failures_total",
+    "Group-commit transactions that failed and fell back to per-job commits",
+)
+
+autopsy_events_dropped_total = Counter(
+    "faultline_autopsy_events_dropped_total",
+    "Autopsy/trace events dropped because the sink buffer was full",
+    ["sink"],
+)
+
+reconciler_jobs_total = Counter(
+    "faultline_reconciler_jobs_total",
+    "Jobs repaired by the reconciler (converge: ledger committed, reclaim: lease expired)",
+    ["kind"],
+)
+
+reconciler_batch_seconds = Histogram(
+    "faultline_reconciler_batch_seconds",
+    "Duration of one reconciler batch transaction",
+    ["kind"],
+)
+
+reaped_jobs_total = Counter(
+    "faultline_reaped_jobs_total",
+    "Expired leases reset to queued by the reaper",
+)
+
+reap_lag_seconds = Gauge(
+    "faultline_reap_lag_seconds",
+    "Age of the oldest expired lease still marked running",
+)
+
+reap_batch_size = Gauge(
+    "faultline_reap_batch_size",
+    "Current adaptive reaper batch size",
+)
+
+reconciler_passes_total = Counter(
+    "faultline_reconciler_passes_total",
+    "Completed reconciler passes (full sweep or incremental from the watermark)",
+    ["mode"],
+)
+
+archived_rows_total = Counter(
+    "faultline_archived_rows_total",
+    "Rows moved to the history tables by the archiver",
+    ["table"],
+)
+
+archive_batch_seconds = Histogram(
+    "faultline_archive_batch_seconds",
+    "Duration of one archiver batch transaction",
+)
+
+archive_partitions_dropped_total = Counter(
+    "faultline_archive_partitions_dropped_total",
+    "History partitions dropped by the archiver retention step",
+)
+
+grpc_lease_streams = Gauge(
+    "faultline_grpc_lease_streams",
+    "Open StreamLeases calls on this gRPC server",
+)
+
+grpc_stream_claim_batch = Histogram(
+    "faultline_grpc_stream_claim_batch",
+    "Jobs leased per pooled claim statement across all lease streams",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+grpc_rpc_seconds = Histogram(
+    "faultline_grpc_rpc_seconds",
+    "gRPC handler latency by method and status code (StreamLeases: stream lifetime)",
+    ["method", "code"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10, 60),
+)
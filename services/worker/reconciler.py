@@ -1,51 +1,317 @@
-from services.common.tracing import init_tracing, get_tracer, start_span
+"""
+services/worker/reconciler.py
+──────────────────────────────
+Background convergence sweep, run after node loss or on a schedule.
+
+One pass drains two kinds of drift in bounded, set-based batches. Each batch
+is a single SKIP LOCKED statement in its own short transaction, so the sweep
+never waits on (or blocks) rows a live worker is committing, and thousands of
+orphans cost tens of statements rather than one round trip each:
+
+    1. CONVERGE  jobs with a committed ledger entry whose state is not
+                 'succeeded' (the crash window described in worker/reaper.py)
+                 are marked succeeded without re-execution.
+    2. RECLAIM   running jobs whose lease expired are returned to 'queued'.
+                 Jobs that already have a ledger entry are left to step 1,
+                 so an applied effect is never re-queued and applied again.
+
+Batches repeat until one comes back short (drained, or the remainder is
+locked by someone else). Every batch emits one reconciler.batch span and
+updates the faultline_reconciler_* metrics.
+
+Step 1 is incremental. Terminal rows pile up into the millions and never
+change again, so a pass only re-examines jobs whose updated_at, or whose
+ledger entry's created_at, is at or after the durable watermark in
+reconcile_watermarks. After a successful pass the watermark moves to the
+pass's start time minus RECONCILE_WATERMARK_OVERLAP_SECONDS. The overlap
+covers transactions that stamped updated_at before the pass began but
+committed after it. ledger_entries.created_at is a TIMESTAMP holding UTC,
+so the watermark is converted to UTC before it is compared, never the
+column under the session TimeZone. A full sweep still runs every
+RECONCILE_FULL_SWEEP_SECONDS as a backstop. Step 2 is already bounded by
+the (state, lease_expires_at) index.
+
+    RECONCILE_BATCH_SIZE                  rows per batch (default 500)
+    RECONCILE_WATERMARK_OVERLAP_SECONDS   re-examined overlap (default 60)
+    RECONCILE_FULL_SWEEP_SECONDS          full-sweep cadence (default 3600)
+"""
+
 import os
-import psycopg2
+import time
+from datetime import timedelta
+
+from services.common.tracing import init_tracing, get_tracer, start_span
+from services.common.queue_notify import notify_queue
+from services.worker import metrics, statements
+from services.worker.transport_db import get_conn
 
 DATABASE_URL = os.environ["DATABASE_URL"]
+RECONCILE_BATCH_SIZE = int(os.environ.get("RECONCILE_BATCH_SIZE", "500"))
+RECONCILE_WATERMARK_OVERLAP_SECONDS = float(os.environ.get("RECONCILE_WATERMARK_OVERLAP_SECONDS", "60"))
+RECONCILE_FULL_SWEEP_SECONDS = float(os.environ.get("RECONCILE_FULL_SWEEP_SECONDS", "3600"))
+WATERMARK_NAME = "reconciler"
 
 init_tracing("faultline-reconciler")
 tracer = get_tracer("faultline.reconciler")
 
+CONVERGE_COMMITTED = statements.register(
+    "faultline_reconcile_converge",
+    """
+    WITH candidates AS (
+        SELECT j.id
+        FROM jobs j
+        WHERE j.state <> 'succeeded'
+          AND EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.id)
+        ORDER BY j.id
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE jobs j
+    SET state = 'succeeded',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        next_run_at = NULL,
+        updated_at = NOW()
+    FROM candidates c
+    WHERE j.id = c.id
+    RETURNING j.id::text
+    """,
+    [("batch_size", "int")],
+    "claim",
+    lease_table_sql="""
+    WITH candidates AS (
+        SELECT j.job_id AS id
+        FROM job_leases j
+        WHERE j.state <> 'succeeded'
+          AND EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.job_id)
+        ORDER BY j.job_id
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE job_leases j
+    SET state = 'succeeded',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        next_run_at = NULL,
+        updated_at = NOW()
+    FROM candidates c
+    WHERE j.job_id = c.id
+    RETURNING j.job_id::text
+    """,
+)
+
+CONVERGE_CHANGED = statements.register(
+    "faultline_reconcile_converge_changed",
+    """
+    WITH changed AS (
+        SELECT id FROM jobs WHERE updated_at >= %(since)s
+        UNION
+        SELECT job_id FROM ledger_entries WHERE created_at >= (%(since)s AT TIME ZONE 'UTC')
+    ),
+    candidates AS (
+        SELECT j.id
+        FROM jobs j
+        JOIN changed c ON c.id = j.id
+        WHERE j.state <> 'succeeded'
+          AND EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.id)
+        ORDER BY j.id
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE jobs j
+    SET state = 'succeeded',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        next_run_at = NULL,
+        updated_at = NOW()
+    FROM candidates c
+    WHERE j.id = c.id
+    RETURNING j.id::text
+    """,
+    [("since", "timestamptz"), ("batch_size", "int")],
+    "claim",
+    lease_table_sql="""
+    WITH changed AS (
+        SELECT job_id AS id FROM job_leases WHERE updated_at >= %(since)s
+        UNION
+        SELECT job_id FROM ledger_entries WHERE created_at >= (%(since)s AT TIME ZONE 'UTC')
+    ),
+    candidates AS (
+        SELECT j.job_id AS id
+        FROM job_leases j
+        JOIN changed c ON c.id = j.job_id
+        WHERE j.state <> 'succeeded'
+          AND EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.job_id)
+        ORDER BY j.job_id
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE job_leases j
+    SET state = 'succeeded',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        next_run_at = NULL,
+        updated_at = NOW()
+    FROM candidates c
+    WHERE j.job_id = c.id
+    RETURNING j.job_id::text
+    """,
+)
+
+RECLAIM_EXPIRED = statements.register(
+    "faultline_reconcile_reclaim",
+    """
+    WITH expired AS (
+        SELECT j.id, j.lease_expires_at
+        FROM jobs j
+        WHERE j.state = 'running'
+          AND j.lease_expires_at IS NOT NULL
+          AND j.lease_expires_at < NOW()
+          AND NOT EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.id)
+        ORDER BY j.lease_expires_at
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE jobs j
+    SET state = 'queued',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        updated_at = NOW()
+    FROM expired e
+    WHERE j.id = e.id
+    RETURNING j.id::text, EXTRACT(EPOCH FROM (NOW() - e.lease_expires_at))::float8
+    """,
+    [("batch_size", "int")],
+    "claim",
+    lease_table_sql="""
+    WITH expired AS (
+        SELECT j.job_id, j.lease_expires_at
+        FROM job_leases j
+        WHERE j.state = 'running'
+          AND j.lease_expires_at IS NOT NULL
+          AND j.lease_expires_at < NOW()
+          AND NOT EXISTS (SELECT 1 FROM ledger_entries l WHERE l.job_id = j.job_id)
+        ORDER BY j.lease_expires_at
+        LIMIT %(batch_size)s
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE job_leases j
+    SET state = 'queued',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        updated_at = NOW()
+    FROM expired e
+    WHERE j.job_id = e.job_id
+    RETURNING j.job_id::text, EXTRACT(EPOCH FROM (NOW() - e.lease_expires_at))::float8
+    """,
+)
+
+
+def reconcile_once(cur, batch_size: int = RECONCILE_BATCH_SIZE, since=None) -> list:
+    """
+    Converge one batch of committed-but-not-succeeded jobs; returns their ids.
+
+    With since, only jobs updated (or given a ledger entry) at or after it
+    are considered; without it the whole table is.
+    """
+    if since is None:
+        statements.execute(cur, CONVERGE_COMMITTED, {"batch_size": batch_size})
+    else:
+        statements.execute(cur, CONVERGE_CHANGED, {"since": since, "batch_size": batch_size})
+    return [row[0] for row in cur.fetchall()]
+
 
-def _otel_recover_span(job_id, orphan_age_seconds):
-    with start_span(
-        tracer,
-        "reconciler.recover",
-        job_id=str(job_id),
-        orphan_age=float(orphan_age_seconds),
-    ):
-        pass
+def reclaim_expired_batch(cur, batch_size: int = RECONCILE_BATCH_SIZE) -> list:
+    """Requeue one batch of expired leases; returns (job_id, orphan_age_seconds) pairs."""
+    statements.execute(cur, RECLAIM_EXPIRED, {"batch_size": batch_size})
+    rows = cur.fetchall()
+    if rows:
+        notify_queue(cur)
+    return rows
 
 
-def reclaim_expired_jobs():
-    with psycopg2.connect(DATABASE_URL) as conn:
+def _drain(kind: str, run_batch, batch_size: int) -> int:
+    total = 0
+    while True:
+        started = time.monotonic()
+        with start_span(tracer, "reconciler.batch", kind=kind, batch_size=batch_size) as span:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    rows = run_batch(cur, batch_size)
+                conn.commit()
+            span.set_attribute("jobs", len(rows))
+            if kind == "reclaim" and rows:
+                span.set_attribute("max_orphan_age", float(max(age for _, age in rows)))
+
+        metrics.reconciler_batch_seconds.labels(kind=kind).observe(time.monotonic() - started)
+        metrics.reconciler_jobs_total.labels(kind=kind).inc(len(rows))
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+def load_watermark(cur, name: str = WATERMARK_NAME):
+    """Returns (watermark, last_full_sweep_at, db_now); the first two are None before the first pass."""
+    cur.execute(
+        """
+        SELECT w.watermark, w.last_full_sweep_at, NOW()
+        FROM (SELECT 1) one
+        LEFT JOIN reconcile_watermarks w ON w.name = %s
+        """,
+        (name,),
+    )
+    return cur.fetchone()
+
+
+def store_watermark(cur, watermark, full_sweep_at=None, name: str = WATERMARK_NAME) -> None:
+    # Never moves backwards when two reconcilers finish out of order.
+    cur.execute(
+        """
+        INSERT INTO reconcile_watermarks (name, watermark, last_full_sweep_at)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (name) DO UPDATE
+        SET watermark = GREATEST(reconcile_watermarks.watermark, EXCLUDED.watermark),
+            last_full_sweep_at = COALESCE(EXCLUDED.last_full_sweep_at, reconcile_watermarks.last_full_sweep_at),
+            updated_at = NOW()
+        """,
+        (name, watermark, full_sweep_at),
+    )
+
+
+def reclaim_expired_jobs(batch_size: int = RECONCILE_BATCH_SIZE, full: bool | None = None) -> dict:
+    """
+    One pass: converge committed jobs, then reclaim expired leases.
+
+    full=None runs a full sweep only when none has run within
+    RECONCILE_FULL_SWEEP_SECONDS (or there is no watermark yet).
+    """
+    with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, EXTRACT(EPOCH FROM (NOW() - lease_expires_at)) AS orphan_age_seconds
-                FROM jobs
-                WHERE state='running'
-                  AND lease_expires_at IS NOT NULL
-                  AND lease_expires_at < NOW()
-                """
+            watermark, last_full, started_at = load_watermark(cur)
+        conn.commit()
+
+    if full is None:
+        full = (
+            watermark is None
+            or last_full is None
+            or (started_at - last_full).total_seconds() >= RECONCILE_FULL_SWEEP_SECONDS
+        )
+    since = None if full else watermark
+
+    converged = _drain("converge", lambda cur, n: reconcile_once(cur, n, since), batch_size)
+    reclaimed = _drain("reclaim", reclaim_expired_batch, batch_size)
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            store_watermark(
+                cur,
+                started_at - timedelta(seconds=RECONCILE_WATERMARK_OVERLAP_SECONDS),
+                started_at if full else None,
             )
-            rows = cur.fetchall()
-
-            for job_id, orphan_age_seconds in rows:
-                _otel_recover_span(job_id, orphan_age_seconds)
-                cur.execute(
-                    """
-                    UPDATE jobs
-                    SET state='queued',
-                        lease_owner = NULL,
-                        lease_expires_at = NULL,
-                        updated_at = NOW()
-                    WHERE id=%s
-                    """,
-                    (job_id,),
-                )
         conn.commit()
+    metrics.reconciler_passes_total.labels(mode="full" if full else "incremental").inc()
+
+    return {"converged": converged, "reclaimed": reclaimed, "full_sweep": full}
 
 
 if __name__ == "__main__":
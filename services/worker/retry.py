@@ -1,6 +1,8 @@
 from services.common.tracing import init_tracing, get_tracer, start_span
 from datetime import datetime, timezone, timedelta
 
+from services.common.queue_notify import notify_queue
+
 init_tracing("faultline-retry")
 tracer = get_tracer("faultline.retry")
 
@@ -45,4 +47,5 @@ def mark_for_retry(cur, job_id, token, attempts, max_attempts, last_error):
         """,
         (datetime.now(timezone.utc) + timedelta(seconds=delay), last_error, job_id, token),
     )
+    notify_queue(cur)
     return "retried"
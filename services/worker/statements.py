@@ -0,0 +1,107 @@
+"""
+services/worker/statements.py
+──────────────────────────────
+Registry of hot-path SQL, executed as server-side prepared statements.
+
+Each Statement is registered once at import time with its parameter types
+and its transport operation class (claim / heartbeat / commit / query).
+From that it derives:
+
+    prepare_sql   PREPARE <name> (<types>) AS <sql with $1..$n>
+    execute_sql   EXECUTE <name> (%(p1)s::<type1>, ...)
+    numbered_sql  the statement with $n placeholders, for asyncpg
+
+transport_db.CursorProxy.execute_statement() prepares a statement the first
+time a pooled connection runs it and executes it by name afterwards, so
+Postgres parses and plans it once per connection instead of once per call,
+and the proxy uses the precomputed operation class instead of re-parsing
+the SQL text. PREPARE is not transactional: a rollback after the first use
+does not drop the statement.
+
+FAULTLINE_PREPARED_STATEMENTS=0 sends the plain SQL text instead (e.g. behind
+a transaction-pooling PgBouncer, where session state does not survive).
+
+FAULTLINE_SCHEMA_LAYOUT picks the SQL for the schema the database has:
+"wide" (default; lease columns on jobs) or "lease_table" (lease columns in
+job_leases, see migrations/layouts/lease_table.sql). A statement that
+touches lease columns registers both texts; layout_sql() does the same for
+ad-hoc SQL. Both variants are checked against the parameter list at import,
+whichever layout is active.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+
+PREPARED_STATEMENTS_ENABLED = os.getenv("FAULTLINE_PREPARED_STATEMENTS", "1") != "0"
+SCHEMA_LAYOUT = os.getenv("FAULTLINE_SCHEMA_LAYOUT", "wide")
+SCHEMA_LAYOUTS = ("wide", "lease_table")
+if SCHEMA_LAYOUT not in SCHEMA_LAYOUTS:
+    raise ValueError(f"FAULTLINE_SCHEMA_LAYOUT must be one of {SCHEMA_LAYOUTS}, not {SCHEMA_LAYOUT!r}")
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+_REGISTRY: dict[str, "Statement"] = {}
+
+
+@dataclass(frozen=True)
+class Statement:
+    name: str
+    sql: str
+    params: tuple[tuple[str, str], ...]
+    operation: str
+    numbered_sql: str = field(init=False, repr=False)
+    prepare_sql: str = field(init=False, repr=False)
+    execute_sql: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        names = [name for name, _ in self.params]
+        used = set(_PLACEHOLDER.findall(self.sql))
+        if used != set(names):
+            raise ValueError(f"{self.name}: placeholders {sorted(used)} do not match params {names}")
+        numbered = _PLACEHOLDER.sub(lambda m: f"${names.index(m.group(1)) + 1}", self.sql)
+        types = ", ".join(pg_type for _, pg_type in self.params)
+        args = ", ".join(f"%({name})s::{pg_type}" for name, pg_type in self.params)
+        object.__setattr__(self, "numbered_sql", numbered)
+        if self.params:
+            object.__setattr__(self, "prepare_sql", f"PREPARE {self.name} ({types}) AS {numbered}")
+            object.__setattr__(self, "execute_sql", f"EXECUTE {self.name} ({args})")
+        else:
+            object.__setattr__(self, "prepare_sql", f"PREPARE {self.name} AS {numbered}")
+            object.__setattr__(self, "execute_sql", f"EXECUTE {self.name}")
+
+    def args(self, params: dict) -> list:
+        """Positional arguments for numbered_sql."""
+        return [params[name] for name, _ in self.params]
+
+
+def layout_sql(wide: str, lease_table: str) -> str:
+    """The variant of an ad-hoc statement for the configured schema layout."""
+    return lease_table if SCHEMA_LAYOUT == "lease_table" else wide
+
+
+def register(name: str, sql: str, params, operation: str, lease_table_sql: str | None = None) -> Statement:
+    params = tuple(params)
+    stmt = Statement(name=name, sql=sql, params=params, operation=operation)
+    if lease_table_sql is not None:
+        lease_stmt = Statement(name=name, sql=lease_table_sql, params=params, operation=operation)
+        if SCHEMA_LAYOUT == "lease_table":
+            stmt = lease_stmt
+    existing = _REGISTRY.get(name)
+    if existing is not None and existing != stmt:
+        raise ValueError(f"statement {name!r} already registered with different SQL")
+    _REGISTRY[name] = stmt
+    return stmt
+
+
+def registered() -> dict[str, Statement]:
+    return dict(_REGISTRY)
+
+
+def execute(cur, stmt: Statement, params: dict):
+    """Run stmt on cur: by name on transport_db cursors, as plain SQL on any other cursor."""
+    run = getattr(cur, "execute_statement", None)
+    if run is None:
+        return cur.execute(stmt.sql, params)
+    return run(stmt, params)
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import functools
 import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Any
 
+from psycopg2 import InterfaceError, OperationalError
+
 from services.worker import metrics
 from services.worker.network_fault_proxy import (
     DNSFailure,
@@ -12,6 +20,15 @@ from services.worker.network_fault_proxy import (
     QueryTimeout,
 )
 from services.worker.remediation import RemediationState
+from services.worker.statements import PREPARED_STATEMENTS_ENABLED, Statement
+
+DB_POOL_ENABLED = os.getenv("FAULTLINE_DB_POOL", "1") != "0"
+DB_POOL_MAX_SIZE = int(os.getenv("FAULTLINE_DB_POOL_MAX_SIZE", "4"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("FAULTLINE_DB_POOL_TIMEOUT_SECONDS", "10"))
+DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv("FAULTLINE_DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
+DB_POOL_HEALTH_CHECK_IDLE_SECONDS = float(os.getenv("FAULTLINE_DB_POOL_HEALTH_CHECK_IDLE_SECONDS", "30"))
+DB_RECONNECT_BASE_SECONDS = float(os.getenv("FAULTLINE_DB_RECONNECT_BASE_SECONDS", "0.1"))
+DB_RECONNECT_MAX_SECONDS = float(os.getenv("FAULTLINE_DB_RECONNECT_MAX_SECONDS", "5"))
 
 _PROXY = NetworkFaultProxy(
     profile=os.getenv("FAULTLINE_NETWORK_PROFILE"),
@@ -72,6 +89,7 @@ def _apply_escalation() -> None:
         _REMEDIATION.quarantine(4)
 
 
+@functools.lru_cache(maxsize=512)
 def _classify_sql(statement: str) -> str:
     s = " ".join(statement.lower().split())
 
@@ -112,16 +130,15 @@ def _inject_before_operation(operation: str) -> None:
 
 
 class CursorProxy:
-    def __init__(self, inner: Any):
+    def __init__(self, inner: Any, prepared: set[str] | None = None):
         self._inner = inner
+        # Names of statements already prepared on the owning connection.
+        self._prepared = prepared
 
-    def execute(self, statement: Any, *args: Any, **kwargs: Any):
-        sql = statement.decode() if isinstance(statement, bytes) else str(statement)
-        op = _classify_sql(sql)
-
+    def _run(self, op: str, fn, *args: Any, **kwargs: Any):
         try:
             _inject_before_operation(op)
-            result = self._inner.execute(statement, *args, **kwargs)
+            result = fn(*args, **kwargs)
             _record_success()
             _refresh_state_gauges()
             return result
@@ -146,40 +163,28 @@ class CursorProxy:
             _refresh_state_gauges()
             raise
 
-    def executemany(self, statement: Any, *args: Any, **kwargs: Any):
+    def execute(self, statement: Any, *args: Any, **kwargs: Any):
         sql = statement.decode() if isinstance(statement, bytes) else str(statement)
-        op = _classify_sql(sql)
+        return self._run(_classify_sql(sql), self._inner.execute, statement, *args, **kwargs)
 
-        try:
-            _inject_before_operation(op)
-            result = self._inner.executemany(statement, *args, **kwargs)
-            _record_success()
-            _refresh_state_gauges()
-            return result
-        except DNSFailure:
-            _record_dns_failure()
-            _apply_escalation()
-            _refresh_state_gauges()
-            raise
-        except HandshakeFailure:
-            _record_handshake_failure()
-            _apply_escalation()
-            _refresh_state_gauges()
-            raise
-        except QueryTimeout:
-            _record_query_timeout()
-            _apply_escalation()
-            _refresh_state_gauges()
-            raise
-        except PartialPartition:
-            _record_partial_partition()
-            _apply_escalation()
-            _refresh_state_gauges()
-            raise
+    def executemany(self, statement: Any, *args: Any, **kwargs: Any):
+        sql = statement.decode() if isinstance(statement, bytes) else str(statement)
+        return self._run(_classify_sql(sql), self._inner.executemany, statement, *args, **kwargs)
+
+    def execute_statement(self, stmt: Statement, params: dict):
+        """Execute a registered Statement by name, preparing it on first use."""
+        if self._prepared is None or not PREPARED_STATEMENTS_ENABLED:
+            return self._run(stmt.operation, self._inner.execute, stmt.sql, params)
+        if stmt.name not in self._prepared:
+            # Part of the first call, not an operation of its own: it does
+            # not draw a separate fault-injection decision.
+            self._inner.execute(stmt.prepare_sql)
+            self._prepared.add(stmt.name)
+        return self._run(stmt.operation, self._inner.execute, stmt.execute_sql, params)
 
     def __enter__(self):
         entered = self._inner.__enter__()
-        return CursorProxy(entered)
+        return CursorProxy(entered, self._prepared)
 
     def __exit__(self, exc_type, exc, tb):
         return self._inner.__exit__(exc_type, exc, tb)
@@ -189,15 +194,16 @@ class CursorProxy:
 
 
 class ConnectionProxy:
-    def __init__(self, inner: Any):
+    def __init__(self, inner: Any, prepared: set[str] | None = None):
         self._inner = inner
+        self._prepared = set() if prepared is None else prepared
 
     def cursor(self, *args: Any, **kwargs: Any):
-        return CursorProxy(self._inner.cursor(*args, **kwargs))
+        return CursorProxy(self._inner.cursor(*args, **kwargs), self._prepared)
 
     def __enter__(self):
         entered = self._inner.__enter__()
-        return ConnectionProxy(entered)
+        return ConnectionProxy(entered, self._prepared)
 
     def __exit__(self, exc_type, exc, tb):
         return self._inner.__exit__(exc_type, exc, tb)
@@ -240,8 +246,308 @@ def connect_db(*args: Any, **kwargs: Any):
         raise
 
 
-def get_conn():
+def _database_url() -> str:
     database_url = os.getenv("DATABASE_URL") or os.getenv("POSTGRES_DSN")
     if not database_url:
         raise RuntimeError("DATABASE_URL or POSTGRES_DSN must be set")
-    return connect_db(database_url)
\ No newline at end of file
+    return database_url
+
+
+# Errors after which a connection is not trusted back into the pool. The
+# simulated impairments count too: a real partition would have killed the
+# socket as well.
+_BROKEN_CONNECTION_ERRORS = (
+    OperationalError,
+    InterfaceError,
+    DNSFailure,
+    HandshakeFailure,
+    PartialPartition,
+    QueryTimeout,
+)
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+@dataclass
+class _PoolEntry:
+    conn: ConnectionProxy
+    created_at: float
+    expires_at: float
+    last_used: float
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of ConnectionProxy connections.
+
+    Every connection is opened through connect_db(), so fault injection,
+    remediation and transport metrics behave exactly as for one-shot
+    connections. On top of that the pool:
+
+        - health-checks connections that sat idle longer than
+          health_check_idle_seconds before handing them out
+        - retires connections after max_lifetime_seconds (jittered so a
+          fleet does not reconnect in lockstep)
+        - discards connections that raised a transport error and backs
+          off reconnects exponentially with full jitter
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout_seconds: float = DB_POOL_TIMEOUT_SECONDS,
+        max_lifetime_seconds: float = DB_POOL_MAX_LIFETIME_SECONDS,
+        health_check_idle_seconds: float = DB_POOL_HEALTH_CHECK_IDLE_SECONDS,
+        reconnect_base_seconds: float = DB_RECONNECT_BASE_SECONDS,
+        reconnect_max_seconds: float = DB_RECONNECT_MAX_SECONDS,
+    ):
+        self.dsn = dsn
+        self.max_size = max(1, max_size)
+        self.timeout_seconds = timeout_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_idle_seconds = health_check_idle_seconds
+        self.reconnect_base_seconds = reconnect_base_seconds
+        self.reconnect_max_seconds = reconnect_max_seconds
+
+        self._idle: deque[_PoolEntry] = deque()
+        self._checked_out: dict[int, _PoolEntry] = {}
+        self._opening = 0
+        self._connect_failures = 0
+        self._next_connect_at = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._rng = random.Random()
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._checked_out) + self._opening
+
+    def _refresh_gauges(self) -> None:
+        metrics.db_pool_open_connections.set(self.size)
+        metrics.db_pool_idle_connections.set(len(self._idle))
+
+    def _reconnect_delay(self) -> float:
+        if self._connect_failures == 0:
+            return 0.0
+        ceiling = min(
+            self.reconnect_max_seconds,
+            self.reconnect_base_seconds * (2 ** (self._connect_failures - 1)),
+        )
+        return self._rng.uniform(0, ceiling)
+
+    def _open(self) -> _PoolEntry:
+        wait_s = self._next_connect_at - time.monotonic()
+        if wait_s > 0:
+            time.sleep(wait_s)
+        try:
+            conn = connect_db(self.dsn)
+        except Exception:
+            with self._cond:
+                self._connect_failures += 1
+                self._next_connect_at = time.monotonic() + self._reconnect_delay()
+            raise
+        with self._cond:
+            self._connect_failures = 0
+            self._next_connect_at = 0.0
+        now = time.monotonic()
+        lifetime = self.max_lifetime_seconds * self._rng.uniform(0.9, 1.0)
+        return _PoolEntry(conn=conn, created_at=now, expires_at=now + lifetime, last_used=now)
+
+    def _close_entry(self, entry: _PoolEntry) -> None:
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, entry: _PoolEntry) -> bool:
+        now = time.monotonic()
+        if now >= entry.expires_at:
+            metrics.db_pool_retired_total.inc()
+            return False
+        if getattr(entry.conn, "closed", 0):
+            return False
+        if now - entry.last_used < self.health_check_idle_seconds:
+            return True
+        # Bypass the proxy: a health probe should not consume injected faults.
+        inner = entry.conn._inner
+        try:
+            with inner.cursor() as cur:
+                cur.execute("SELECT 1")
+            inner.rollback()
+            return True
+        except Exception:
+            metrics.db_pool_health_check_failures_total.inc()
+            return False
+
+    def getconn(self, timeout: float | None = None) -> ConnectionProxy:
+        timeout = self.timeout_seconds if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                while not self._idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        metrics.db_pool_timeouts_total.inc()
+                        raise PoolTimeout(f"no connection available within {timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                    self._checked_out[id(entry.conn)] = entry
+                else:
+                    self._opening += 1
+
+            if entry is not None:
+                if self._healthy(entry):
+                    break
+                with self._cond:
+                    self._checked_out.pop(id(entry.conn), None)
+                    self._cond.notify()
+                self._close_entry(entry)
+                continue
+
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+                    self._refresh_gauges()
+                raise
+            with self._cond:
+                self._opening -= 1
+                self._checked_out[id(entry.conn)] = entry
+            break
+
+        with self._cond:
+            self._refresh_gauges()
+        metrics.db_pool_checkout_wait_seconds.observe(time.monotonic() - started)
+        return entry.conn
+
+    def putconn(self, conn: ConnectionProxy, exc: BaseException | None = None) -> None:
+        """
+        Return a borrowed connection.
+
+        Mirrors psycopg2's connection context manager: commit when the block
+        succeeded, roll back when it raised. Connections that failed at the
+        transport level are closed instead of pooled.
+        """
+        with self._cond:
+            entry = self._checked_out.pop(id(conn), None)
+        if entry is None:
+            return
+
+        broken = isinstance(exc, _BROKEN_CONNECTION_ERRORS) or bool(getattr(conn, "closed", 0))
+        if not broken:
+            try:
+                if exc is None:
+                    conn.commit()
+                else:
+                    conn.rollback()
+                if getattr(conn, "autocommit", False):
+                    conn.autocommit = False
+            except Exception:
+                self._discard(entry)
+                if exc is None:
+                    raise
+                return
+        if broken:
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._close_entry(entry)
+            else:
+                self._idle.append(entry)
+            self._cond.notify()
+            self._refresh_gauges()
+
+    def _discard(self, entry: _PoolEntry) -> None:
+        metrics.db_pool_discarded_total.inc()
+        self._close_entry(entry)
+        with self._cond:
+            self._connect_failures = max(self._connect_failures, 1)
+            self._next_connect_at = time.monotonic() + self._reconnect_delay()
+            self._cond.notify()
+            self._refresh_gauges()
+
+    def connection(self, timeout: float | None = None) -> "_Checkout":
+        return _Checkout(self, timeout)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+            self._refresh_gauges()
+        for entry in idle:
+            self._close_entry(entry)
+
+
+class _Checkout:
+    def __init__(self, pool: ConnectionPool, timeout: float | None):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn: ConnectionProxy | None = None
+
+    def __enter__(self) -> ConnectionProxy:
+        self._conn = self._pool.getconn(self._timeout)
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn, exc)
+        return False
+
+
+_POOL: ConnectionPool | None = None
+_POOL_PID: int | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def init_pool(**overrides: Any) -> ConnectionPool:
+    """
+    Create (or return) the process-wide pool.
+
+    Keyword overrides are only applied when the pool is first created, so
+    entrypoints call this before any get_conn() to size it for their load.
+    """
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL = ConnectionPool(_database_url(), **overrides)
+            _POOL_PID = os.getpid()
+        return _POOL
+
+
+def close_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def get_conn():
+    """
+    Borrow a connection for the duration of a ``with`` block.
+
+        with get_conn() as conn:
+            ...
+
+    Commits on success and rolls back on error, like a psycopg2 connection
+    context manager, then returns the connection to the pool. Set
+    FAULTLINE_DB_POOL=0 to fall back to one connection per call.
+    """
+    if not DB_POOL_ENABLED:
+        return connect_db(_database_url())
+    return init_pool().connection()
\ No newline at end of file
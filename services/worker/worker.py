@@ -1,16 +1,21 @@
-import json
+import multiprocessing
 import os
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 import psycopg2
 from psycopg2 import OperationalError
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 from common.observability.tracing import get_tracer
-from services.worker.autopsy import log_event
+from services.common.queue_notify import QueueListener, notify_queue
+from services.worker import statements
+from services.worker.autopsy import EventSink, log_event
+from services.worker.group_commit import GroupCommitter
+from services.worker.heartbeat import LeaseHeartbeat
 from services.worker.spans import start_job_span_from_payload, start_span
-from services.worker.transport_db import get_conn
+from services.worker.transport_db import DB_POOL_MAX_SIZE, get_conn, init_pool
 
 DATABASE_URL = os.getenv("DATABASE_URL") or os.getenv("POSTGRES_DSN")
 if not DATABASE_URL:
@@ -22,11 +27,31 @@ WORK_SLEEP_SECONDS = float(os.getenv("WORK_SLEEP_SECONDS", "2"))
 MAX_LOOPS = int(os.getenv("MAX_LOOPS", "0"))
 SIMULATE_FAILURE = os.getenv("SIMULATE_FAILURE", "0") == "1"
 CLAIM_JOB_ID = os.getenv("CLAIM_JOB_ID")
+CLAIM_BATCH_SIZE = max(1, int(os.getenv("CLAIM_BATCH_SIZE", "1")))
+WORKER_CONCURRENCY = max(1, int(os.getenv("WORKER_CONCURRENCY", "1")))
+# "thread" runs handlers on the job threads (I/O-bound); "process" hands
+# execute_job() to a process pool (CPU-bound) while fencing/commit stay local.
+WORKER_EXECUTOR = os.getenv("WORKER_EXECUTOR", "thread")
+LISTEN_ENABLED = os.getenv("FAULTLINE_LISTEN", "1") != "0"
+# Upper bound on an idle wait when no NOTIFY arrives and no retry/lease is due.
+WAKEUP_POLL_SECONDS = float(os.getenv("FAULTLINE_WAKEUP_POLL_SECONDS", "5"))
+IDLE_POLL_SECONDS = 0.25
+# Renew in-flight leases every LEASE_SECONDS * FRACTION; off by default so
+# lease-expiry drills keep their timing.
+LEASE_HEARTBEAT = os.getenv("FAULTLINE_LEASE_HEARTBEAT", "0") == "1"
+LEASE_RENEW_FRACTION = float(os.getenv("FAULTLINE_LEASE_RENEW_FRACTION", "0.33"))
+# Commit completed jobs in groups; only useful with WORKER_CONCURRENCY > 1.
+GROUP_COMMIT = os.getenv("FAULTLINE_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_MAX = int(os.getenv("FAULTLINE_GROUP_COMMIT_MAX", "64"))
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("FAULTLINE_GROUP_COMMIT_WINDOW_MS", "5"))
 EXIT_ON_SUCCESS = os.getenv("EXIT_ON_SUCCESS", "0") == "1"
 EXIT_ON_STALE = os.getenv("EXIT_ON_STALE", "0") == "1"
 METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
 METRICS_PORT = int(os.getenv("FAULTLINE_METRICS_PORT", "9108"))
 OTEL_TRACE_LOG = os.getenv("FAULTLINE_OTEL_TRACE_LOG", "docs/autopsy/assets/otel_trace_chain.jsonl")
+_trace_sink = EventSink(OTEL_TRACE_LOG, sort_keys=True) if OTEL_TRACE_LOG else None
+
+STALE_ERRORS = ("stale_token", "lease_expired", "stale_commit")
 
 tracer = get_tracer("faultline.worker")
 
@@ -37,17 +62,20 @@ jobs_retried = Counter("faultline_jobs_retried_total", "Jobs retried")
 jobs_failed_perm = Counter("faultline_jobs_failed_perm_total", "Jobs permanently failed")
 stale_commits = Counter("faultline_stale_commits_blocked_total", "Stale commits blocked")
 job_duration = Histogram("faultline_job_duration_seconds", "Job execution duration")
+jobs_in_flight = Gauge("faultline_worker_jobs_in_flight", "Jobs currently executing in this worker")
+notify_wakeups = Counter("faultline_worker_notify_wakeups_total", "Idle waits ended by a queue NOTIFY")
+
+_cpu_pool = None
+_listener = None
+_heartbeat = None
+_committer = None
 
 
 
 def _append_trace_event(event: str, **fields) -> None:
-    path = OTEL_TRACE_LOG
-    if not path:
+    if _trace_sink is None:
         return
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    payload = {"ts": round(time.time(), 6), "event": event, **fields}
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, sort_keys=True) + "\n")
+    _trace_sink.emit({"ts": round(time.time(), 6), "event": event, **fields})
 
 
 def wait_for_schema(timeout_s: float = 30.0):
@@ -82,6 +110,7 @@ def maybe_barrier(conn, cur, name: str):
             """,
             (name,),
         )
+        notify_queue(cur)
         conn.commit()
         log_event("barrier_open", barrier=name)
         _append_trace_event("barrier_open", barrier=name, worker_id=WORKER_ID)
@@ -102,69 +131,144 @@ def backoff_seconds(attempt: int) -> int:
     return min(2 * (2 ** max(0, attempt - 1)), 300)
 
 
-def claim_one_job(conn, cur):
+def _on_lease_acquired(row, forced: bool):
+    job_id, payload, token, lease_expires_at, attempts, max_attempts = row
+    with start_job_span_from_payload(
+        tracer,
+        "worker.claim",
+        payload,
+        job_id=str(job_id),
+        worker_id=WORKER_ID,
+        fencing_token=int(token),
+    ):
+        _append_trace_event(
+            "claim",
+            job_id=str(job_id),
+            worker_id=WORKER_ID,
+            fencing_token=int(token),
+            forced=forced,
+        )
+    with start_job_span_from_payload(
+        tracer, "lease.acquire", payload, job_id=str(job_id), lease_ttl=int(LEASE_SECONDS)
+    ):
+        pass
+    fields = {"forced": True} if forced else {}
+    log_event(
+        "lease_acquired",
+        job_id=job_id,
+        token=int(token),
+        lease_expires_at=str(lease_expires_at),
+        **fields,
+        attempts=attempts,
+        max_attempts=max_attempts,
+    )
+    return job_id, payload, int(token), int(attempts), int(max_attempts)
+
+
+def _barrier_closed(cur) -> bool:
     barrier_wait = os.getenv("BARRIER_WAIT")
     if barrier_wait:
         cur.execute("SELECT opened_at FROM barriers WHERE name=%s", (barrier_wait,))
         if cur.fetchone() is None:
-            return None, None, None, None, None
+            return True
+    return False
+
+
+CLAIM_PINNED = statements.register(
+    "faultline_claim_pinned",
+    """
+    UPDATE jobs
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=fencing_token+1,
+        updated_at=NOW()
+    WHERE id=%(job_id)s
+      AND (
+            state='queued'
+         OR (state='running' AND lease_expires_at < NOW())
+      )
+    RETURNING id, payload, fencing_token, lease_expires_at, attempts, max_attempts
+    """,
+    [("owner", "text"), ("lease_seconds", "float8"), ("job_id", "uuid")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases l
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=l.fencing_token+1,
+        updated_at=NOW()
+    FROM job_bodies b
+    WHERE l.job_id=%(job_id)s
+      AND b.id = l.job_id
+      AND (
+            l.state='queued'
+         OR (l.state='running' AND l.lease_expires_at < NOW())
+      )
+    RETURNING l.job_id, b.payload, l.fencing_token, l.lease_expires_at, l.attempts, b.max_attempts
+    """,
+)
+
+CLAIM_ONE = statements.register(
+    "faultline_claim_one",
+    """
+    UPDATE jobs
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=fencing_token+1,
+        updated_at=NOW()
+    WHERE id = (
+        SELECT id
+        FROM jobs
+        WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY COALESCE(next_run_at, created_at)
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, payload, fencing_token, lease_expires_at, attempts, max_attempts
+    """,
+    [("owner", "text"), ("lease_seconds", "float8")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases l
+    SET state='running',
+        lease_owner=%(owner)s,
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+        fencing_token=l.fencing_token+1,
+        updated_at=NOW()
+    FROM job_bodies b
+    WHERE l.job_id = (
+        SELECT job_id
+        FROM job_leases
+        WHERE (state='queued' AND next_run_at <= NOW())
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY next_run_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+      AND b.id = l.job_id
+    RETURNING l.job_id, b.payload, l.fencing_token, l.lease_expires_at, l.attempts, b.max_attempts
+    """,
+)
+
+
+def claim_one_job(conn, cur):
+    if _barrier_closed(cur):
+        return None, None, None, None, None
 
     if CLAIM_JOB_ID:
-        cur.execute(
-            """
-            UPDATE jobs
-            SET state='running',
-                lease_owner=%s,
-                lease_expires_at = NOW() + make_interval(secs => %s),
-                fencing_token=fencing_token+1,
-                updated_at=NOW()
-            WHERE id=%s
-              AND (
-                    state='queued'
-                 OR (state='running' AND lease_expires_at < NOW())
-              )
-            RETURNING id, payload, fencing_token, lease_expires_at, attempts, max_attempts
-            """,
-            (WORKER_ID, LEASE_SECONDS, CLAIM_JOB_ID),
+        statements.execute(
+            cur, CLAIM_PINNED, {"owner": WORKER_ID, "lease_seconds": LEASE_SECONDS, "job_id": CLAIM_JOB_ID}
         )
         row = cur.fetchone()
         if row:
-            job_id, payload, token, lease_expires_at, attempts, max_attempts = row
-            with start_job_span_from_payload(
-                tracer,
-                "worker.claim",
-                payload,
-                job_id=str(job_id),
-                worker_id=WORKER_ID,
-                fencing_token=int(token),
-            ):
-                _append_trace_event(
-                    "claim",
-                    job_id=str(job_id),
-                    worker_id=WORKER_ID,
-                    fencing_token=int(token),
-                    forced=True,
-                )
-            with start_job_span_from_payload(
-                tracer,
-                "lease.acquire",
-                payload,
-                job_id=str(job_id),
-                lease_ttl=int(LEASE_SECONDS),
-            ):
-                pass
-            log_event(
-                "lease_acquired",
-                job_id=job_id,
-                token=int(token),
-                lease_expires_at=str(lease_expires_at),
-                forced=True,
-                attempts=attempts,
-                max_attempts=max_attempts,
-            )
+            job = _on_lease_acquired(row, forced=True)
             maybe_barrier(conn, cur, "after_lease_acquire")
             maybe_crash("after_lease_acquire")
-            return job_id, payload, int(token), int(attempts), int(max_attempts)
+            return job
         cur.execute(
             "SELECT state, lease_owner, lease_expires_at, fencing_token FROM jobs WHERE id=%s",
             (CLAIM_JOB_ID,),
@@ -172,73 +276,253 @@ def claim_one_job(conn, cur):
         print("JOB STATE BEFORE CLAIM:", cur.fetchone(), flush=True)
         return None, None, None, None, None
 
-    cur.execute(
-        """
-        UPDATE jobs
-        SET state='running',
-            lease_owner=%s,
-            lease_expires_at = NOW() + make_interval(secs => %s),
-            fencing_token=fencing_token+1,
-            updated_at=NOW()
-        WHERE id = (
-            SELECT id
-            FROM jobs
-            WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
-               OR (state='running' AND lease_expires_at < NOW())
-            ORDER BY COALESCE(next_run_at, created_at)
-            FOR UPDATE SKIP LOCKED
-            LIMIT 1
-        )
-        RETURNING id, payload, fencing_token, lease_expires_at, attempts, max_attempts
-        """,
-        (WORKER_ID, LEASE_SECONDS),
-    )
+    statements.execute(cur, CLAIM_ONE, {"owner": WORKER_ID, "lease_seconds": LEASE_SECONDS})
     row = cur.fetchone()
     if row:
-        job_id, payload, token, lease_expires_at, attempts, max_attempts = row
-        with start_job_span_from_payload(
-            tracer,
-            "worker.claim",
-            payload,
-            job_id=str(job_id),
-            worker_id=WORKER_ID,
-            fencing_token=int(token),
-        ):
-            _append_trace_event(
-                "claim",
-                job_id=str(job_id),
-                worker_id=WORKER_ID,
-                fencing_token=int(token),
-                forced=False,
-            )
-        with start_job_span_from_payload(
-            tracer, "lease.acquire", payload, job_id=str(job_id), lease_ttl=int(LEASE_SECONDS)
-        ):
-            pass
-        log_event(
-            "lease_acquired",
-            job_id=job_id,
-            token=int(token),
-            lease_expires_at=str(lease_expires_at),
-            attempts=attempts,
-            max_attempts=max_attempts,
-        )
+        job = _on_lease_acquired(row, forced=False)
         maybe_barrier(conn, cur, "after_lease_acquire")
         maybe_crash("after_lease_acquire")
-        return job_id, payload, int(token), int(attempts), int(max_attempts)
+        return job
 
     return None, None, None, None, None
 
 
-def assert_fence(cur, job_id, token):
-    cur.execute(
-        """
-        SELECT fencing_token, (lease_expires_at IS NOT NULL AND lease_expires_at < NOW())
+CLAIM_BATCH = statements.register(
+    "faultline_claim_batch",
+    """
+    WITH candidates AS (
+        SELECT id
         FROM jobs
-        WHERE id=%s
-        """,
-        (job_id,),
+        WHERE (state='queued' AND (next_run_at IS NULL OR next_run_at <= NOW()))
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY COALESCE(next_run_at, created_at)
+        FOR UPDATE SKIP LOCKED
+        LIMIT %(limit)s
+    ),
+    claimed AS (
+        UPDATE jobs
+        SET state='running',
+            lease_owner=%(owner)s,
+            lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+            fencing_token=jobs.fencing_token+1,
+            updated_at=NOW()
+        FROM candidates
+        WHERE jobs.id = candidates.id
+        RETURNING jobs.id, jobs.payload, jobs.fencing_token, jobs.lease_expires_at,
+                  jobs.attempts, jobs.max_attempts,
+                  COALESCE(jobs.next_run_at, jobs.created_at) AS run_at
     )
+    SELECT id, payload, fencing_token, lease_expires_at, attempts, max_attempts
+    FROM claimed
+    ORDER BY run_at
+    """,
+    [("limit", "int"), ("owner", "text"), ("lease_seconds", "float8")],
+    "claim",
+    lease_table_sql="""
+    WITH candidates AS (
+        SELECT job_id
+        FROM job_leases
+        WHERE (state='queued' AND next_run_at <= NOW())
+           OR (state='running' AND lease_expires_at < NOW())
+        ORDER BY next_run_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT %(limit)s
+    ),
+    claimed AS (
+        UPDATE job_leases l
+        SET state='running',
+            lease_owner=%(owner)s,
+            lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s),
+            fencing_token=l.fencing_token+1,
+            updated_at=NOW()
+        FROM candidates
+        WHERE l.job_id = candidates.job_id
+        RETURNING l.job_id, l.fencing_token, l.lease_expires_at, l.attempts, l.next_run_at AS run_at
+    )
+    SELECT c.job_id, b.payload, c.fencing_token, c.lease_expires_at, c.attempts, b.max_attempts
+    FROM claimed c
+    JOIN job_bodies b ON b.id = c.job_id
+    ORDER BY c.run_at
+    """,
+)
+
+
+def claim_batch(conn, cur, n: int):
+    """
+    Lease up to n eligible jobs in a single statement.
+
+    Every returned row has had its fencing_token advanced by the same UPDATE,
+    so each job carries its own epoch and is fenced independently afterwards.
+    Returns a list of (job_id, payload, token, attempts, max_attempts) tuples
+    in claim order. Pinned claims (CLAIM_JOB_ID) and n <= 1 go through
+    claim_one_job() unchanged.
+    """
+    if CLAIM_JOB_ID or n <= 1:
+        job = claim_one_job(conn, cur)
+        return [job] if job[0] is not None else []
+
+    if _barrier_closed(cur):
+        return []
+
+    statements.execute(cur, CLAIM_BATCH, {"limit": n, "owner": WORKER_ID, "lease_seconds": LEASE_SECONDS})
+    rows = cur.fetchall()
+    jobs = [_on_lease_acquired(row, forced=False) for row in rows]
+    if jobs:
+        maybe_barrier(conn, cur, "after_lease_acquire")
+        maybe_crash("after_lease_acquire")
+    return jobs
+
+
+RELEASE_LEASES = statements.register(
+    "faultline_release_leases",
+    """
+    UPDATE jobs
+    SET state='queued',
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        updated_at=NOW()
+    FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS released(job_id, token)
+    WHERE jobs.id = released.job_id
+      AND jobs.fencing_token = released.token
+      AND jobs.state='running'
+      AND jobs.lease_owner=%(owner)s
+    """,
+    [("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("owner", "text")],
+    "claim",
+    lease_table_sql="""
+    UPDATE job_leases
+    SET state='queued',
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        updated_at=NOW()
+    FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS released(job_id, token)
+    WHERE job_leases.job_id = released.job_id
+      AND job_leases.fencing_token = released.token
+      AND job_leases.state='running'
+      AND job_leases.lease_owner=%(owner)s
+    """,
+)
+
+
+def release_leases(cur, jobs) -> int:
+    """
+    Hand unstarted leases back to the queue.
+
+    Guarded by owner and fencing_token so a lease that has already been
+    reclaimed by another worker is left alone.
+    """
+    if not jobs:
+        return 0
+    statements.execute(
+        cur,
+        RELEASE_LEASES,
+        {"job_ids": [str(j[0]) for j in jobs], "tokens": [int(j[2]) for j in jobs], "owner": WORKER_ID},
+    )
+    released = cur.rowcount
+    _untrack(jobs)
+    if released:
+        notify_queue(cur)
+        log_event("leases_released", count=released)
+    return released
+
+
+def _track_claimed(jobs) -> None:
+    """
+    Renew every lease of a claimed batch from the claim on, not only while
+    its job runs, so jobs queued behind slow ones keep their leases.
+    """
+    if _heartbeat is not None:
+        for job in jobs:
+            _heartbeat.track(job[0], job[2])
+
+
+def _untrack(jobs) -> None:
+    if _heartbeat is not None:
+        for job in jobs:
+            _heartbeat.untrack(job[0], job[2])
+
+
+NEXT_DUE = statements.register(
+    "faultline_next_due",
+    """
+    SELECT EXTRACT(EPOCH FROM (LEAST(
+        (SELECT MIN(next_run_at) FROM jobs
+          WHERE state='queued' AND next_run_at > NOW()),
+        (SELECT MIN(lease_expires_at) FROM jobs
+          WHERE state='running' AND lease_expires_at > NOW())
+    ) - NOW()))::float8
+    """,
+    [],
+    "query",
+    lease_table_sql="""
+    SELECT EXTRACT(EPOCH FROM (LEAST(
+        (SELECT MIN(next_run_at) FROM job_leases
+          WHERE state='queued' AND next_run_at > NOW()),
+        (SELECT MIN(lease_expires_at) FROM job_leases
+          WHERE state='running' AND lease_expires_at > NOW())
+    ) - NOW()))::float8
+    """,
+)
+
+
+def next_due_in(cur):
+    """
+    Seconds until the earliest future retry (next_run_at) or live lease
+    expiry, i.e. the next moment a job becomes claimable without anyone
+    sending a NOTIFY. None when nothing is pending.
+    """
+    statements.execute(cur, NEXT_DUE, {})
+    row = cur.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+def wait_for_work(due=None) -> None:
+    """Idle until a NOTIFY arrives, a retry/lease falls due, or the poll timeout passes."""
+    if _listener is None:
+        time.sleep(IDLE_POLL_SECONDS)
+        return
+    timeout = WAKEUP_POLL_SECONDS if due is None else min(WAKEUP_POLL_SECONDS, due + 0.01)
+    if _listener.wait(timeout):
+        notify_wakeups.inc()
+
+
+def _stale_write_blocked(job_id, token, current_token, reason):
+    log_event(
+        "stale_write_blocked",
+        job_id=job_id,
+        stale_token=token,
+        current_token=current_token,
+        reason=reason,
+    )
+    _append_trace_event(
+        "stale_write_blocked",
+        job_id=str(job_id),
+        stale_token=int(token),
+        current_token=current_token,
+        reason=reason,
+    )
+    stale_commits.inc()
+
+
+FENCE = statements.register(
+    "faultline_fence",
+    """
+    SELECT fencing_token, (lease_expires_at IS NOT NULL AND lease_expires_at < NOW())
+    FROM jobs
+    WHERE id=%(job_id)s
+    """,
+    [("job_id", "uuid")],
+    "heartbeat",
+    lease_table_sql="""
+    SELECT fencing_token, (lease_expires_at IS NOT NULL AND lease_expires_at < NOW())
+    FROM job_leases
+    WHERE job_id=%(job_id)s
+    """,
+)
+
+
+def assert_fence(cur, job_id, token):
+    statements.execute(cur, FENCE, {"job_id": job_id})
     row = cur.fetchone()
     if not row:
         raise RuntimeError("job_missing")
@@ -246,223 +530,547 @@ def assert_fence(cur, job_id, token):
     lease_expired = bool(row[1])
 
     if token != current_token:
-        log_event(
-            "stale_write_blocked",
-            job_id=job_id,
-            stale_token=token,
-            current_token=current_token,
-            reason="token_mismatch",
-        )
-        _append_trace_event(
-            "stale_write_blocked",
-            job_id=str(job_id),
-            stale_token=int(token),
-            current_token=current_token,
-            reason="token_mismatch",
-        )
-        stale_commits.inc()
+        _stale_write_blocked(job_id, token, current_token, "token_mismatch")
         raise RuntimeError("stale_token")
 
     if lease_expired:
-        log_event(
-            "stale_write_blocked",
-            job_id=job_id,
-            stale_token=token,
-            current_token=current_token,
-            reason="lease_expired",
-        )
-        _append_trace_event(
-            "stale_write_blocked",
-            job_id=str(job_id),
-            stale_token=int(token),
-            current_token=current_token,
-            reason="lease_expired",
-        )
-        stale_commits.inc()
+        _stale_write_blocked(job_id, token, current_token, "lease_expired")
         raise RuntimeError("lease_expired")
 
 
-def execute_job(job_id, token, attempts):
+def execute_job(job_id, token, attempts, cancel=None):
     if SIMULATE_FAILURE and attempts == 0:
         raise RuntimeError("simulated_execution_failure")
     _append_trace_event("execute_start", job_id=str(job_id), token=int(token), attempts=int(attempts))
-    time.sleep(WORK_SLEEP_SECONDS)
+    if cancel is None:
+        time.sleep(WORK_SLEEP_SECONDS)
+    elif cancel.wait(WORK_SLEEP_SECONDS):
+        raise RuntimeError("lease_lost")
     _append_trace_event("execute_done", job_id=str(job_id), token=int(token), attempts=int(attempts))
 
 
-def mark_for_retry(cur, job_id, token, attempts, max_attempts, error_text):
-    next_attempt = attempts + 1
-    if next_attempt >= max_attempts:
-        cur.execute(
-            """
-            UPDATE jobs
-            SET state='failed',
-                attempts=%s,
-                last_error=%s,
-                lease_owner=NULL,
-                lease_expires_at=NULL,
-                updated_at=NOW()
-            WHERE id=%s AND fencing_token=%s
-            """,
-            (next_attempt, error_text[:500], job_id, token),
-        )
-        return "failed"
+def _execute(job_id, token, attempts, cancel):
+    if _cpu_pool is None:
+        execute_job(job_id, token, attempts, cancel)
+        return
+    fut = _cpu_pool.submit(execute_job, job_id, token, attempts)
+    if cancel is not None:
+        # A running pool task cannot be interrupted; stop waiting for it so
+        # the job thread is free, and let the process finish on its own.
+        while not fut.done():
+            if cancel.wait(0.1):
+                raise RuntimeError("lease_lost")
+    fut.result()
 
-    delay = backoff_seconds(next_attempt)
-    cur.execute(
-        """
-        UPDATE jobs
+
+MARK_FAILED = statements.register(
+    "faultline_mark_failed",
+    """
+    UPDATE jobs
+    SET state='failed',
+        attempts=%(attempts)s,
+        last_error=%(error)s,
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        updated_at=NOW()
+    WHERE id=%(job_id)s AND fencing_token=%(token)s
+    """,
+    [("attempts", "int"), ("error", "text"), ("job_id", "uuid"), ("token", "bigint")],
+    "commit",
+    lease_table_sql="""
+    WITH lease AS (
+        UPDATE job_leases
+        SET state='failed',
+            attempts=%(attempts)s,
+            lease_owner=NULL,
+            lease_expires_at=NULL,
+            updated_at=NOW()
+        WHERE job_id=%(job_id)s AND fencing_token=%(token)s
+        RETURNING job_id
+    )
+    UPDATE job_bodies b
+    SET last_error=%(error)s
+    FROM lease
+    WHERE b.id = lease.job_id
+    """,
+)
+
+MARK_RETRY = statements.register(
+    "faultline_mark_retry",
+    """
+    UPDATE jobs
+    SET state='queued',
+        attempts=%(attempts)s,
+        last_error=%(error)s,
+        lease_owner=NULL,
+        lease_expires_at=NULL,
+        next_run_at=NOW() + make_interval(secs => %(delay)s),
+        updated_at=NOW()
+    WHERE id=%(job_id)s AND fencing_token=%(token)s
+    """,
+    [("attempts", "int"), ("error", "text"), ("delay", "float8"), ("job_id", "uuid"), ("token", "bigint")],
+    "commit",
+    lease_table_sql="""
+    WITH lease AS (
+        UPDATE job_leases
         SET state='queued',
-            attempts=%s,
-            last_error=%s,
+            attempts=%(attempts)s,
             lease_owner=NULL,
             lease_expires_at=NULL,
-            next_run_at=NOW() + make_interval(secs => %s),
+            next_run_at=NOW() + make_interval(secs => %(delay)s),
             updated_at=NOW()
-        WHERE id=%s AND fencing_token=%s
-        """,
-        (next_attempt, error_text[:500], delay, job_id, token),
+        WHERE job_id=%(job_id)s AND fencing_token=%(token)s
+        RETURNING job_id
     )
+    UPDATE job_bodies b
+    SET last_error=%(error)s
+    FROM lease
+    WHERE b.id = lease.job_id
+    """,
+)
+
+
+def mark_for_retry(cur, job_id, token, attempts, max_attempts, error_text):
+    next_attempt = attempts + 1
+    params = {"attempts": next_attempt, "error": error_text[:500], "job_id": job_id, "token": token}
+    if next_attempt >= max_attempts:
+        statements.execute(cur, MARK_FAILED, params)
+        return "failed"
+
+    statements.execute(cur, MARK_RETRY, {**params, "delay": backoff_seconds(next_attempt)})
+    # Wakes idle workers so they re-arm their timer for the new next_run_at.
+    notify_queue(cur)
     return "retry"
 
 
-def mark_succeeded(cur, job_id, token):
-    cur.execute(
-        """
+# Fence, ledger write and state transition in one statement, for one job or
+# a group of jobs. The fence CTE locks the job rows (in id order, so two
+# committers never deadlock), so the checks below see the latest committed
+# owner and token and nothing can reclaim a job between them and the UPDATE.
+# The UPDATE repeats the ownership predicates so they are re-evaluated
+# against that locked row version. Each row gets its own status; only 'ok'
+# rows are written, so one stale job does not affect the others.
+FENCED_COMMIT = statements.register(
+    "faultline_fenced_commit",
+    """
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS r(id, token)
+    ),
+    fence AS (
+        SELECT j.id,
+               req.token,
+               j.fencing_token,
+               (j.state = 'running' AND j.lease_owner = %(owner)s) AS owned,
+               (j.lease_expires_at IS NOT NULL AND j.lease_expires_at < NOW()) AS lease_expired
+        FROM jobs j
+        JOIN req ON req.id = j.id
+        ORDER BY j.id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT id, token FROM fence
+        WHERE fencing_token = token AND owned AND NOT lease_expired
+    ),
+    ledger AS (
         INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
-        VALUES (%s, %s, 'default', 1)
+        SELECT id, token, 'default', 1 FROM allowed
         ON CONFLICT (job_id, fencing_token) DO NOTHING
-        """,
-        (job_id, token),
+        RETURNING job_id
+    ),
+    done AS (
+        UPDATE jobs j
+        SET state='succeeded',
+            lease_owner=NULL,
+            lease_expires_at=NULL,
+            next_run_at=NULL,
+            updated_at=NOW()
+        FROM allowed
+        WHERE j.id = allowed.id
+          AND j.state = 'running'
+          AND j.lease_owner = %(owner)s
+          AND j.fencing_token = allowed.token
+        RETURNING j.id
     )
-    maybe_crash("before_commit")
-    cur.execute(
-        """
-        UPDATE jobs
+    SELECT fence.id::text,
+           fence.fencing_token,
+           CASE
+               WHEN fence.fencing_token <> fence.token THEN 'stale_token'
+               WHEN fence.lease_expired THEN 'lease_expired'
+               WHEN fence.id NOT IN (SELECT id FROM done) THEN 'stale_commit'
+               ELSE 'ok'
+           END
+    FROM fence
+    """,
+    [("job_ids", "uuid[]"), ("tokens", "bigint[]"), ("owner", "text")],
+    "commit",
+    lease_table_sql="""
+    WITH req AS (
+        SELECT * FROM unnest(%(job_ids)s::uuid[], %(tokens)s::bigint[]) AS r(id, token)
+    ),
+    fence AS (
+        SELECT j.job_id AS id,
+               req.token,
+               j.fencing_token,
+               (j.state = 'running' AND j.lease_owner = %(owner)s) AS owned,
+               (j.lease_expires_at IS NOT NULL AND j.lease_expires_at < NOW()) AS lease_expired
+        FROM job_leases j
+        JOIN req ON req.id = j.job_id
+        ORDER BY j.job_id
+        FOR UPDATE OF j
+    ),
+    allowed AS (
+        SELECT id, token FROM fence
+        WHERE fencing_token = token AND owned AND NOT lease_expired
+    ),
+    ledger AS (
+        INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
+        SELECT id, token, 'default', 1 FROM allowed
+        ON CONFLICT (job_id, fencing_token) DO NOTHING
+        RETURNING job_id
+    ),
+    done AS (
+        UPDATE job_leases j
         SET state='succeeded',
             lease_owner=NULL,
             lease_expires_at=NULL,
             next_run_at=NULL,
             updated_at=NOW()
-        WHERE id=%s
-          AND state='running'
-          AND lease_owner=%s
-          AND fencing_token=%s
-          AND EXISTS (
-                SELECT 1
-                FROM ledger_entries
-                WHERE job_id=%s AND fencing_token=%s
-          )
-        """,
-        (job_id, WORKER_ID, token, job_id, token),
+        FROM allowed
+        WHERE j.job_id = allowed.id
+          AND j.state = 'running'
+          AND j.lease_owner = %(owner)s
+          AND j.fencing_token = allowed.token
+        RETURNING j.job_id AS id
+    )
+    SELECT fence.id::text,
+           fence.fencing_token,
+           CASE
+               WHEN fence.fencing_token <> fence.token THEN 'stale_token'
+               WHEN fence.lease_expired THEN 'lease_expired'
+               WHEN fence.id NOT IN (SELECT id FROM done) THEN 'stale_commit'
+               ELSE 'ok'
+           END
+    FROM fence
+    """,
+)
+
+
+def fenced_commit(cur, jobs):
+    """
+    Run the fenced commit for [(job_id, token), ...] in the current transaction.
+
+    Returns {job_id: (current_token, status)} with status one of "ok",
+    "stale_token", "lease_expired" or "stale_commit"; jobs that no longer
+    exist are absent. The caller commits.
+    """
+    maybe_crash("before_commit")
+    statements.execute(
+        cur,
+        FENCED_COMMIT,
+        {
+            "job_ids": [str(job_id) for job_id, _ in jobs],
+            "tokens": [int(token) for _, token in jobs],
+            "owner": WORKER_ID,
+        },
     )
-    if cur.rowcount == 0:
+    return {job_id: (int(current_token), status) for job_id, current_token, status in cur.fetchall()}
+
+
+def raise_for_commit_status(job_id, token, result):
+    """Map one fenced_commit() result to the worker's stale error codes."""
+    if result is None:
+        raise RuntimeError("job_missing")
+    current_token, status = result
+    if status == "stale_token":
+        _stale_write_blocked(job_id, token, current_token, "token_mismatch")
+        raise RuntimeError("stale_token")
+    if status == "lease_expired":
+        _stale_write_blocked(job_id, token, current_token, "lease_expired")
+        raise RuntimeError("lease_expired")
+    if status == "stale_commit":
         log_event("commit_stale", job_id=job_id, token=token)
         stale_commits.inc()
         raise RuntimeError("stale_commit")
 
 
-if __name__ == "__main__":
-    if METRICS_ENABLED:
-        start_http_server(METRICS_PORT)
+def mark_succeeded(cur, job_id, token):
+    """
+    Fenced commit: validate token and lease, write the ledger entry and mark
+    the job succeeded in a single round trip.
 
-    wait_for_schema()
-    loops = 0
-    run_once = os.getenv("FAULTLINE_SINGLE_RUN", "0") == "1"
+    Raises RuntimeError with the same codes as assert_fence() plus
+    "stale_commit"; the caller must roll back.
+    """
+    results = fenced_commit(cur, [(job_id, token)])
+    raise_for_commit_status(job_id, token, results.get(str(job_id)))
+
+
+def _commit_succeeded(conn, cur, job_id, token):
+    if _committer is None:
+        mark_succeeded(cur, job_id, token)
+        return
+    # End this job's read-only fence transaction; the committer does the write.
+    conn.commit()
+    try:
+        result = _committer.submit(job_id, token).result()
+    except psycopg2.Error as e:
+        log_event("group_commit_fallback", job_id=job_id, token=token, error=str(e)[:200])
+        mark_succeeded(cur, job_id, token)
+        return
+    raise_for_commit_status(job_id, token, result)
+
+
+def run_claimed_job(conn, cur, job) -> str:
+    """
+    Fence, execute and commit one claimed job on its own transaction.
+
+    Returns "succeeded", "retry" or "failed". Stale ownership is raised as
+    RuntimeError(<stale code>) after the transaction has been rolled back.
+    """
+    job_id, payload, token, attempts, max_attempts = job
+    log_event(
+        "execution_started",
+        job_id=job_id,
+        token=token,
+        attempts=attempts,
+        max_attempts=max_attempts,
+    )
+
+    start = time.monotonic()
+    cancel = _heartbeat.track(job_id, token) if _heartbeat is not None else None
+    try:
+        assert_fence(cur, job_id, token)
+        try:
+            with start_job_span_from_payload(tracer, "job.execute", payload, job_id=str(job_id)):
+                _execute(job_id, token, attempts, cancel)
+        except Exception as exec_err:
+            if cancel is not None and cancel.is_set():
+                # The lease is gone: the new owner decides retries, not us.
+                log_event("execution_cancelled", job_id=job_id, token=token, reason="lease_lost")
+                stale_commits.inc()
+                raise RuntimeError("lease_expired") from exec_err
+            outcome = mark_for_retry(cur, job_id, token, attempts, max_attempts, str(exec_err))
+            elapsed = time.monotonic() - start
+            job_duration.observe(elapsed)
+            if outcome == "failed":
+                jobs_failed_perm.inc()
+                log_event("job_failed_permanently", job_id=job_id, attempts=attempts + 1)
+            else:
+                jobs_retried.inc()
+                log_event(
+                    "job_scheduled_retry",
+                    job_id=job_id,
+                    attempt=attempts + 1,
+                    backoff_seconds=backoff_seconds(attempts + 1),
+                )
+            conn.commit()
+            return outcome
+
+        _commit_succeeded(conn, cur, job_id, token)
+        elapsed = time.monotonic() - start
+        job_duration.observe(elapsed)
+        jobs_succeeded.inc()
+        with start_job_span_from_payload(
+            tracer,
+            "job.complete",
+            payload,
+            job_id=str(job_id),
+            status="succeeded",
+        ):
+            _append_trace_event(
+                "complete",
+                job_id=str(job_id),
+                worker_id=WORKER_ID,
+                token=int(token),
+                duration_s=round(elapsed, 3),
+            )
+        log_event("commit_ok", job_id=job_id, token=token, duration_s=round(elapsed, 3))
+        conn.commit()
+        return "succeeded"
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if _heartbeat is not None:
+            _heartbeat.untrack(job_id, token)
+
+
+def _exit_reason(outcome: str, run_once: bool):
+    if outcome == "stale":
+        return "stale" if EXIT_ON_STALE or run_once else None
+    if outcome == "succeeded" and EXIT_ON_SUCCESS:
+        return "success"
+    if run_once:
+        return "single_run" if outcome == "succeeded" else "single_run_retry"
+    return None
+
+
+def _run_job_on_own_conn(job) -> str:
+    jobs_in_flight.inc()
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                return run_claimed_job(conn, cur, job)
+    finally:
+        jobs_in_flight.dec()
 
+
+def run_serial(run_once: bool):
+    loops = 0
     while True:
         if MAX_LOOPS and loops >= MAX_LOOPS:
-            log_event("worker_exit", reason="max_loops")
-            break
+            return "max_loops"
 
         loops += 1
         heartbeat.inc()
+        exit_reason = None
+        claimed = []
+        due = None
 
         try:
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    result = claim_one_job(conn, cur)
-                    if not result or result[0] is None:
+                    claimed = claim_batch(conn, cur, CLAIM_BATCH_SIZE)
+                    if not claimed:
                         if CLAIM_JOB_ID and run_once:
-                            log_event("worker_exit", reason="forced_claim_failed")
-                            break
-                        time.sleep(0.05)
-                        continue
-
-                    job_id, payload, token, attempts, max_attempts = result
-                    conn.commit()
-                    jobs_claimed.inc()
-                    log_event(
-                        "execution_started",
-                        job_id=job_id,
-                        token=token,
-                        attempts=attempts,
-                        max_attempts=max_attempts,
-                    )
-
-                    start = time.monotonic()
-                    try:
-                        assert_fence(cur, job_id, token)
+                            return "forced_claim_failed"
+                        due = next_due_in(cur)
+                    else:
+                        conn.commit()
+                        _track_claimed(claimed)
+                        jobs_claimed.inc(len(claimed))
+
+                    for i, job in enumerate(claimed):
                         try:
-                            with start_job_span_from_payload(tracer, "job.execute", payload, job_id=str(job_id)):
-                                execute_job(job_id, token, attempts)
-                        except Exception as exec_err:
-                            outcome = mark_for_retry(cur, job_id, token, attempts, max_attempts, str(exec_err))
-                            elapsed = time.monotonic() - start
-                            job_duration.observe(elapsed)
-                            if outcome == "failed":
-                                jobs_failed_perm.inc()
-                                log_event("job_failed_permanently", job_id=job_id, attempts=attempts + 1)
-                            else:
-                                jobs_retried.inc()
-                                log_event(
-                                    "job_scheduled_retry",
-                                    job_id=job_id,
-                                    attempt=attempts + 1,
-                                    backoff_seconds=backoff_seconds(attempts + 1),
-                                )
+                            outcome = run_claimed_job(conn, cur, job)
+                        except RuntimeError as e:
+                            if str(e) not in STALE_ERRORS:
+                                raise
+                            outcome = "stale"
+
+                        exit_reason = _exit_reason(outcome, run_once)
+                        if exit_reason:
+                            release_leases(cur, claimed[i + 1:])
                             conn.commit()
-                            if run_once:
-                                log_event("worker_exit", reason="single_run_retry")
-                                break
-                            continue
-
-                        assert_fence(cur, job_id, token)
-                        mark_succeeded(cur, job_id, token)
-                        elapsed = time.monotonic() - start
-                        job_duration.observe(elapsed)
-                        jobs_succeeded.inc()
-                        with start_job_span_from_payload(
-                            tracer,
-                            "job.complete",
-                            payload,
-                            job_id=str(job_id),
-                            status="succeeded",
-                        ):
-                            _append_trace_event(
-                                "complete",
-                                job_id=str(job_id),
-                                worker_id=WORKER_ID,
-                                token=int(token),
-                                duration_s=round(elapsed, 3),
-                            )
-                        log_event("commit_ok", job_id=job_id, token=token, duration_s=round(elapsed, 3))
-                        conn.commit()
-                        if EXIT_ON_SUCCESS:
-                            log_event("worker_exit", reason="success")
-                            break
-                        if run_once:
-                            log_event("worker_exit", reason="single_run")
                             break
-                    except Exception as e:
-                        conn.rollback()
-                        if str(e) in ("stale_token", "lease_expired", "stale_commit"):
-                            if EXIT_ON_STALE:
-                                log_event("worker_exit", reason="stale")
-                                break
-                        raise
         except OperationalError as e:
             log_event("db_error", error=str(e)[:200])
             time.sleep(0.5)
+            continue
+        finally:
+            # Committed, released or abandoned: stop renewing what is left of the batch.
+            _untrack(claimed)
+
+        if exit_reason:
+            return exit_reason
+
+        if not claimed:
+            wait_for_work(due)
+
+
+def run_concurrent(run_once: bool):
+    """
+    Keep up to WORKER_CONCURRENCY jobs in flight.
+
+    The dispatcher claims as many jobs as there are free slots and hands each
+    one to a job thread. Every job thread opens its own connection, so each
+    in-flight job keeps its own fencing token, lease deadline and commit
+    transaction.
+    """
+    global _cpu_pool
+    if WORKER_EXECUTOR == "process":
+        # spawn, not fork: the dispatcher already runs job threads.
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=WORKER_CONCURRENCY, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    loops = 0
+    exit_reason = None
+    in_flight = set()
+    pool = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="faultline-job")
+    try:
+        while exit_reason is None:
+            if MAX_LOOPS and loops >= MAX_LOOPS:
+                exit_reason = "max_loops"
+                break
+
+            loops += 1
+            heartbeat.inc()
+
+            free = WORKER_CONCURRENCY - len(in_flight)
+            claimed = []
+            due = None
+            if free > 0:
+                try:
+                    with get_conn() as conn:
+                        with conn.cursor() as cur:
+                            claimed = claim_batch(conn, cur, free)
+                            conn.commit()
+                            _track_claimed(claimed)
+                            if len(claimed) < free:
+                                due = next_due_in(cur)
+                except OperationalError as e:
+                    log_event("db_error", error=str(e)[:200])
+                    time.sleep(0.5)
+                    continue
+
+                if not claimed and CLAIM_JOB_ID and run_once and not in_flight:
+                    exit_reason = "forced_claim_failed"
+                    break
+                jobs_claimed.inc(len(claimed))
+                for job in claimed:
+                    in_flight.add(pool.submit(_run_job_on_own_conn, job))
+
+            if len(in_flight) >= WORKER_CONCURRENCY:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            else:
+                # Queue drained below our free capacity: idle until woken.
+                wait_for_work(due)
+                done = {fut for fut in in_flight if fut.done()}
+                in_flight -= done
+
+            for fut in done:
+                try:
+                    outcome = fut.result()
+                except OperationalError as e:
+                    log_event("db_error", error=str(e)[:200])
+                    continue
+                except RuntimeError as e:
+                    if str(e) not in STALE_ERRORS:
+                        raise
+                    outcome = "stale"
+                exit_reason = exit_reason or _exit_reason(outcome, run_once)
+    finally:
+        pool.shutdown(wait=True)
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=True)
+    return exit_reason
+
+
+if __name__ == "__main__":
+    if METRICS_ENABLED:
+        start_http_server(METRICS_PORT)
+
+    # One connection per job thread plus the dispatcher, heartbeat and committer.
+    init_pool(max_size=max(DB_POOL_MAX_SIZE, WORKER_CONCURRENCY + 3))
+    wait_for_schema()
+    if LEASE_HEARTBEAT:
+        _heartbeat = LeaseHeartbeat(
+            WORKER_ID, LEASE_SECONDS, max(0.1, LEASE_SECONDS * LEASE_RENEW_FRACTION)
+        ).start()
+    if GROUP_COMMIT:
+        _committer = GroupCommitter(fenced_commit, GROUP_COMMIT_MAX, GROUP_COMMIT_WINDOW_MS / 1000).start()
+    if LISTEN_ENABLED:
+        _listener = QueueListener(DATABASE_URL)
+        _listener.listen()
+    run_once = os.getenv("FAULTLINE_SINGLE_RUN", "0") == "1"
 
-        time.sleep(0.2)
+    if WORKER_CONCURRENCY > 1:
+        reason = run_concurrent(run_once)
+    else:
+        reason = run_serial(run_once)
+    if _committer is not None:
+        _committer.stop()
+    if _heartbeat is not None:
+        _heartbeat.stop()
+    log_event("worker_exit", reason=reason)
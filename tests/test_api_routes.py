@@ -0,0 +1,144 @@
+"""
+tests/test_api_routes.py
+─────────────────────────
+HTTP API routes (services/api/app.py), served by uvicorn on an ephemeral
+port with the real lifespan and asyncpg pool.
+
+Validates:
+  - the SDK's complete_many() / fail_many() reach /v1/jobs:complete and
+    /v1/jobs:fail and get per-item fenced results
+  - an exhausted pool is a 503 and shows in the pool metrics; a timeout
+    inside a request is a 500, not a retryable 503
+"""
+
+import asyncio
+import hashlib
+import importlib
+import sys
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+import requests
+import uvicorn
+
+from sdk.faultline_sdk import CompleteRequest, FailRequest, FaultlineClient, TransportRetry
+
+
+@pytest.fixture
+def api(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("FAULTLINE_API_POOL_MAX_SIZE", "4")
+    # app.py imports the race-drill router, which is not part of every checkout.
+    pytest.importorskip("services.api.race_routes")
+    # app.py imports its siblings top-level, as uvicorn runs it from services/api; alias
+    # them to the package modules so their metrics are not registered twice.
+    db = importlib.import_module("services.api.db")
+    for name, sibling in (("db", db), ("job_events", importlib.import_module("services.api.job_events"))):
+        monkeypatch.setitem(sys.modules, name, sibling)
+    from services.api import app as module
+    from services.common.queue_depth import DepthCache
+
+    # Each test serves on its own event loop; the module-level hub and cache are bound to one.
+    monkeypatch.setattr(module, "_events", module.JobEventHub(database_url))
+    monkeypatch.setattr(module, "_depth_cache", DepthCache())
+    server = uvicorn.Server(uvicorn.Config(module.app, host="127.0.0.1", port=0, log_level="warning"))
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.serve(),), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert thread.is_alive() and time.monotonic() < deadline, "API did not start"
+        time.sleep(0.02)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield SimpleNamespace(url=f"http://127.0.0.1:{port}", loop=loop, module=module, db=db)
+    finally:
+        server.should_exit = True
+        thread.join(10)
+        loop.close()
+
+
+def _seed_running(database_url, n, owner="sdk-w", token=1):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            for job_id in ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                                      lease_owner, fencing_token, lease_expires_at)
+                    VALUES (%s, '{}', %s, 'running', 0, 3, %s, %s, NOW() + interval '30 seconds')
+                    """,
+                    (job_id, hashlib.sha256(b"{}").hexdigest(), owner, token),
+                )
+        conn.commit()
+    return ids
+
+
+def _on_server_loop(api, fn, *args):
+    async def call():
+        return await fn(*args)
+
+    return asyncio.run_coroutine_threadsafe(call(), api.loop).result(5)
+
+
+def _metric(url, name):
+    for line in requests.get(f"{url}/metrics").text.splitlines():
+        if line.startswith(f"{name} "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} not exported")
+
+
+def test_sdk_batch_writes_reach_the_api(api, database_url):
+    done, stale, failed = _seed_running(database_url, 3)
+    with FaultlineClient(api.url, retry=TransportRetry(max_retries=0)) as client:
+        completed = client.complete_many(
+            [CompleteRequest(job_id=done, fencing_token=1, result={"rows": 2}),
+             CompleteRequest(job_id=stale, fencing_token=0)],
+            worker_id="sdk-w",
+        )
+        failures = client.fail_many([FailRequest(job_id=failed, fencing_token=1, reason="boom")], worker_id="sdk-w")
+        job = client.session.get(f"{api.url}/jobs/{done}").json()
+
+    assert [(r.job_id, r.committed, r.stale_write_rejected, r.reason) for r in completed] == [
+        (done, True, False, "committed"),
+        (stale, False, True, "stale_token"),
+    ]
+    assert [(r.committed, r.state) for r in failures] == [(True, "queued")]
+    assert (job["state"], job["result"]) == ("succeeded", {"rows": 2})
+
+
+def test_exhausted_pool_is_503_and_counted(api, monkeypatch):
+    monkeypatch.setattr(api.db, "API_POOL_ACQUIRE_TIMEOUT", 0.2)
+    held = [_on_server_loop(api, api.db._pool.acquire) for _ in range(4)]
+    timeouts = _metric(api.url, "faultline_api_db_pool_timeouts_total")
+    try:
+        resp = requests.post(f"{api.url}/jobs", json={"payload": {"n": 1}})
+        in_use = _metric(api.url, "faultline_api_db_pool_in_use")
+    finally:
+        for conn in held:
+            _on_server_loop(api, api.db._pool.release, conn)
+
+    assert (resp.status_code, resp.json()["detail"]) == (503, "DB pool exhausted")
+    assert _metric(api.url, "faultline_api_db_pool_timeouts_total") == timeouts + 1
+    assert in_use == 4
+    assert requests.post(f"{api.url}/jobs", json={"payload": {"n": 1}}).status_code == 201
+    assert _metric(api.url, "faultline_api_db_pool_in_use") == 0
+
+
+def test_timeout_inside_a_request_is_not_reported_as_pool_exhaustion(api, monkeypatch):
+    async def timing_out_submit(*args):
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(api.module, "submit_job_async", timing_out_submit)
+    timeouts = _metric(api.url, "faultline_api_db_pool_timeouts_total")
+
+    resp = requests.post(f"{api.url}/jobs", json={"payload": {"n": 1}})
+
+    assert resp.status_code == 500
+    assert _metric(api.url, "faultline_api_db_pool_timeouts_total") == timeouts
+    assert _metric(api.url, "faultline_api_db_pool_in_use") == 0
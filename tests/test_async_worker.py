@@ -0,0 +1,131 @@
+"""
+tests/test_async_worker.py
+───────────────────────────
+asyncio worker runtime (services/worker/async_worker.py).
+
+Validates:
+  - Hundreds of I/O-bound jobs run concurrently on one event loop and each
+    commits exactly once under its claim token
+  - A failed execution goes through the same retry path as worker.py
+  - With LISTEN disabled, an idle worker on an empty queue polls instead of
+    crashing
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import psycopg2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CMD = [sys.executable, "-m", "services.worker.async_worker"]
+JOB_COUNT = 200
+WORK_SLEEP_SECONDS = 1.0
+
+
+def _db(url):
+    return psycopg2.connect(url)
+
+
+def _seed_jobs(database_url, count):
+    h = hashlib.sha256(b"{}").hexdigest()
+    job_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE jobs SET state='succeeded' WHERE state IN ('queued', 'running')")
+            for jid in job_ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, next_run_at)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, NOW())
+                    """,
+                    (jid, h),
+                )
+        conn.commit()
+    return job_ids
+
+
+def _run_until_done(database_url, job_ids, timeout_s, **extra):
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "MAX_LOOPS": "0",
+        "PYTHONPATH": REPO_ROOT,
+        **extra,
+    })
+    started = time.monotonic()
+    proc = subprocess.Popen(WORKER_CMD, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            with _db(database_url) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE id = ANY(%s::uuid[]) AND state <> 'succeeded'",
+                        (job_ids,),
+                    )
+                    if cur.fetchone()[0] == 0:
+                        break
+            time.sleep(0.1)
+        return time.monotonic() - started
+    finally:
+        proc.kill()
+        proc.communicate(timeout=5)
+
+
+def _outcomes(database_url, job_ids):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.state, j.attempts, COUNT(l.entry_id), MIN(l.fencing_token), j.fencing_token
+                FROM jobs j LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id
+                """,
+                (job_ids,),
+            )
+            return cur.fetchall()
+
+
+def test_async_worker_multiplexes_jobs_exactly_once(database_url):
+    job_ids = _seed_jobs(database_url, JOB_COUNT)
+    elapsed = _run_until_done(
+        database_url, job_ids, timeout_s=60,
+        WORKER_CONCURRENCY="100", WORK_SLEEP_SECONDS=str(WORK_SLEEP_SECONDS),
+    )
+
+    rows = _outcomes(database_url, job_ids)
+    assert len(rows) == JOB_COUNT
+    assert all(row == ("succeeded", 0, 1, 1, 1) for row in rows)
+    # Serially this is 200s of sleeping; two waves of 100 should take ~2s.
+    assert elapsed < 15, f"async worker took {elapsed:.1f}s"
+
+
+def test_async_worker_retries_failed_execution(database_url):
+    job_ids = _seed_jobs(database_url, 5)
+    _run_until_done(database_url, job_ids, timeout_s=20, SIMULATE_FAILURE="1", WORK_SLEEP_SECONDS="0")
+
+    rows = _outcomes(database_url, job_ids)
+    # Attempt 0 fails and is rescheduled; the retry succeeds under token 2.
+    assert all(row == ("succeeded", 1, 1, 2, 2) for row in rows)
+
+
+def test_async_worker_polls_empty_queue_without_listen(database_url):
+    _seed_jobs(database_url, 0)
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "MAX_LOOPS": "4",
+        "FAULTLINE_LISTEN": "0",
+        "PYTHONPATH": REPO_ROOT,
+    })
+    proc = subprocess.run(WORKER_CMD, cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=30)
+
+    assert proc.returncode == 0, proc.stderr
+    assert '"reason": "max_loops"' in proc.stdout
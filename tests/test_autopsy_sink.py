@@ -0,0 +1,88 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+from services.worker.autopsy import EventSink
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_sink_writes_every_event_once_in_order(tmp_path):
+    path = tmp_path / "autopsy.jsonl"
+    sink = EventSink(str(path), buffer_size=100_000)
+
+    def emit(worker):
+        for i in range(500):
+            sink.emit({"event": "tick", "worker": worker, "i": i})
+
+    threads = [threading.Thread(target=emit, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sink.flush(timeout=5)
+    sink.close()
+
+    records = _lines(path)
+    assert len(records) == 2000
+    for w in range(4):
+        assert [r["i"] for r in records if r["worker"] == w] == list(range(500))
+
+
+def test_sink_drops_instead_of_blocking_when_full(tmp_path):
+    path = tmp_path / "autopsy.jsonl"
+    sink = EventSink(str(path), buffer_size=1)
+    # Hold the writer so the buffer cannot drain.
+    with sink._write_lock:
+        accepted = sum(sink.emit({"event": "tick", "i": i}) for i in range(50))
+    sink.close()
+
+    assert sink.dropped == 50 - accepted
+    assert sink.dropped > 0
+    assert len(_lines(path)) == accepted
+
+
+def test_sink_rotates_by_size(tmp_path):
+    path = tmp_path / "autopsy.jsonl"
+    sink = EventSink(str(path), max_bytes=200, backup_count=2, background=False)
+    for i in range(40):
+        sink.emit({"event": "tick", "i": i})
+    sink.close()
+
+    assert (tmp_path / "autopsy.jsonl.1").exists()
+    assert (tmp_path / "autopsy.jsonl.2").exists()
+    assert not (tmp_path / "autopsy.jsonl.3").exists()
+    kept = _lines(tmp_path / "autopsy.jsonl.2") + _lines(tmp_path / "autopsy.jsonl.1") + _lines(path)
+    assert [r["i"] for r in kept] == list(range(kept[0]["i"], 40))
+
+
+_SIGTERM_CHILD = """
+import os, signal, sys, threading
+from services.worker.autopsy import EventSink
+
+sink = EventSink(sys.argv[1], buffer_size=1000)
+sink._write_lock.acquire()  # the writer cannot drain until the timer lets it
+for i in range(100):
+    sink.emit({"event": "tick", "i": i})
+threading.Timer(0.2, sink._write_lock.release).start()
+os.kill(os.getpid(), signal.SIGTERM)
+signal.pause()
+"""
+
+
+def test_sigterm_flushes_buffered_events_and_still_terminates(tmp_path):
+    path = tmp_path / "autopsy.jsonl"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.run(
+        [sys.executable, "-c", _SIGTERM_CHILD, str(path)],
+        cwd=root, env={**os.environ, "PYTHONPATH": root}, timeout=20,
+    )
+
+    assert child.returncode == -signal.SIGTERM
+    assert [r["i"] for r in _lines(path)] == list(range(100))
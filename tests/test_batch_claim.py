@@ -0,0 +1,112 @@
+"""
+tests/test_batch_claim.py
+──────────────────────────
+Batch lease acquisition: CLAIM_BATCH_SIZE > 1.
+
+Validates:
+  - Every job leased through claim_batch() reaches succeeded
+  - Exactly 1 ledger entry per job, bound to the token the batch claim issued
+  - Each job is fenced on its own (one epoch advance per job, no skips)
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import psycopg2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CMD = [sys.executable, "services/worker/worker.py"]
+JOB_COUNT = 60
+WORKER_COUNT = 2
+BATCH_SIZE = 8
+
+
+def _db(url):
+    return psycopg2.connect(url)
+
+
+def _seed_jobs(database_url, count):
+    h = hashlib.sha256(b"{}").hexdigest()
+    job_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            for jid in job_ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts,
+                                     max_attempts, next_run_at)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, NOW())
+                    """,
+                    (jid, h),
+                )
+        conn.commit()
+    return job_ids
+
+
+def _pending(database_url, job_ids):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM jobs WHERE id = ANY(%s::uuid[]) AND state IN ('queued', 'running')",
+                (job_ids,),
+            )
+            return cur.fetchone()[0]
+
+
+def _kill(p):
+    try:
+        if p.poll() is None:
+            p.kill()
+        p.communicate(timeout=3)
+    except Exception:
+        pass
+
+
+def test_batch_claim_exactly_once(database_url):
+    job_ids = _seed_jobs(database_url, JOB_COUNT)
+
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "WORK_SLEEP_SECONDS": "0",
+        "LEASE_SECONDS": "30",
+        "MAX_LOOPS": "0",
+        "CLAIM_BATCH_SIZE": str(BATCH_SIZE),
+        "PYTHONPATH": REPO_ROOT,
+    })
+    workers = [
+        subprocess.Popen(WORKER_CMD, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        for _ in range(WORKER_COUNT)
+    ]
+
+    deadline = time.time() + 60
+    try:
+        while time.time() < deadline and _pending(database_url, job_ids):
+            time.sleep(0.5)
+    finally:
+        for p in workers:
+            _kill(p)
+
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.state, j.fencing_token, COUNT(l.entry_id), MIN(l.fencing_token)
+                FROM jobs j
+                LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id
+                """,
+                (job_ids,),
+            )
+            rows = cur.fetchall()
+
+    assert len(rows) == JOB_COUNT
+    assert all(state == "succeeded" for state, _, _, _ in rows)
+    assert all(count == 1 for _, _, count, _ in rows), "duplicate or missing ledger entries"
+    assert all(ledger_token == token == 1 for _, token, _, ledger_token in rows)
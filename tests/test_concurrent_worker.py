@@ -0,0 +1,109 @@
+"""
+tests/test_concurrent_worker.py
+────────────────────────────────
+In-process concurrency: WORKER_CONCURRENCY > 1.
+
+Validates, for both the thread and the process executor:
+  - A single worker process keeps several jobs in flight
+  - Every job reaches succeeded with exactly 1 ledger entry
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import psycopg2
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CMD = [sys.executable, "services/worker/worker.py"]
+JOB_COUNT = 24
+CONCURRENCY = 6
+WORK_SLEEP_SECONDS = 0.5
+
+
+def _db(url):
+    return psycopg2.connect(url)
+
+
+def _seed_jobs(database_url, count):
+    h = hashlib.sha256(b"{}").hexdigest()
+    job_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            for jid in job_ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts,
+                                     max_attempts, next_run_at)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, NOW())
+                    """,
+                    (jid, h),
+                )
+        conn.commit()
+    return job_ids
+
+
+def _pending(database_url, job_ids):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM jobs WHERE id = ANY(%s::uuid[]) AND state IN ('queued', 'running')",
+                (job_ids,),
+            )
+            return cur.fetchone()[0]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_concurrent_worker_exactly_once(database_url, executor):
+    # Drain leftovers from other tests so timing reflects only our jobs.
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE jobs SET state='succeeded' WHERE state IN ('queued', 'running')")
+        conn.commit()
+    job_ids = _seed_jobs(database_url, JOB_COUNT)
+
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "WORK_SLEEP_SECONDS": str(WORK_SLEEP_SECONDS),
+        "LEASE_SECONDS": "30",
+        "MAX_LOOPS": "0",
+        "WORKER_CONCURRENCY": str(CONCURRENCY),
+        "WORKER_EXECUTOR": executor,
+        "PYTHONPATH": REPO_ROOT,
+    })
+    started = time.monotonic()
+    worker = subprocess.Popen(WORKER_CMD, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline and _pending(database_url, job_ids):
+            time.sleep(0.2)
+        elapsed = time.monotonic() - started
+    finally:
+        if worker.poll() is None:
+            worker.kill()
+        worker.communicate(timeout=5)
+
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.state, COUNT(l.entry_id)
+                FROM jobs j
+                LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id
+                """,
+                (job_ids,),
+            )
+            rows = cur.fetchall()
+
+    assert all(state == "succeeded" for state, _ in rows)
+    assert all(count == 1 for _, count in rows), "duplicate or missing ledger entries"
+    # Serial execution would need JOB_COUNT * WORK_SLEEP_SECONDS = 12s.
+    assert elapsed < JOB_COUNT * WORK_SLEEP_SECONDS / 2
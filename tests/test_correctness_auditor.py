@@ -0,0 +1,72 @@
+"""
+tests/test_correctness_auditor.py
+──────────────────────────────────
+Incremental correctness audit (services/auditor/correctness_auditor.py).
+
+Validates that a second run folds only new artifacts into the stored report:
+  - artifacts older than the mtime watermark are not re-read
+  - an artifact written at exactly the watermark mtime is read once; the
+    ones already seen at that mtime are not counted again
+  - totals, heatmap and details accumulate across runs; --full recounts
+"""
+
+import importlib
+import json
+import os
+
+import pytest
+
+WATERMARK_NS = 1_700_000_000_000_000_000
+
+
+@pytest.fixture
+def auditor(tmp_path, monkeypatch):
+    # The auditor works on paths relative to the current directory.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "artifacts" / "races").mkdir(parents=True)
+    (tmp_path / "artifacts" / "reports").mkdir()
+    return importlib.import_module("services.auditor.correctness_auditor")
+
+
+def _artifact(name, mtime_ns, token=1, log=""):
+    path = os.path.join("artifacts", "races", name)
+    with open(path, "w") as f:
+        json.dump({"job_id": name, "final_state": {"fencing_token": token}, "worker_a_log": log}, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _report():
+    with open(os.path.join("artifacts", "reports", "correctness_audit.json")) as f:
+        return json.load(f)
+
+
+def test_second_run_folds_in_only_new_artifacts(auditor):
+    _artifact("old.json", WATERMARK_NS - 10, token=2)
+    _artifact("a.json", WATERMARK_NS, log="duplicate commit")
+    auditor.main()
+    first = _report()
+    state = auditor.load_state()
+    assert (state["watermark_ns"], state["seen"]) == (WATERMARK_NS, ["a.json"])
+
+    # Same mtime as the watermark, but not seen yet; old.json and a.json are.
+    _artifact("b.json", WATERMARK_NS, log="stale write rejected")
+    _artifact("c.json", WATERMARK_NS + 5, token=2, log="retry 1")
+    auditor.main()
+    second = _report()
+    state = auditor.load_state()
+
+    assert first["total_runs"] == 2
+    assert second == {
+        "total_runs": 4,
+        "violations_detected": 1,
+        "near_miss_races_detected": 1,
+        "correctness_heatmap": {"lease_reclaim": 2, "stale_write_attempt": 1, "retry_pressure": 1},
+        "details": [{"job_id": "a.json", "type": "duplicate_commit"}],
+    }
+    assert (state["watermark_ns"], state["seen"]) == (WATERMARK_NS + 5, ["c.json"])
+
+    auditor.main()
+    assert _report() == second
+
+    auditor.main(full=True)
+    assert _report()["total_runs"] == 4
@@ -0,0 +1,75 @@
+"""
+tests/test_fenced_commit.py
+────────────────────────────
+Single-statement fenced commit (mark_succeeded).
+
+Validates each status the fused CTE can return:
+  - current owner, current token, live lease → ledger entry + succeeded
+  - superseded token                        → stale_token, nothing written
+  - expired lease                           → lease_expired, nothing written
+  - token matches but job no longer owned   → stale_commit, nothing written
+"""
+
+import hashlib
+import importlib
+import uuid
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture
+def worker(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    return importlib.import_module("services.worker.worker")
+
+
+def _seed(cur, owner, token=2, state="running", lease="NOW() + interval '30 seconds'"):
+    job_id = str(uuid.uuid4())
+    cur.execute(
+        f"""
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                          lease_owner, lease_expires_at, fencing_token)
+        VALUES (%s, '{{}}', %s, %s, 0, 3, %s, {lease}, %s)
+        """,
+        (job_id, hashlib.sha256(b"{}").hexdigest(), state, owner, token),
+    )
+    return job_id
+
+
+def _commit(worker, database_url, token, **seed):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            job_id = _seed(cur, worker.WORKER_ID, **seed)
+        conn.commit()
+        with conn.cursor() as cur:
+            try:
+                worker.mark_succeeded(cur, job_id, token)
+                conn.commit()
+                error = None
+            except RuntimeError as exc:
+                conn.rollback()
+                error = str(exc)
+            cur.execute("SELECT state FROM jobs WHERE id=%s", (job_id,))
+            state = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM ledger_entries WHERE job_id=%s", (job_id,))
+            ledger = cur.fetchone()[0]
+    return error, state, ledger
+
+
+def test_fenced_commit_succeeds_for_current_owner(worker, database_url):
+    assert _commit(worker, database_url, token=2) == (None, "succeeded", 1)
+
+
+def test_fenced_commit_rejects_superseded_token(worker, database_url):
+    assert _commit(worker, database_url, token=1) == ("stale_token", "running", 0)
+
+
+def test_fenced_commit_rejects_expired_lease(worker, database_url):
+    error = _commit(worker, database_url, token=2, lease="NOW() - interval '1 second'")
+    assert error == ("lease_expired", "running", 0)
+
+
+def test_fenced_commit_rejects_released_lease(worker, database_url):
+    error = _commit(worker, database_url, token=2, state="queued", lease="NULL")
+    assert error == ("stale_commit", "queued", 0)
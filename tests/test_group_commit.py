@@ -0,0 +1,138 @@
+"""
+tests/test_group_commit.py
+───────────────────────────
+Group commit of completed jobs (FAULTLINE_GROUP_COMMIT=1).
+
+Validates:
+  - One group transaction reports a per-job outcome: a stale job is
+    rejected on its own and the rest of the group still commits
+  - A concurrent worker committing through the group stage keeps
+    exactly-once ledger semantics
+"""
+
+import hashlib
+import importlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import psycopg2
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CMD = [sys.executable, "services/worker/worker.py"]
+JOB_COUNT = 40
+
+
+@pytest.fixture
+def worker(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    return importlib.import_module("services.worker.worker")
+
+
+def _db(url):
+    return psycopg2.connect(url)
+
+
+def _seed(cur, state, owner=None, token=0):
+    job_id = str(uuid.uuid4())
+    lease = "NOW() + interval '30 seconds'" if state == "running" else "NULL"
+    cur.execute(
+        f"""
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                          lease_owner, lease_expires_at, fencing_token, next_run_at)
+        VALUES (%s, '{{}}', %s, %s, 0, 3, %s, {lease}, %s, NOW())
+        """,
+        (job_id, hashlib.sha256(b"{}").hexdigest(), state, owner, token),
+    )
+    return job_id
+
+
+def test_group_reports_per_job_outcomes(worker, database_url):
+    from services.worker.group_commit import GroupCommitter
+
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            owned = [_seed(cur, "running", worker.WORKER_ID, token=1) for _ in range(5)]
+            stale = _seed(cur, "running", worker.WORKER_ID, token=3)
+        conn.commit()
+
+    committer = GroupCommitter(worker.fenced_commit, max_batch=16, window_seconds=0.2).start()
+    try:
+        futures = {job_id: committer.submit(job_id, 1) for job_id in owned}
+        futures[stale] = committer.submit(stale, 2)
+        results = {job_id: fut.result(timeout=10) for job_id, fut in futures.items()}
+    finally:
+        committer.stop()
+
+    assert all(results[job_id] == (1, "ok") for job_id in owned)
+    assert results[stale] == (3, "stale_token")
+
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.id::text, j.state, COUNT(l.entry_id)
+                FROM jobs j LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id
+                """,
+                (owned + [stale],),
+            )
+            rows = {job_id: (state, count) for job_id, state, count in cur.fetchall()}
+
+    assert all(rows[job_id] == ("succeeded", 1) for job_id in owned)
+    assert rows[stale] == ("running", 0)
+
+
+def test_concurrent_worker_group_commit_exactly_once(database_url):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            job_ids = [_seed(cur, "queued") for _ in range(JOB_COUNT)]
+        conn.commit()
+
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "WORK_SLEEP_SECONDS": "0.1",
+        "MAX_LOOPS": "0",
+        "WORKER_CONCURRENCY": "8",
+        "FAULTLINE_GROUP_COMMIT": "1",
+        "FAULTLINE_GROUP_COMMIT_WINDOW_MS": "20",
+        "PYTHONPATH": REPO_ROOT,
+    })
+    proc = subprocess.Popen(WORKER_CMD, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            with _db(database_url) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE id = ANY(%s::uuid[]) AND state <> 'succeeded'",
+                        (job_ids,),
+                    )
+                    if cur.fetchone()[0] == 0:
+                        break
+            time.sleep(0.2)
+    finally:
+        proc.kill()
+        proc.communicate(timeout=5)
+
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.state, COUNT(l.entry_id), MIN(l.fencing_token)
+                FROM jobs j LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id
+                """,
+                (job_ids,),
+            )
+            rows = cur.fetchall()
+
+    assert len(rows) == JOB_COUNT
+    assert all(row == ("succeeded", 1, 1) for row in rows)
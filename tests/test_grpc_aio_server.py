@@ -0,0 +1,198 @@
+"""
+tests/test_grpc_aio_server.py
+──────────────────────────────
+asyncio gRPC worker service (services/worker/grpc/aio_server.py).
+
+Validates:
+  - the unary RPCs keep the threaded server's semantics: submit, pinned
+    claim, fenced completion (a stale token is rejected), lookup
+  - GetJob still finds a job after the archiver moved it to jobs_history
+  - far more concurrent lease streams than pool connections are each
+    served their credit, and their leases go back to the queue when they end
+  - every RPC is observed in faultline_grpc_rpc_seconds by method and code
+  - the dispatcher task survives an unexpected error and keeps serving
+"""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from pathlib import Path
+
+import grpc
+import psycopg2
+import pytest
+
+GRPC_DIR = Path(__file__).resolve().parents[1] / "services" / "worker" / "grpc"
+
+
+@pytest.fixture
+def aio(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.syspath_prepend(str(GRPC_DIR))
+    from services.worker.grpc import aio_server
+
+    return aio_server
+
+
+def _run(aio, database_url, scenario, pool_size=4):
+    """Serve on an ephemeral port and run scenario(stub, pb2) against it on one event loop."""
+
+    async def main():
+        pool = await aio.asyncpg.create_pool(database_url, min_size=1, max_size=pool_size)
+        server, service = aio.build_server(pool, database_url)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = aio.worker_pb2_grpc.FaultlineWorkerStub(channel)
+                return await scenario(stub, aio.worker_pb2)
+        finally:
+            await server.stop(None)
+            await service.dispatcher.close()
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def _seed(database_url, n):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            for job_id in ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, 0)
+                    """,
+                    (job_id, hashlib.sha256(b"{}").hexdigest()),
+                )
+        conn.commit()
+    return ids
+
+
+def _samples(aio, method, code):
+    metric = aio.metrics.grpc_rpc_seconds.labels(method=method, code=code)
+    return next(s.value for s in metric.collect()[0].samples if s.name.endswith("_count"))
+
+
+def test_unary_rpcs_keep_fencing_semantics(aio, database_url):
+    async def scenario(stub, pb2):
+        submitted = await stub.SubmitJob(pb2.SubmitJobRequest(payload='{"n": 1}'))
+        claimed = await stub.ClaimNextJob(pb2.ClaimNextJobRequest(
+            worker_id="aio-1", lease_seconds=30, force_job_id=submitted.job_id
+        ))
+        stale = await stub.CompleteJob(pb2.CompleteJobRequest(
+            worker_id="aio-1", job_id=claimed.job_id, fencing_token=claimed.fencing_token - 1
+        ))
+        done = await stub.CompleteJob(pb2.CompleteJobRequest(
+            worker_id="aio-1", job_id=claimed.job_id, fencing_token=claimed.fencing_token
+        ))
+        job = await stub.GetJob(pb2.GetJobRequest(job_id=submitted.job_id))
+        with pytest.raises(grpc.aio.AioRpcError) as missing:
+            await stub.GetJob(pb2.GetJobRequest(job_id=str(uuid.uuid4())))
+        return submitted, claimed, stale, done, job, missing.value.code()
+
+    submitted, claimed, stale, done, job, missing = _run(aio, database_url, scenario)
+
+    assert (claimed.claimed, claimed.job_id, claimed.lease_owner) == (True, submitted.job_id, "aio-1")
+    assert json.loads(claimed.payload) == {"n": 1}
+    assert (stale.ok, done.ok, done.state) == (False, True, "succeeded")
+    assert (job.state, job.fencing_token) == ("succeeded", claimed.fencing_token)
+    assert missing == grpc.StatusCode.NOT_FOUND
+
+
+def test_get_job_reads_archived_jobs(aio, database_url):
+    from services.worker import archiver
+
+    (job_id,) = _seed(database_url, 1)
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE jobs SET state='succeeded', updated_at = NOW() - interval '30 days' WHERE id=%s", (job_id,)
+            )
+        conn.commit()
+    archiver.archive_terminal_jobs(after_seconds=7 * 24 * 3600)
+
+    async def scenario(stub, pb2):
+        return await stub.GetJob(pb2.GetJobRequest(job_id=job_id))
+
+    job = _run(aio, database_url, scenario)
+
+    assert (job.job_id, job.state, job.fencing_token) == (job_id, "succeeded", 0)
+
+
+def test_many_streams_share_a_small_pool(aio, database_url):
+    n = 50
+    _seed(database_url, n)
+
+    async def scenario(stub, pb2):
+        # Nobody hangs up before every stream holds its job, or a released job could be leased twice.
+        all_leased = asyncio.Barrier(n)
+
+        async def one(i):
+            call = stub.StreamLeases()
+            await call.write(pb2.LeaseStreamRequest(
+                hello=pb2.LeaseStreamHello(worker_id=f"aio-stream-{i}", lease_seconds=30, credit=1)
+            ))
+            msg = await asyncio.wait_for(call.read(), 10)
+            await all_leased.wait()
+            await call.done_writing()
+            rest = []
+            while (more := await call.read()) is not grpc.aio.EOF:
+                rest.append(more)
+            return msg.job.job_id, rest
+
+        return await asyncio.gather(*(one(i) for i in range(n)))
+
+    received = _run(aio, database_url, scenario, pool_size=2)
+    ids = [job_id for job_id, _ in received]
+
+    assert len(set(ids)) == n
+    assert all(rest == [] for _, rest in received)
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT state, lease_owner FROM jobs WHERE id = ANY(%s::uuid[])", (ids,))
+            assert set(cur.fetchall()) == {("queued", None)}
+
+
+def test_rpc_latency_is_observed_by_method_and_code(aio, database_url):
+    before = (_samples(aio, "GetJob", "OK"), _samples(aio, "GetJob", "NOT_FOUND"))
+    (job_id,) = _seed(database_url, 1)
+
+    async def scenario(stub, pb2):
+        await stub.GetJob(pb2.GetJobRequest(job_id=job_id))
+        with pytest.raises(grpc.aio.AioRpcError):
+            await stub.GetJob(pb2.GetJobRequest(job_id=str(uuid.uuid4())))
+
+    _run(aio, database_url, scenario)
+
+    after = (_samples(aio, "GetJob", "OK"), _samples(aio, "GetJob", "NOT_FOUND"))
+    assert (after[0] - before[0], after[1] - before[1]) == (1, 1)
+
+
+def test_dispatcher_survives_unexpected_errors(aio, database_url, monkeypatch):
+    original = aio.AsyncLeaseDispatcher.dispatch_once
+    errors = [RuntimeError("boom")]
+
+    async def flaky(self):
+        if errors:
+            raise errors.pop(0)
+        return await original(self)
+
+    monkeypatch.setattr(aio.AsyncLeaseDispatcher, "dispatch_once", flaky)
+    _seed(database_url, 1)
+
+    async def scenario(stub, pb2):
+        call = stub.StreamLeases()
+        await call.write(pb2.LeaseStreamRequest(
+            hello=pb2.LeaseStreamHello(worker_id=f"aio-flaky-{uuid.uuid4().hex[:8]}", lease_seconds=30, credit=1)
+        ))
+        msg = await asyncio.wait_for(call.read(), 10)
+        await call.done_writing()
+        return msg
+
+    msg = _run(aio, database_url, scenario)
+
+    assert errors == []
+    assert msg.WhichOneof("msg") == "job"
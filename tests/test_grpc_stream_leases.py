@@ -0,0 +1,216 @@
+"""
+tests/test_grpc_stream_leases.py
+─────────────────────────────────
+StreamLeases on the gRPC worker service (services/worker/grpc/server.py).
+
+Validates:
+  - a stream receives exactly one job per unit of credit, leased to its
+    worker, and each completion is acked and committed
+  - one pooled dispatcher serves several streams, splitting claims by credit
+  - a heartbeat renews the stream's leases and reports the ones it lost
+  - leases a stream still holds go back to the queue when it ends
+  - the dispatcher thread survives non-operational errors and keeps serving
+  - GetJob still finds a job after the archiver moved it to jobs_history
+"""
+
+import hashlib
+import queue
+import threading
+import time
+import uuid
+from concurrent import futures
+from pathlib import Path
+
+import grpc
+import psycopg2
+import pytest
+
+GRPC_DIR = Path(__file__).resolve().parents[1] / "services" / "worker" / "grpc"
+
+
+@pytest.fixture
+def stub(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.syspath_prepend(str(GRPC_DIR))
+    from services.worker.grpc import server as grpc_server
+
+    srv = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    grpc_server.worker_pb2_grpc.add_FaultlineWorkerServicer_to_server(grpc_server.FaultlineWorkerService(), srv)
+    port = srv.add_insecure_port("127.0.0.1:0")
+    srv.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    try:
+        yield grpc_server.worker_pb2_grpc.FaultlineWorkerStub(channel), grpc_server.worker_pb2
+    finally:
+        channel.close()
+        srv.stop(None)
+
+
+def _open(stub, worker_id, credit=0, lease_seconds=30):
+    """Start a StreamLeases call; returns send(**msg), recv(timeout) and close() (half-close)."""
+    service, pb2 = stub
+    requests = queue.Queue()
+    requests.put(pb2.LeaseStreamRequest(
+        hello=pb2.LeaseStreamHello(worker_id=worker_id, lease_seconds=lease_seconds, credit=credit)
+    ))
+    responses = service.StreamLeases(iter(requests.get, None))
+    inbox = queue.Queue()
+
+    def pump():
+        try:
+            for response in responses:
+                inbox.put(response)
+        except grpc.RpcError:
+            pass
+        inbox.put(None)
+
+    threading.Thread(target=pump, daemon=True).start()
+
+    def send(**msg):
+        requests.put(pb2.LeaseStreamRequest(**msg))
+
+    def recv(timeout=5):
+        try:
+            return inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    return send, recv, lambda: requests.put(None)
+
+
+def _seed(database_url, n):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            for _ in range(n):
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, 0)
+                    """,
+                    (str(uuid.uuid4()), hashlib.sha256(b"{}").hexdigest()),
+                )
+        conn.commit()
+
+
+def _rows(database_url, ids):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id::text, state, lease_owner FROM jobs WHERE id = ANY(%s::uuid[])", (list(ids),)
+            )
+            return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def test_stream_receives_one_job_per_credit_and_commits_completions(stub, database_url):
+    _seed(database_url, 5)
+    worker_id = f"stream-{uuid.uuid4().hex[:8]}"
+    send, recv, close = _open(stub, worker_id, credit=3)
+
+    jobs = [recv() for _ in range(3)]
+    assert all(msg is not None and msg.WhichOneof("msg") == "job" for msg in jobs)
+    assert recv(timeout=0.5) is None
+
+    tokens = {msg.job.job_id: msg.job.fencing_token for msg in jobs}
+    assert {job_id: owner for job_id, (_, owner) in _rows(database_url, tokens).items()} == {
+        job_id: worker_id for job_id in tokens
+    }
+    for job_id, token in tokens.items():
+        send(complete=stub[1].LeaseComplete(job_id=job_id, fencing_token=token))
+    acks = [recv() for _ in tokens]
+    close()
+
+    assert {ack.completed.job_id: (ack.completed.ok, ack.completed.state) for ack in acks} == {
+        job_id: (True, "succeeded") for job_id in tokens
+    }
+    assert {state for state, _ in _rows(database_url, tokens).values()} == {"succeeded"}
+
+
+def test_dispatcher_splits_claims_across_streams(stub, database_url):
+    _seed(database_url, 6)
+    streams = [_open(stub, f"stream-{uuid.uuid4().hex[:8]}") for _ in range(2)]
+    for send, _, _ in streams:
+        send(credit=stub[1].LeaseCredit(jobs=2))
+
+    received = [[recv().job.job_id for _ in range(2)] for _, recv, _ in streams]
+    for _, _, close in streams:
+        close()
+
+    assert len({job_id for ids in received for job_id in ids}) == 4
+
+
+def test_heartbeat_renews_and_reports_lost_leases(stub, database_url):
+    _seed(database_url, 2)
+    send, recv, close = _open(stub, f"stream-{uuid.uuid4().hex[:8]}", credit=2, lease_seconds=5)
+    kept, stolen = (recv().job for _ in range(2))
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE jobs SET fencing_token = fencing_token + 1 WHERE id = %s", (stolen.job_id,))
+        conn.commit()
+
+    send(heartbeat=stub[1].LeaseHeartbeat())
+    renewed = recv().renewed
+    close()
+
+    assert renewed.renewed == 1
+    assert list(renewed.lost_job_ids) == [stolen.job_id]
+
+
+def test_ended_stream_releases_held_leases(stub, database_url):
+    _seed(database_url, 2)
+    send, recv, close = _open(stub, f"stream-{uuid.uuid4().hex[:8]}", credit=2)
+    ids = [recv().job.job_id for _ in range(2)]
+    close()
+    assert recv() is None
+
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        rows = _rows(database_url, ids)
+        if all(row == ("queued", None) for row in rows.values()):
+            break
+        time.sleep(0.05)
+    assert rows == {job_id: ("queued", None) for job_id in ids}
+
+
+def test_dispatcher_survives_unexpected_errors(stub, database_url, monkeypatch):
+    from services.worker.grpc import server as grpc_server
+
+    original = grpc_server.LeaseDispatcher.dispatch_once
+    errors = [psycopg2.InterfaceError("connection already closed"), RuntimeError("boom")]
+
+    def flaky(self):
+        if errors:
+            raise errors.pop(0)
+        return original(self)
+
+    monkeypatch.setattr(grpc_server.LeaseDispatcher, "dispatch_once", flaky)
+    _seed(database_url, 1)
+    send, recv, close = _open(stub, f"stream-{uuid.uuid4().hex[:8]}", credit=1)
+    leased = recv(timeout=10)
+    close()
+
+    assert errors == []
+    assert leased is not None and leased.WhichOneof("msg") == "job"
+
+
+def test_get_job_reads_archived_jobs(stub, database_url):
+    from services.worker import archiver
+
+    service, pb2 = stub
+    job_id = str(uuid.uuid4())
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token, updated_at)
+                VALUES (%s, '{}', %s, 'succeeded', 1, 3, 1, NOW() - interval '30 days')
+                """,
+                (job_id, hashlib.sha256(b"{}").hexdigest()),
+            )
+        conn.commit()
+    archiver.archive_terminal_jobs(after_seconds=7 * 24 * 3600)
+
+    job = service.GetJob(pb2.GetJobRequest(job_id=job_id))
+
+    assert _rows(database_url, [job_id]) == {}
+    assert (job.job_id, job.state, job.fencing_token) == (job_id, "succeeded", 1)
@@ -0,0 +1,143 @@
+"""
+tests/test_job_archive.py
+──────────────────────────
+Terminal-job archival (migration 026, services/worker/archiver.py).
+
+Validates:
+  - a pass moves only jobs terminal for longer than after_seconds, with their
+    ledger entries, into the history tables, in batches smaller than the backlog,
+    and keeps the state counters exact
+  - rows another transaction holds locked are skipped, not waited on
+  - retention drops whole daily partitions of both history tables
+"""
+
+import hashlib
+import importlib
+import uuid
+
+import psycopg2
+import pytest
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def archiver(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    return importlib.import_module("services.worker.archiver")
+
+
+def _seed(cur, state, age_days, ledger=False):
+    job_id = str(uuid.uuid4())
+    cur.execute(
+        """
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token, updated_at)
+        VALUES (%s, '{"k": 1}', %s, %s, 1, 3, 1, NOW() - make_interval(days => %s))
+        """,
+        (job_id, hashlib.sha256(b'{"k": 1}').hexdigest(), state, age_days),
+    )
+    if ledger:
+        cur.execute(
+            "INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta) VALUES (%s, 1, 'default', 1)",
+            (job_id,),
+        )
+    return job_id
+
+
+def _where(cur, ids):
+    cur.execute("SELECT id::text FROM jobs WHERE id = ANY(%s::uuid[])", (ids,))
+    live = {row[0] for row in cur.fetchall()}
+    cur.execute("SELECT id::text FROM jobs_history WHERE id = ANY(%s::uuid[])", (ids,))
+    archived = {row[0] for row in cur.fetchall()}
+    return live, archived
+
+
+def _counts_match(cur):
+    cur.execute("SELECT state, SUM(n) FROM job_state_counts GROUP BY state HAVING SUM(n) <> 0")
+    counted = dict(cur.fetchall())
+    cur.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+    return counted == dict(cur.fetchall())
+
+
+def test_pass_archives_old_terminal_jobs_with_ledger_entries(archiver, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            succeeded = [_seed(cur, "succeeded", 30, ledger=True) for _ in range(12)]
+            failed = [_seed(cur, "failed", 30) for _ in range(3)]
+            recent = _seed(cur, "succeeded", 1, ledger=True)
+            queued = _seed(cur, "queued", 30)
+        conn.commit()
+
+    result = archiver.archive_terminal_jobs(batch_size=4, after_seconds=7 * DAY, retention_days=0)
+
+    assert result["archived"] >= 15
+    assert result["ledger_entries"] >= 12
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            live, archived = _where(cur, succeeded + failed + [recent, queued])
+            cur.execute(
+                "SELECT COUNT(*) FROM ledger_entries_history WHERE job_id = ANY(%s::uuid[])", (succeeded,)
+            )
+            ledger_archived = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM ledger_entries WHERE job_id = ANY(%s::uuid[])", (succeeded,))
+            ledger_live = cur.fetchone()[0]
+            cur.execute("SELECT state, payload FROM jobs_history WHERE id = %s", (failed[0],))
+            failed_row = cur.fetchone()
+            assert _counts_match(cur)
+
+    assert archived == set(succeeded + failed)
+    assert live == {recent, queued}
+    assert (ledger_archived, ledger_live) == (12, 0)
+    assert failed_row == ("failed", {"k": 1})
+
+
+def test_locked_rows_are_skipped(archiver, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            free = [_seed(cur, "succeeded", 30) for _ in range(3)]
+            locked = _seed(cur, "succeeded", 30)
+        conn.commit()
+
+    holder = psycopg2.connect(database_url)
+    try:
+        with holder.cursor() as cur:
+            cur.execute("SELECT 1 FROM jobs WHERE id=%s FOR UPDATE", (locked,))
+        archiver.archive_terminal_jobs(batch_size=100, after_seconds=7 * DAY, retention_days=0)
+    finally:
+        holder.rollback()
+        holder.close()
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            live, archived = _where(cur, free + [locked])
+    assert archived == set(free)
+    assert live == {locked}
+
+
+def test_retention_drops_whole_daily_partitions(archiver, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT (NOW() AT TIME ZONE 'UTC')::date - 120, (NOW() AT TIME ZONE 'UTC')::date - 10")
+            old_day, kept_day = cur.fetchone()
+            for day in (old_day, kept_day):
+                cur.execute("SELECT job_history_create_partitions(%s)", (day,))
+            cur.execute(
+                """
+                INSERT INTO ledger_entries_history (entry_id, job_id, fencing_token, account_id, delta,
+                                                    created_at, archived_at)
+                VALUES (1, %s, 1, 'default', 1, NOW(), (%s::date + time '12:00') AT TIME ZONE 'UTC')
+                """,
+                (str(uuid.uuid4()), old_day),
+            )
+            dropped = archiver.drop_expired_partitions(cur, retention_days=90)
+            cur.execute(
+                "SELECT to_regclass(%s), to_regclass(%s)",
+                (f"jobs_history_{old_day:%Y%m%d}", f"jobs_history_{kept_day:%Y%m%d}"),
+            )
+            old_part, kept_part = cur.fetchone()
+        conn.commit()
+
+    assert f"jobs_history_{old_day:%Y%m%d}" in dropped
+    assert f"ledger_entries_history_{old_day:%Y%m%d}" in dropped
+    assert not any(name.endswith(f"{kept_day:%Y%m%d}") for name in dropped)
+    assert (old_part, kept_part) == (None, f"jobs_history_{kept_day:%Y%m%d}")
@@ -0,0 +1,213 @@
+"""
+tests/test_job_completion.py
+─────────────────────────────
+Fenced batch completion and failure (services/common/completion.py,
+migration 027), and the CompleteJobs / FailJobs RPCs that serve it.
+
+Validates:
+  - each item of one batch is fenced on its own: a current lease commits,
+    while a stale token, a foreign owner, an expired lease or an unknown job
+    is reported without affecting the rest
+  - a current and a stale token for the same job in one batch get their
+    own verdicts, for completion and failure alike
+  - a completion's result is stored once, and repeating a committed
+    completion reports it as committed again without a second ledger entry
+  - a failure requeues with backoff while attempts remain, else ends failed
+  - the asyncpg variant gives the same verdicts
+  - CompleteJobs / FailJobs return one result per item, in request order
+"""
+
+import asyncio
+import hashlib
+import uuid
+from concurrent import futures
+from pathlib import Path
+
+import asyncpg
+import grpc
+import psycopg2
+import pytest
+
+from services.common.completion import InvalidJobId, complete_jobs, complete_jobs_async, fail_jobs
+
+GRPC_DIR = Path(__file__).resolve().parents[1] / "services" / "worker" / "grpc"
+
+
+def _seed(cur, owner="w1", token=1, attempts=0, max_attempts=3, lease_seconds=30):
+    job_id = str(uuid.uuid4())
+    cur.execute(
+        """
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                          lease_owner, fencing_token, lease_expires_at)
+        VALUES (%s, '{}', %s, 'running', %s, %s, %s, %s, NOW() + make_interval(secs => %s))
+        """,
+        (job_id, hashlib.sha256(b"{}").hexdigest(), attempts, max_attempts, owner, token, lease_seconds),
+    )
+    return job_id
+
+
+def _verdicts(results):
+    return [(r.job_id, r.committed, r.stale_write_rejected, r.reason) for r in results]
+
+
+def test_items_are_fenced_independently(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            current = _seed(cur)
+            stale = _seed(cur, token=2)
+            foreign = _seed(cur, owner="w2")
+            expired = _seed(cur, lease_seconds=-1)
+            missing = str(uuid.uuid4())
+            results = complete_jobs(
+                cur,
+                [(current, 1, None), (stale, 1, None), (foreign, 1, None), (expired, 1, None), (missing, 1, None)],
+                owner="w1",
+            )
+            cur.execute(
+                "SELECT id::text, state FROM jobs WHERE id = ANY(%s::uuid[])",
+                ([current, stale, foreign, expired],),
+            )
+            states = dict(cur.fetchall())
+            cur.execute("SELECT job_id::text FROM ledger_entries WHERE job_id = ANY(%s::uuid[])",
+                        ([current, stale, foreign, expired],))
+            ledger = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+    assert _verdicts(results) == [
+        (current, True, False, "committed"),
+        (stale, False, True, "stale_token"),
+        (foreign, False, True, "not_owner"),
+        (expired, False, True, "lease_expired"),
+        (missing, False, False, "not_found"),
+    ]
+    assert states == {current: "succeeded", stale: "running", foreign: "running", expired: "running"}
+    assert ledger == [current]
+
+
+def test_same_job_with_current_and_stale_token_in_one_batch(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            completed = _seed(cur, token=5)
+            failed = _seed(cur, token=5)
+            completions = complete_jobs(cur, [(completed, 4, None), (completed, 5, None)], owner="w1")
+            failures = fail_jobs(cur, [(failed, 5, "boom"), (failed, 4, "late")], owner="w1")
+            cur.execute("SELECT fencing_token FROM ledger_entries WHERE job_id = %s", (completed,))
+            ledger = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+    assert _verdicts(completions) == [
+        (completed, False, True, "stale_token"),
+        (completed, True, False, "committed"),
+    ]
+    assert _verdicts(failures) == [
+        (failed, True, False, "committed"),
+        (failed, False, True, "stale_token"),
+    ]
+    assert ledger == [5]
+
+
+def test_result_is_stored_and_repeat_is_committed_once(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            job_id = _seed(cur)
+            first = complete_jobs(cur, [(job_id, 1, {"rows": 3})])
+        conn.commit()
+        with conn.cursor() as cur:
+            again = complete_jobs(cur, [(job_id, 1, {"rows": 4})])
+            cur.execute("SELECT result FROM job_results WHERE job_id = %s", (job_id,))
+            result = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM ledger_entries WHERE job_id = %s", (job_id,))
+            entries = cur.fetchone()[0]
+        conn.commit()
+
+    assert (first[0].reason, first[0].state) == ("committed", "succeeded")
+    assert (again[0].committed, again[0].reason) == (True, "duplicate")
+    assert (result, entries) == ({"rows": 3}, 1)
+
+
+def test_failure_requeues_until_attempts_run_out(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            retried = _seed(cur, attempts=0, max_attempts=3)
+            exhausted = _seed(cur, attempts=2, max_attempts=3)
+            results = fail_jobs(cur, [(retried, 1, "boom"), (exhausted, 1, "x" * 600)], owner="w1")
+            cur.execute(
+                """
+                SELECT id::text, state, attempts, lease_owner, length(last_error), next_run_at > NOW()
+                FROM jobs WHERE id = ANY(%s::uuid[])
+                """,
+                ([retried, exhausted],),
+            )
+            rows = {row[0]: row[1:] for row in cur.fetchall()}
+        conn.commit()
+
+    assert [(r.committed, r.state) for r in results] == [(True, "queued"), (True, "failed")]
+    assert rows[retried] == ("queued", 1, None, 4, True)
+    assert rows[exhausted][:4] == ("failed", 3, None, 500)
+
+
+def test_invalid_job_id_rejects_the_batch(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            with pytest.raises(InvalidJobId):
+                complete_jobs(cur, [("not-a-uuid", 1, None)])
+
+
+def test_async_variant_matches(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            current, stale = _seed(cur), _seed(cur, token=5)
+        conn.commit()
+
+    async def run():
+        conn = await asyncpg.connect(database_url)
+        try:
+            return await complete_jobs_async(conn, [(current, 1, {"ok": True}), (stale, 4, None)], owner="w1")
+        finally:
+            await conn.close()
+
+    results = asyncio.run(run())
+    assert _verdicts(results) == [(current, True, False, "committed"), (stale, False, True, "stale_token")]
+
+
+@pytest.fixture
+def stub(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.syspath_prepend(str(GRPC_DIR))
+    from services.worker.grpc import server as grpc_server
+
+    srv = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    grpc_server.worker_pb2_grpc.add_FaultlineWorkerServicer_to_server(grpc_server.FaultlineWorkerService(), srv)
+    port = srv.add_insecure_port("127.0.0.1:0")
+    srv.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    try:
+        yield grpc_server.worker_pb2_grpc.FaultlineWorkerStub(channel), grpc_server.worker_pb2
+    finally:
+        channel.close()
+        srv.stop(None)
+
+
+def test_grpc_batch_rpcs_report_per_item(stub, database_url):
+    service, pb2 = stub
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            done, stale, failed = _seed(cur), _seed(cur, token=3), _seed(cur)
+        conn.commit()
+
+    completed = service.CompleteJobs(pb2.CompleteJobsRequest(worker_id="w1", items=[
+        pb2.CompleteItem(job_id=done, fencing_token=1, result_json='{"n": 1}'),
+        pb2.CompleteItem(job_id=stale, fencing_token=2),
+    ]))
+    failures = service.FailJobs(pb2.FailJobsRequest(worker_id="w1", items=[
+        pb2.FailItem(job_id=failed, fencing_token=1, error="boom"),
+    ]))
+    with pytest.raises(grpc.RpcError) as err:
+        service.CompleteJobs(pb2.CompleteJobsRequest(items=[pb2.CompleteItem(job_id="nope", fencing_token=1)]))
+
+    assert [(r.job_id, r.committed, r.stale_write_rejected, r.state) for r in completed.results] == [
+        (done, True, False, "succeeded"),
+        (stale, False, True, "running"),
+    ]
+    assert [(r.job_id, r.committed, r.state) for r in failures.results] == [(failed, True, "queued")]
+    assert err.value.code() == grpc.StatusCode.INVALID_ARGUMENT
@@ -0,0 +1,120 @@
+"""
+tests/test_job_events.py
+─────────────────────────
+Job state events for long-poll / SSE waiters (migration 025,
+services/api/job_events.py).
+
+Validates:
+  - a committed state change reaches every subscriber of that job, and only them
+  - a rolled-back change is never published
+  - one statement changing many jobs is delivered in full
+  - when the LISTEN connection is killed, subscribers get RESYNC and the
+    hub reconnects and keeps delivering
+"""
+
+import asyncio
+import hashlib
+import uuid
+
+import asyncpg
+
+from services.api.job_events import RESYNC, JobEvent, JobEventHub
+
+
+async def _insert(conn, n):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    await conn.execute(
+        """
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token)
+        SELECT id, '{}', $1, 'queued', 0, 3, 0 FROM unnest($2::uuid[]) AS id
+        """,
+        hashlib.sha256(b"{}").hexdigest(),
+        ids,
+    )
+    return ids
+
+
+async def _set_state(conn, ids, state):
+    await conn.execute("UPDATE jobs SET state=$1 WHERE id = ANY($2::uuid[])", state, ids)
+
+
+def test_transitions_fan_out_to_subscribers(database_url):
+    async def run():
+        hub = JobEventHub(database_url)
+        await hub.start()
+        conn = await asyncpg.connect(database_url)
+        try:
+            a, b = await _insert(conn, 2)
+            with hub.subscribe([a]) as sub_a1, hub.subscribe([a]) as sub_a2, hub.subscribe([b]) as sub_b:
+                async with conn.transaction():
+                    await _set_state(conn, [b], "running")
+                    await _set_state(conn, [a], "running")
+                try:
+                    async with conn.transaction():
+                        await _set_state(conn, [a], "failed")
+                        raise RuntimeError("roll back")
+                except RuntimeError:
+                    pass
+                await _set_state(conn, [a], "succeeded")
+
+                got_a1 = [await sub_a1.next(5), await sub_a1.next(5), await sub_a1.next(0.2)]
+                got_a2 = [await sub_a2.next(5), await sub_a2.next(5)]
+                got_b = [await sub_b.next(5), await sub_b.next(0.2)]
+            return a, b, got_a1, got_a2, got_b
+        finally:
+            await conn.close()
+            await hub.stop()
+
+    a, b, got_a1, got_a2, got_b = asyncio.run(run())
+    expected = [JobEvent(a, "running"), JobEvent(a, "succeeded")]
+    assert got_a1 == expected + [None]
+    assert got_a2 == expected
+    assert got_b == [JobEvent(b, "running"), None]
+
+
+def test_bulk_update_is_delivered_in_full(database_url):
+    async def run():
+        hub = JobEventHub(database_url)
+        await hub.start()
+        conn = await asyncpg.connect(database_url)
+        try:
+            ids = await _insert(conn, 250)
+            with hub.subscribe(ids) as sub:
+                await _set_state(conn, ids, "running")
+                seen = set()
+                while len(seen) < len(ids):
+                    event = await sub.next(5)
+                    assert event is not None and event.state == "running"
+                    seen.add(event.job_id)
+            return set(ids), seen
+        finally:
+            await conn.close()
+            await hub.stop()
+
+    ids, seen = asyncio.run(run())
+    assert seen == ids
+
+
+def test_listen_connection_loss_resyncs_and_recovers(database_url):
+    async def run():
+        hub = JobEventHub(database_url)
+        await hub.start()
+        conn = await asyncpg.connect(database_url)
+        try:
+            (job_id,) = await _insert(conn, 1)
+            with hub.subscribe([job_id]) as sub:
+                listener_pid = hub._conn.get_server_pid()
+                await conn.execute("SELECT pg_terminate_backend($1)", listener_pid)
+                resync = await sub.next(10)
+
+                await _set_state(conn, [job_id], "running")
+                event = await sub.next(10)
+            return resync, event, job_id, listener_pid != hub._conn.get_server_pid()
+        finally:
+            await conn.close()
+            await hub.stop()
+
+    resync, event, job_id, reconnected = asyncio.run(run())
+    assert resync is RESYNC
+    assert event == JobEvent(job_id, "running")
+    assert reconnected
@@ -0,0 +1,141 @@
+"""
+tests/test_job_submission.py
+─────────────────────────────
+Single-statement idempotent submission (services/common/submission.py).
+
+Validates:
+  - a new key inserts one queued job
+  - the same key and payload returns the existing job without inserting
+  - the same key with a different payload raises IdempotencyConflict
+  - concurrent submissions with one key create exactly one job
+  - the asyncpg variant follows the same path
+  - a COPY-staged batch resolves every item (new, duplicate within the
+    batch, existing, conflict) and inserts each key once
+"""
+
+import asyncio
+import hashlib
+import threading
+import uuid
+
+import asyncpg
+import psycopg2
+import pytest
+
+from services.common.submission import IdempotencyConflict, submit_job, submit_job_async, submit_jobs_async
+
+
+def _hash(payload: dict) -> str:
+    return hashlib.sha256(str(payload).encode()).hexdigest()
+
+
+def _submit(database_url, payload, key):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            submission = submit_job(cur, payload, _hash(payload), idempotency_key=key)
+        conn.commit()
+    return submission
+
+
+def _count(database_url, key):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM jobs WHERE idempotency_key=%s", (key,))
+            return cur.fetchone()[0]
+
+
+def test_submission_is_idempotent_per_key(database_url):
+    key = f"submit-{uuid.uuid4()}"
+    first = _submit(database_url, {"task": "a"}, key)
+    second = _submit(database_url, {"task": "a"}, key)
+
+    assert first.created and first.state == "queued"
+    assert not second.created
+    assert second.job_id == first.job_id
+    assert _count(database_url, key) == 1
+
+    with pytest.raises(IdempotencyConflict) as exc:
+        _submit(database_url, {"task": "b"}, key)
+    assert exc.value.job_id == first.job_id
+
+
+def test_submission_without_key_always_inserts(database_url):
+    a = _submit(database_url, {"task": "x"}, None)
+    b = _submit(database_url, {"task": "x"}, None)
+    assert a.created and b.created
+    assert a.job_id != b.job_id
+
+
+def test_concurrent_submissions_create_one_job(database_url):
+    key = f"submit-race-{uuid.uuid4()}"
+    barrier = threading.Barrier(8)
+    results = []
+
+    def submit():
+        barrier.wait()
+        results.append(_submit(database_url, {"task": "race"}, key))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(r.created for r in results) == 1
+    assert len({r.job_id for r in results}) == 1
+    assert _count(database_url, key) == 1
+
+
+def test_async_submission_shares_the_same_path(database_url):
+    key = f"submit-async-{uuid.uuid4()}"
+    payload = {"task": "async"}
+
+    async def run():
+        conn = await asyncpg.connect(database_url)
+        try:
+            first = await submit_job_async(conn, payload, _hash(payload), key)
+            again = await submit_job_async(conn, payload, _hash(payload), key)
+            with pytest.raises(IdempotencyConflict):
+                await submit_job_async(conn, {"task": "other"}, _hash({"task": "other"}), key)
+            return first, again
+        finally:
+            await conn.close()
+
+    first, again = asyncio.run(run())
+    assert first.created and not again.created
+    assert again.job_id == first.job_id
+    assert _count(database_url, key) == 1
+
+
+def test_batch_submission_resolves_every_item(database_url):
+    prefix = f"batch-{uuid.uuid4()}"
+    existing = _submit(database_url, {"n": "pre"}, f"{prefix}-pre")
+
+    items = [({"n": i}, _hash({"n": i}), f"{prefix}-{i}") for i in range(1000)]
+    items += [
+        ({"n": 5}, _hash({"n": 5}), f"{prefix}-5"),            # repeated within the batch
+        ({"n": "pre"}, _hash({"n": "pre"}), f"{prefix}-pre"),  # already submitted
+        ({"n": "other"}, _hash({"n": "other"}), f"{prefix}-pre"),
+        ({"n": "nokey"}, _hash({"n": "nokey"}), None),
+    ]
+
+    async def run():
+        conn = await asyncpg.connect(database_url)
+        try:
+            return await submit_jobs_async(conn, items)
+        finally:
+            await conn.close()
+
+    results = asyncio.run(run())
+
+    assert len(results) == len(items)
+    assert all(r.status == "queued" for r in results[:1000])
+    assert results[1000].status == "existing" and results[1000].job_id == results[5].job_id
+    assert results[1001].status == "existing" and results[1001].job_id == existing.job_id
+    assert results[1002].status == "conflict" and results[1002].job_id == existing.job_id
+    assert results[1003].status == "queued"
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM jobs WHERE idempotency_key LIKE %s", (f"{prefix}-%",))
+            assert cur.fetchone()[0] == 1001
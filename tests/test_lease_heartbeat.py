@@ -0,0 +1,188 @@
+"""
+tests/test_lease_heartbeat.py
+──────────────────────────────
+Lease renewal heartbeats (FAULTLINE_LEASE_HEARTBEAT=1).
+
+Validates:
+  - A job running longer than LEASE_SECONDS keeps its lease: a competing
+    worker never reclaims it, and it commits once under token 1
+  - When renewal finds the lease gone (token advanced elsewhere), the
+    worker cancels the job locally instead of running it to the end
+  - With CLAIM_BATCH_SIZE > 1, jobs waiting behind others in the batch are
+    renewed from the claim on and commit under their claim token
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import psycopg2
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CMD = [sys.executable, "services/worker/worker.py"]
+
+
+def _db(url):
+    return psycopg2.connect(url)
+
+
+def _seed_job(database_url):
+    return _seed_jobs(database_url, 1)[0]
+
+
+def _seed_jobs(database_url, n):
+    job_ids = [str(uuid.uuid4()) for _ in range(n)]
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE jobs SET state='succeeded' WHERE state IN ('queued', 'running')")
+            for job_id in job_ids:
+                cur.execute(
+                    """
+                    INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, next_run_at)
+                    VALUES (%s, '{}', %s, 'queued', 0, 3, NOW())
+                    """,
+                    (job_id, hashlib.sha256(b"{}").hexdigest()),
+                )
+        conn.commit()
+    return job_ids
+
+
+def _job(database_url, job_id):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT state, lease_owner, fencing_token FROM jobs WHERE id=%s", (job_id,))
+            return cur.fetchone()
+
+
+def _ledger_tokens(database_url, job_id):
+    with _db(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fencing_token FROM ledger_entries WHERE job_id=%s", (job_id,))
+            return [row[0] for row in cur.fetchall()]
+
+
+def _env(database_url, worker_id, **extra):
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "METRICS_ENABLED": "0",
+        "FAULTLINE_WORKER_ID": worker_id,
+        "PYTHONPATH": REPO_ROOT,
+        "PYTHONUNBUFFERED": "1",
+        **extra,
+    })
+    return env
+
+
+def _wait_owner(database_url, job_id, owner, timeout_s=10):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        row = _job(database_url, job_id)
+        if row and row[0] == "running" and row[1] == owner:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _kill(p):
+    if p.poll() is None:
+        p.kill()
+    return p.communicate(timeout=5)[0] or ""
+
+
+def test_heartbeat_keeps_long_job_leased(database_url):
+    job_id = _seed_job(database_url)
+    a = subprocess.Popen(
+        WORKER_CMD,
+        env=_env(
+            database_url, "worker-a",
+            LEASE_SECONDS="2", WORK_SLEEP_SECONDS="5", FAULTLINE_LEASE_HEARTBEAT="1",
+            EXIT_ON_SUCCESS="1",
+        ),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    b = None
+    try:
+        assert _wait_owner(database_url, job_id, "worker-a")
+        b = subprocess.Popen(
+            WORKER_CMD,
+            env=_env(database_url, "worker-b", LEASE_SECONDS="2", WORK_SLEEP_SECONDS="0"),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        out_a, _ = a.communicate(timeout=20)
+    finally:
+        _kill(a)
+        if b is not None:
+            _kill(b)
+
+    assert '"reason": "success"' in out_a
+    assert _job(database_url, job_id) == ("succeeded", None, 1)
+    assert _ledger_tokens(database_url, job_id) == [1]
+
+
+def test_lost_lease_cancels_job_locally(database_url):
+    job_id = _seed_job(database_url)
+    a = subprocess.Popen(
+        WORKER_CMD,
+        env=_env(
+            database_url, "worker-a",
+            LEASE_SECONDS="3", WORK_SLEEP_SECONDS="30", FAULTLINE_LEASE_HEARTBEAT="1",
+            EXIT_ON_STALE="1",
+        ),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        assert _wait_owner(database_url, job_id, "worker-a")
+        # Another owner takes over the job under a new epoch.
+        with _db(database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE jobs
+                    SET lease_owner='worker-b', fencing_token=fencing_token+1,
+                        lease_expires_at=NOW() + interval '60 seconds'
+                    WHERE id=%s
+                    """,
+                    (job_id,),
+                )
+            conn.commit()
+        started = time.monotonic()
+        out_a, _ = a.communicate(timeout=10)
+        elapsed = time.monotonic() - started
+    finally:
+        out_a_rest = _kill(a)
+
+    out_a = (out_a or "") + out_a_rest
+    assert elapsed < 5, f"worker kept executing for {elapsed:.1f}s after losing its lease"
+    assert '"event": "lease_lost"' in out_a
+    assert '"reason": "stale"' in out_a
+    assert _job(database_url, job_id) == ("running", "worker-b", 2)
+    assert _ledger_tokens(database_url, job_id) == []
+
+
+def test_heartbeat_renews_waiting_jobs_of_a_claimed_batch(database_url):
+    job_ids = _seed_jobs(database_url, 3)
+    # The batch runs for 4.5s on a 2s lease: the third job waits 3s before it starts.
+    a = subprocess.Popen(
+        WORKER_CMD,
+        env=_env(
+            database_url, "worker-a",
+            LEASE_SECONDS="2", WORK_SLEEP_SECONDS="1.5", FAULTLINE_LEASE_HEARTBEAT="1",
+            CLAIM_BATCH_SIZE="3",
+        ),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            if all(_job(database_url, job_id)[0] == "succeeded" for job_id in job_ids):
+                break
+            time.sleep(0.1)
+    finally:
+        out_a = _kill(a)
+
+    assert [_job(database_url, job_id) for job_id in job_ids] == [("succeeded", None, 1)] * 3, out_a
+    assert [_ledger_tokens(database_url, job_id) for job_id in job_ids] == [[1]] * 3
@@ -0,0 +1,317 @@
+"""
+tests/test_lease_table_layout.py
+─────────────────────────────────
+Optional narrow lease-table layout (migrations/layouts/lease_table.sql,
+FAULTLINE_SCHEMA_LAYOUT=lease_table).
+
+Each test runs against a scratch database converted to the layout.
+
+Validates:
+  - the conversion keeps every job, and the jobs view still reads, inserts,
+    updates and deletes rows with exact state counters
+  - threaded, batch-claiming and asyncio workers drain a queue through the
+    lease-table statements: one ledger entry per job, retries included
+  - the reconciler converges and reclaims on job_leases
+  - a heartbeat renewal rewrites only the narrow lease row, as a HOT update
+  - the archiver moves terminal jobs (body, lease row, ledger, result) to history
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import psycopg2
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MIGRATIONS = REPO_ROOT / "migrations"
+PAYLOAD_HASH = hashlib.sha256(b"{}").hexdigest()
+
+BASE_SCHEMA = """
+CREATE TABLE jobs (
+  id UUID PRIMARY KEY,
+  type TEXT NOT NULL DEFAULT 'default',
+  payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+  payload_hash TEXT,
+  state TEXT NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 3,
+  lease_owner TEXT,
+  lease_expires_at TIMESTAMPTZ,
+  fencing_token BIGINT NOT NULL DEFAULT 0,
+  next_run_at TIMESTAMPTZ,
+  idempotency_key TEXT,
+  last_error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE UNIQUE INDEX uq_jobs_idempotency_key ON jobs(idempotency_key) WHERE idempotency_key IS NOT NULL;
+CREATE TABLE ledger_entries (
+  entry_id BIGSERIAL PRIMARY KEY,
+  job_id UUID NOT NULL,
+  fencing_token BIGINT NOT NULL DEFAULT 0,
+  account_id TEXT NOT NULL,
+  delta BIGINT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE UNIQUE INDEX uq_ledger_entries_job_fence ON ledger_entries(job_id, fencing_token);
+CREATE TABLE barriers (name TEXT PRIMARY KEY, opened_at TIMESTAMP NOT NULL DEFAULT NOW());
+"""
+
+
+def _with_db(url, name):
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=f"/{name}"))
+
+
+@pytest.fixture
+def wide_db(database_url):
+    name = f"faultline_lease_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(database_url)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE DATABASE {name}")
+    url = _with_db(database_url, name)
+    with psycopg2.connect(url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(BASE_SCHEMA)
+            for migration in ("023_reconcile_watermarks.sql", "024_job_state_counts.sql",
+                              "025_job_state_events.sql", "026_job_history.sql",
+                              "027_job_results.sql"):
+                cur.execute((MIGRATIONS / migration).read_text())
+        conn.commit()
+    try:
+        yield url
+    finally:
+        with admin.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+        admin.close()
+
+
+def _convert(url):
+    with psycopg2.connect(url) as conn:
+        with conn.cursor() as cur:
+            cur.execute((MIGRATIONS / "layouts" / "lease_table.sql").read_text())
+        conn.commit()
+
+
+@pytest.fixture
+def lease_db(wide_db):
+    _convert(wide_db)
+    return wide_db
+
+
+def _seed(cur, n, state="queued", attempts=0, owner=None, token=0, lease_seconds=None):
+    """Insert through the jobs view (or table); lease_seconds sets lease_expires_at relative to NOW()."""
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    for job_id in ids:
+        cur.execute(
+            """
+            INSERT INTO jobs (id, payload, payload_hash, state, attempts, lease_owner, fencing_token, lease_expires_at)
+            VALUES (%s, '{}', %s, %s, %s, %s, %s, NOW() + make_interval(secs => %s))
+            """,
+            (job_id, PAYLOAD_HASH, state, attempts, owner, token, lease_seconds),
+        )
+    return ids
+
+
+def _counts_match(cur):
+    cur.execute("SELECT state, SUM(n) FROM job_state_counts GROUP BY state HAVING SUM(n) <> 0")
+    counted = dict(cur.fetchall())
+    cur.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+    return counted == dict(cur.fetchall())
+
+
+def test_conversion_keeps_jobs_and_view_stays_writable(wide_db):
+    with psycopg2.connect(wide_db) as conn:
+        with conn.cursor() as cur:
+            queued = _seed(cur, 5)
+            done = _seed(cur, 3, state="succeeded", attempts=1, token=2)
+        conn.commit()
+
+    _convert(wide_db)
+
+    with psycopg2.connect(wide_db) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('job_bodies'), to_regclass('job_leases')")
+            assert cur.fetchone() == ("job_bodies", "job_leases")
+            cur.execute("SELECT COUNT(*) FROM job_leases WHERE state = 'queued' AND next_run_at IS NOT NULL")
+            assert cur.fetchone()[0] == 5
+            cur.execute("SELECT state, fencing_token FROM jobs WHERE id = %s", (done[0],))
+            assert cur.fetchone() == ("succeeded", 2)
+
+            (extra,) = _seed(cur, 1)
+            cur.execute("UPDATE jobs SET state='failed', last_error='boom' WHERE id = %s", (queued[0],))
+            cur.execute("DELETE FROM jobs WHERE id = %s", (queued[1],))
+            cur.execute("SELECT state, last_error FROM jobs WHERE id = %s", (queued[0],))
+            assert cur.fetchone() == ("failed", "boom")
+            cur.execute("SELECT COUNT(*) FROM job_leases WHERE job_id = %s", (queued[1],))
+            assert cur.fetchone()[0] == 0
+            cur.execute("SELECT next_run_at IS NOT NULL FROM jobs WHERE id = %s", (extra,))
+            assert cur.fetchone()[0] is True
+            assert _counts_match(cur)
+
+
+def _worker_env(url, **extra):
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": url,
+        "FAULTLINE_SCHEMA_LAYOUT": "lease_table",
+        "METRICS_ENABLED": "0",
+        "MAX_LOOPS": "0",
+        "WORK_SLEEP_SECONDS": "0.05",
+        "FAULTLINE_AUTOPSY_LOG": os.devnull,
+        "PYTHONPATH": str(REPO_ROOT),
+        **extra,
+    })
+    return env
+
+
+def test_workers_drain_queue_on_lease_table(lease_db):
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            ids = _seed(cur, 30)
+        conn.commit()
+
+    workers = [
+        [sys.executable, "services/worker/worker.py"],
+        [sys.executable, "services/worker/worker.py"],
+        [sys.executable, "-m", "services.worker.async_worker"],
+    ]
+    extras = [
+        {"SIMULATE_FAILURE": "1", "FAULTLINE_LEASE_HEARTBEAT": "1"},
+        {"CLAIM_BATCH_SIZE": "4"},
+        {"WORKER_CONCURRENCY": "10"},
+    ]
+    procs = [
+        subprocess.Popen(cmd, cwd=REPO_ROOT, env=_worker_env(lease_db, **extra),
+                         stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        for cmd, extra in zip(workers, extras)
+    ]
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            with psycopg2.connect(lease_db) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT COUNT(*) FROM job_leases WHERE state <> 'succeeded'")
+                    if cur.fetchone()[0] == 0:
+                        break
+            time.sleep(0.2)
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.communicate(timeout=5)
+
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.state, COUNT(l.entry_id), j.attempts, j.last_error IS NOT NULL
+                FROM jobs j LEFT JOIN ledger_entries l ON l.job_id = j.id
+                WHERE j.id = ANY(%s::uuid[])
+                GROUP BY j.id, j.state, j.attempts, j.last_error
+                """,
+                (ids,),
+            )
+            rows = cur.fetchall()
+            assert _counts_match(cur)
+
+    assert len(rows) == 30
+    assert all(state == "succeeded" and ledger == 1 for state, ledger, _, _ in rows)
+    # Jobs first claimed by the SIMULATE_FAILURE worker went through the retry path.
+    assert all(attempts == int(has_error) for _, _, attempts, has_error in rows)
+
+
+def test_reconciler_converges_and_reclaims_on_lease_table(lease_db):
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            applied, orphan = _seed(cur, 2, state="running", owner="dead", token=2, lease_seconds=-60)
+            cur.execute(
+                "INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta) VALUES (%s, 2, 'default', 1)",
+                (applied,),
+            )
+        conn.commit()
+
+    subprocess.run(
+        [sys.executable, "-m", "services.worker.reconciler"],
+        cwd=REPO_ROOT, env=_worker_env(lease_db), check=True, timeout=60,
+        stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT job_id::text, state, lease_owner FROM job_leases WHERE job_id = ANY(%s::uuid[])",
+                        ([applied, orphan],))
+            states = {row[0]: row[1:] for row in cur.fetchall()}
+    assert states == {applied: ("succeeded", None), orphan: ("queued", None)}
+
+
+def test_heartbeat_renewal_is_a_hot_update(lease_db):
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            (job_id,) = _seed(cur, 1, state="running", owner="w1", token=1, lease_seconds=30)
+        conn.commit()
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_stat_get_xact_tuples_hot_updated('job_leases'::regclass)")
+            before = cur.fetchone()[0]
+            # What RENEW_LEASES writes: lease_expires_at only, which no index covers.
+            cur.execute(
+                """
+                UPDATE job_leases SET lease_expires_at = NOW() + interval '30 seconds'
+                WHERE job_id = %s AND lease_owner = 'w1' AND fencing_token = 1
+                """,
+                (job_id,),
+            )
+            assert cur.rowcount == 1
+            cur.execute("SELECT pg_stat_get_xact_tuples_hot_updated('job_leases'::regclass)")
+            assert cur.fetchone()[0] == before + 1
+
+
+def test_archiver_moves_terminal_jobs_on_lease_table(lease_db):
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            done = _seed(cur, 3, state="succeeded", attempts=1, token=1)
+            (live,) = _seed(cur, 1, state="succeeded", attempts=1, token=1)
+            cur.execute("UPDATE job_leases SET updated_at = NOW() - interval '30 days' WHERE job_id = ANY(%s::uuid[])",
+                        (done,))
+            cur.execute(
+                """
+                INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta)
+                SELECT id, 1, 'default', 1 FROM unnest(%s::uuid[]) AS id
+                """,
+                (done,),
+            )
+            cur.execute("INSERT INTO job_results (job_id, fencing_token, result) VALUES (%s, 1, '{\"ok\": 1}')",
+                        (done[0],))
+        conn.commit()
+
+    subprocess.run(
+        [sys.executable, "-m", "services.worker.archiver"],
+        cwd=REPO_ROOT, env=_worker_env(lease_db, ARCHIVE_ONCE="1", ARCHIVE_AFTER_SECONDS="86400"),
+        check=True, timeout=60, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+
+    with psycopg2.connect(lease_db) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id::text, state, fencing_token FROM jobs_history")
+            archived = {row[0]: row[1:] for row in cur.fetchall()}
+            cur.execute("SELECT id::text, result FROM jobs_history WHERE result IS NOT NULL")
+            results = cur.fetchall()
+            cur.execute("SELECT COUNT(*) FROM job_results")
+            live_results = cur.fetchone()[0]
+            cur.execute("SELECT job_id::text FROM job_leases")
+            leases = {row[0] for row in cur.fetchall()}
+            cur.execute("SELECT COUNT(*) FROM job_bodies")
+            bodies = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM ledger_entries_history")
+            ledger = cur.fetchone()[0]
+            assert _counts_match(cur)
+
+    assert archived == {job_id: ("succeeded", 1) for job_id in done}
+    assert (leases, bodies, ledger) == ({live}, 1, 3)
+    assert (results, live_results) == ([(done[0], {"ok": 1})], 0)
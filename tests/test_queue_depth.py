@@ -0,0 +1,109 @@
+"""
+tests/test_queue_depth.py
+──────────────────────────
+Trigger-maintained queue depth (migration 024, services/common/queue_depth.py).
+
+Validates:
+  - counters match a GROUP BY over jobs after inserts, bulk inserts, state
+    transitions, no-op updates and deletes
+  - concurrent writers spread over shards and still leave exact totals
+  - DepthCache reuses a reading within its TTL and shares one refresh
+"""
+
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from services.common.queue_depth import DepthCache, fetch_depth
+
+
+def _exact(cur):
+    cur.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+    return dict(cur.fetchall())
+
+
+def _insert(cur, n, state="queued"):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    cur.execute(
+        """
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts, fencing_token)
+        SELECT id, '{}', %s, %s, 0, 3, 0 FROM unnest(%s::uuid[]) AS id
+        """,
+        (hashlib.sha256(b"{}").hexdigest(), state, ids),
+    )
+    return ids
+
+
+def test_counters_track_every_kind_of_write(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            ids = _insert(cur, 40)
+            _insert(cur, 1)
+            cur.execute(
+                "UPDATE jobs SET state='running', lease_owner='w' WHERE id = ANY(%s::uuid[])",
+                (ids[:15],),
+            )
+            cur.execute(
+                "UPDATE jobs SET lease_expires_at = NOW() WHERE id = ANY(%s::uuid[])",
+                (ids[:15],),
+            )
+            cur.execute("UPDATE jobs SET state='succeeded' WHERE id = ANY(%s::uuid[])", (ids[:5],))
+            cur.execute("UPDATE jobs SET state='failed' WHERE id = ANY(%s::uuid[])", (ids[5:8],))
+            cur.execute("DELETE FROM jobs WHERE id = ANY(%s::uuid[])", (ids[30:],))
+            assert fetch_depth(cur) == _exact(cur)
+        conn.commit()
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            assert fetch_depth(cur) == _exact(cur)
+
+
+def test_concurrent_transitions_stay_exact(database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            ids = _insert(cur, 200)
+        conn.commit()
+
+    def advance(chunk):
+        with psycopg2.connect(database_url) as conn:
+            with conn.cursor() as cur:
+                for job_id in chunk:
+                    cur.execute("UPDATE jobs SET state='running' WHERE id=%s", (job_id,))
+                    conn.commit()
+                    cur.execute("UPDATE jobs SET state='succeeded' WHERE id=%s", (job_id,))
+                    conn.commit()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(advance, [ids[i::8] for i in range(8)]))
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            assert fetch_depth(cur) == _exact(cur)
+            cur.execute("SELECT COUNT(DISTINCT shard) FROM job_state_counts WHERE state = 'succeeded'")
+            assert cur.fetchone()[0] > 1
+
+
+def test_depth_cache_reuses_reading_within_ttl():
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return {"queued": len(loads)}
+
+    async def run():
+        cache = DepthCache(ttl_seconds=60)
+        first = await asyncio.gather(*(cache.get(load) for _ in range(10)))
+        second = await cache.get(load)
+        expired = DepthCache(ttl_seconds=0)
+        await expired.get(load)
+        await expired.get(load)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [{"queued": 1}] * 10
+    assert second == {"queued": 1}
+    assert len(loads) == 3
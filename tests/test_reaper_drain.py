@@ -0,0 +1,80 @@
+"""
+tests/test_reaper_drain.py
+───────────────────────────
+Draining reaper (worker/reaper.py).
+
+Validates:
+  - drain_expired_leases() recovers a backlog larger than one batch in one call
+  - reap_expired_leases() reports the previous owner/token of each reaped row
+  - reap lag is the age of the oldest expired lease, and 0 once drained
+  - AdaptiveBatchSize grows on fast full batches and shrinks on slow ones
+"""
+
+import hashlib
+import json
+import uuid
+
+import psycopg2
+
+from worker import reaper
+
+
+def _seed_expired(cur, n):
+    ids = []
+    for _ in range(n):
+        job_id = str(uuid.uuid4())
+        cur.execute(
+            """
+            INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                              lease_owner, lease_expires_at, fencing_token)
+            VALUES (%s, '{}', %s, 'running', 1, 3, 'dead-worker', NOW() - interval '2 minutes', 4)
+            """,
+            (job_id, hashlib.sha256(b"{}").hexdigest()),
+        )
+        ids.append(job_id)
+    return ids
+
+
+def test_drain_recovers_backlog_larger_than_one_batch(database_url, monkeypatch):
+    monkeypatch.setattr(reaper, "get_conn", lambda: psycopg2.connect(database_url))
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            ids = _seed_expired(cur, 45)
+            assert reaper.reap_lag_seconds(cur) >= 110
+        conn.commit()
+
+    sizer = reaper.AdaptiveBatchSize(initial=10, minimum=10, maximum=10, target_seconds=5)
+    assert reaper.drain_expired_leases(sizer) >= 45
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT state, lease_owner FROM jobs WHERE id = ANY(%s::uuid[])", (ids,))
+            assert set(cur.fetchall()) == {("queued", None)}
+            assert reaper.reap_lag_seconds(cur) == 0
+
+
+def test_reap_reports_previous_owner_and_token(database_url, capsys):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            (job_id,) = _seed_expired(cur, 1)
+            reaped = reaper.reap_expired_leases(cur, batch_size=1000)
+        conn.commit()
+
+    assert job_id in {str(j) for j in reaped}
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    (event,) = [e for e in events if e.get("job_id") == job_id]
+    assert event["event"] == "lease_reaped"
+    assert event["stale_owner"] == "dead-worker"
+    assert event["fencing_token"] == 4
+
+
+def test_adaptive_batch_size_tracks_latency():
+    sizer = reaper.AdaptiveBatchSize(initial=100, minimum=50, maximum=400, target_seconds=0.2)
+    assert sizer.observe(100, 0.01) == 200
+    assert sizer.observe(200, 0.01) == 400
+    assert sizer.observe(400, 0.01) == 400
+    assert sizer.observe(12, 0.01) == 400
+    assert sizer.observe(400, 0.5) == 200
+    assert sizer.observe(200, 0.5) == 100
+    assert sizer.observe(100, 0.5) == 50
+    assert sizer.observe(100, 0.5) == 50
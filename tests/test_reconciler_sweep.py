@@ -0,0 +1,150 @@
+"""
+tests/test_reconciler_sweep.py
+───────────────────────────────
+Set-based reconciler pass (services/worker/reconciler.py).
+
+Validates that one pass, in batches smaller than the backlog:
+  - marks every expired job with a committed ledger entry succeeded (never requeued)
+  - requeues every other expired running job
+  - skips rows another transaction holds locked instead of waiting on them
+  - an incremental pass only examines rows changed since the watermark;
+    a full sweep still converges older drift
+  - the ledger watermark comparison does not depend on the session TimeZone
+"""
+
+import hashlib
+import importlib
+import uuid
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture
+def reconciler(database_url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    return importlib.import_module("services.worker.reconciler")
+
+
+def _seed_expired(cur, ledger: bool, changed="NOW()"):
+    job_id = str(uuid.uuid4())
+    cur.execute(
+        f"""
+        INSERT INTO jobs (id, payload, payload_hash, state, attempts, max_attempts,
+                          lease_owner, lease_expires_at, fencing_token, updated_at)
+        VALUES (%s, '{{}}', %s, 'running', 1, 3, 'dead-worker', NOW() - interval '1 minute', 2, {changed})
+        """,
+        (job_id, hashlib.sha256(b"{}").hexdigest()),
+    )
+    if ledger:
+        cur.execute(
+            f"""
+            INSERT INTO ledger_entries (job_id, fencing_token, account_id, delta, created_at)
+            VALUES (%s, 2, 'default', 1, {changed})
+            """,
+            (job_id,),
+        )
+    return job_id
+
+
+def _states(cur, ids):
+    cur.execute("SELECT id::text, state, lease_owner FROM jobs WHERE id = ANY(%s::uuid[])", (ids,))
+    return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+
+def test_reconciler_pass_converges_and_reclaims_in_batches(reconciler, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            orphans = [_seed_expired(cur, ledger=False) for _ in range(25)]
+            applied = [_seed_expired(cur, ledger=True) for _ in range(7)]
+            locked = _seed_expired(cur, ledger=False)
+        conn.commit()
+
+    holder = psycopg2.connect(database_url)
+    try:
+        with holder.cursor() as cur:
+            cur.execute("SELECT 1 FROM jobs WHERE id=%s FOR UPDATE", (locked,))
+        result = reconciler.reclaim_expired_jobs(batch_size=10)
+    finally:
+        holder.rollback()
+        holder.close()
+
+    assert result["converged"] >= 7
+    assert result["reclaimed"] >= 25
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            states = _states(cur, orphans + applied + [locked])
+            cur.execute("SELECT COUNT(*) FROM ledger_entries WHERE job_id = ANY(%s::uuid[])", (applied,))
+            ledger = cur.fetchone()[0]
+
+    assert all(states[j] == ("queued", None) for j in orphans)
+    assert all(states[j] == ("succeeded", None) for j in applied)
+    assert states[locked] == ("running", "dead-worker")
+    assert ledger == 7
+
+
+def test_incremental_pass_skips_rows_older_than_the_watermark(reconciler, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            old = _seed_expired(cur, ledger=True, changed="NOW() - interval '2 days'")
+            fresh = _seed_expired(cur, ledger=True)
+            # A recent full sweep and a watermark one hour back.
+            cur.execute(
+                """
+                INSERT INTO reconcile_watermarks (name, watermark, last_full_sweep_at)
+                VALUES (%s, NOW() - interval '1 hour', NOW())
+                ON CONFLICT (name) DO UPDATE
+                SET watermark = EXCLUDED.watermark, last_full_sweep_at = EXCLUDED.last_full_sweep_at
+                """,
+                (reconciler.WATERMARK_NAME,),
+            )
+        conn.commit()
+
+    result = reconciler.reclaim_expired_jobs()
+    assert result["full_sweep"] is False
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            states = _states(cur, [old, fresh])
+    assert states[fresh] == ("succeeded", None)
+    # Outside the watermark window: left for the full sweep, and not requeued either.
+    assert states[old] == ("running", "dead-worker")
+
+    result = reconciler.reclaim_expired_jobs(full=True)
+    assert result["full_sweep"] is True
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            states = _states(cur, [old])
+            cur.execute(
+                "SELECT watermark > NOW() - interval '10 minutes', last_full_sweep_at > NOW() - interval '1 minute' "
+                "FROM reconcile_watermarks WHERE name = %s",
+                (reconciler.WATERMARK_NAME,),
+            )
+            advanced = cur.fetchone()
+    assert states[old] == ("succeeded", None)
+    assert advanced == (True, True)
+
+
+def test_ledger_watermark_ignores_session_time_zone(reconciler, database_url):
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            job_id = _seed_expired(cur, ledger=True)
+            # Only the ledger entry is recent, stamped in UTC as the deployed servers do.
+            cur.execute("UPDATE jobs SET updated_at = NOW() - interval '2 days' WHERE id = %s", (job_id,))
+            cur.execute(
+                "UPDATE ledger_entries SET created_at = NOW() AT TIME ZONE 'UTC' WHERE job_id = %s", (job_id,)
+            )
+        conn.commit()
+
+    with psycopg2.connect(database_url) as conn:
+        with conn.cursor() as cur:
+            # Ahead of UTC: a session-zone cast would place the entry nine hours in the past.
+            cur.execute("SET TIME ZONE 'Asia/Tokyo'")
+            cur.execute("SELECT NOW() - interval '10 minutes'")
+            (since,) = cur.fetchone()
+            converged = reconciler.reconcile_once(cur, since=since)
+        conn.commit()
+
+    assert job_id in converged
@@ -0,0 +1,168 @@
+"""
+tests/test_sdk_client.py
+─────────────────────────
+Python SDK transport (sdk/faultline_sdk), against a local HTTP/1.1 stub of
+the API.
+
+Validates:
+  - FaultlineClient reuses one keep-alive connection across calls
+  - retries: a 503 is retried even for a keyless submit, a 502 only for
+    idempotent calls (fenced completions), and retries stop at max_retries
+  - AsyncFaultlineClient sends submit_many / complete_many chunks
+    concurrently on pooled connections and returns results in input order
+"""
+
+import asyncio
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from sdk.faultline_sdk import (
+    AsyncFaultlineClient,
+    ClaimRequest,
+    CompleteRequest,
+    FaultlineClient,
+    SubmitRequest,
+    TransportRetry,
+)
+
+NO_WAIT = TransportRetry(max_retries=2, backoff_base_seconds=0)
+
+
+class StubAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.connections = 0
+        self.calls = Counter()
+        self.failures: dict[str, list[int]] = {}  # path -> statuses to answer before succeeding
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._answer(None)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._answer(body)
+
+    def _answer(self, body):
+        with self.server.lock:
+            self.server.calls[self.path] += 1
+            pending = self.server.failures.get(self.path)
+            status = pending.pop(0) if pending else 200
+        data = _respond(self.path, body) if status == 200 else {"detail": "unavailable"}
+        raw = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def _respond(path, body):
+    if path == "/health":
+        return {"status": "ok"}
+    if path == "/v1/jobs":
+        return {"job_id": "j-1", "state": "queued"}
+    if path == "/v1/jobs:batch":
+        items = [json.loads(line) for line in body.decode().splitlines()]
+        return {"items": [{"job_id": item["job_payload"]["n"], "state": "queued", "status": "queued"}
+                          for item in items]}
+    if path == "/v1/jobs/claim":
+        request = json.loads(body)
+        return {"items": [{"job_id": f"c-{i}", "fencing_token": 1} for i in range(request["batch_size"])]}
+    if path == "/v1/jobs:complete":
+        items = json.loads(body)["items"]
+        return {"items": [{"job_id": item["job_id"], "committed": item["fencing_token"] > 0,
+                           "stale_write_rejected": item["fencing_token"] <= 0, "state": "succeeded",
+                           "reason": "committed"} for item in items]}
+    raise AssertionError(path)
+
+
+@pytest.fixture
+def api():
+    server = StubAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_calls_reuse_one_keepalive_connection(api):
+    with FaultlineClient(api.url, retry=NO_WAIT) as client:
+        for _ in range(20):
+            assert client.health() == {"status": "ok"}
+        client.submit(SubmitRequest(job_payload={}))
+
+    assert api.calls["/health"] == 20
+    assert api.connections == 1
+
+
+def test_retries_depend_on_status_and_idempotency(api):
+    api.failures = {"/v1/jobs": [503, 502], "/v1/jobs:complete": [502, 504], "/health": [503, 503, 503]}
+    with FaultlineClient(api.url, retry=NO_WAIT) as client:
+        # Keyless submit: the 503 did no work and is retried; the 502 might have, so it is raised.
+        with pytest.raises(requests.HTTPError) as err:
+            client.submit(SubmitRequest(job_payload={}))
+        completed = client.complete_many([CompleteRequest(job_id="a", fencing_token=1)])
+        with pytest.raises(requests.HTTPError):
+            client.health()
+
+    assert err.value.response.status_code == 502
+    assert api.calls["/v1/jobs"] == 2
+    assert [r.committed for r in completed] == [True]
+    assert api.calls["/v1/jobs:complete"] == 3
+    assert api.calls["/health"] == 3
+
+
+def test_async_client_batches_concurrently_in_order(api):
+    api.failures = {"/v1/jobs:complete": [503]}
+
+    async def run():
+        async with AsyncFaultlineClient(api.url, retry=NO_WAIT, max_in_flight=4) as client:
+            submitted = await client.submit_many(
+                (SubmitRequest(job_payload={"n": str(i)}) for i in range(25)), chunk_size=10
+            )
+            claimed = await client.claim(ClaimRequest(worker_id="w", batch_size=5))
+            completed = await client.complete_many(
+                [CompleteRequest(job_id=item["job_id"], fencing_token=1) for item in claimed["items"]]
+                + [CompleteRequest(job_id="stale", fencing_token=0)],
+                worker_id="w",
+                chunk_size=2,
+            )
+        return submitted, completed
+
+    submitted, completed = asyncio.run(run())
+
+    assert [r.job_id for r in submitted] == [str(i) for i in range(25)]
+    assert api.calls["/v1/jobs:batch"] == 3
+    assert [(r.job_id, r.committed, r.stale_write_rejected) for r in completed] == [
+        *((f"c-{i}", True, False) for i in range(5)),
+        ("stale", False, True),
+    ]
+    assert api.calls["/v1/jobs:complete"] == 4
+    assert 1 < api.connections <= 4
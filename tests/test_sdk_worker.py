@@ -0,0 +1,225 @@
+"""
+tests/test_sdk_worker.py
+─────────────────────────
+Python SDK worker runtime (sdk/faultline_sdk/worker.py), against a local
+stub of the API that leases jobs from an in-memory queue.
+
+Validates:
+  - the worker registers once, runs up to concurrency handlers at a time,
+    never holds more than concurrency + prefetch leases, and commits
+    outcomes in batches (a raising handler fails its job)
+  - stop() hands unstarted prefetched leases back to the queue, lets
+    running handlers finish and commits them
+  - heartbeats renew held leases; a lease reported lost is never started
+  - a claim still in flight when stop() times out releases its leases
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sdk.faultline_sdk import FaultlineClient, TransportRetry, Worker
+
+
+class QueueAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, jobs):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.queued = list(jobs)
+        self.leased: set[str] = set()
+        self.max_leased = 0
+        self.completed: list[str] = []
+        self.failed: list[str] = []
+        self.released: list[str] = []
+        self.renewed: list[str] = []
+        self.lose: set[str] = set()  # job ids the heartbeat reports as lost
+        self.claim_gate: threading.Event | None = None  # when set up, claims wait for it
+        self.claim_waiting = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def answer(self, path, body):
+        if path == "/v1/jobs/claim" and self.claim_gate is not None:
+            self.claim_waiting.set()
+            self.claim_gate.wait(5)
+        with self.lock:
+            self.calls[path] += 1
+            if path == "/v1/workers/register":
+                return {"worker_id": f"{body['worker_name']}-1", "accepted": True}
+            if path == "/v1/jobs/claim":
+                taken, self.queued = self.queued[:body["batch_size"]], self.queued[body["batch_size"]:]
+                self.leased.update(taken)
+                self.max_leased = max(self.max_leased, len(self.leased))
+                return {"items": [{"job_id": j, "fencing_token": 1, "payload": {"n": j}} for j in taken]}
+            ids = [item["job_id"] for item in body["items"]]
+            if path == "/v1/jobs:heartbeat":
+                self.renewed += ids
+                return {"items": [{"job_id": j, "renewed": j not in self.lose} for j in ids]}
+            self.leased.difference_update(ids)
+            if path == "/v1/jobs:release":
+                self.released += ids
+                self.queued += ids
+                return {"released": len(ids)}
+            done = self.completed if path == "/v1/jobs:complete" else self.failed
+            done += ids
+            return {"items": [{"job_id": j, "committed": True, "stale_write_rejected": False,
+                               "state": "succeeded", "reason": "committed"} for j in ids]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        raw = json.dumps(self.server.answer(self.path, body)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(jobs):
+        server = QueueAPI(jobs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, FaultlineClient(server.url, retry=TransportRetry(max_retries=0))
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_worker_prefetches_runs_concurrently_and_batches_commits(serve):
+    api, client = serve([f"j{i}" for i in range(60)])
+    running, peak = Counter(), Counter()
+    lock = threading.Lock()
+
+    def handle(lease):
+        with lock:
+            running["n"] += 1
+            peak["n"] = max(peak["n"], running["n"])
+        time.sleep(0.01)
+        with lock:
+            running["n"] -= 1
+        if lease.payload["n"] == "j7":
+            raise ValueError("bad input")
+        return {"n": lease.payload["n"]}
+
+    worker = Worker(client, handle, "sdk-w", concurrency=4, prefetch=6, completion_window_seconds=0.05)
+    worker.start()
+    _wait_for(lambda: len(api.completed) + len(api.failed) == 60)
+    worker.stop(timeout=5)
+
+    assert api.calls["/v1/workers/register"] == 1
+    assert 1 < peak["n"] <= 4
+    assert api.max_leased <= 10
+    assert api.failed == ["j7"]
+    assert sorted(api.completed) == sorted(f"j{i}" for i in range(60) if i != 7)
+    assert api.calls["/v1/jobs:complete"] < 30
+    assert worker.stats["succeeded"] == 59 and worker.stats["failed"] == 1
+
+
+def test_stop_releases_unstarted_leases_and_finishes_running_ones(serve):
+    api, client = serve([f"j{i}" for i in range(20)])
+    started, proceed = threading.Semaphore(0), threading.Event()
+
+    def handle(lease):
+        started.release()
+        proceed.wait(5)
+        return None
+
+    worker = Worker(client, handle, "sdk-w", concurrency=2, prefetch=3)
+    worker.start()
+    for _ in range(2):
+        assert started.acquire(timeout=5)
+    _wait_for(lambda: len(api.leased) == 5)
+
+    stopper = threading.Thread(target=worker.stop)
+    stopper.start()
+    _wait_for(lambda: len(api.released) == 3)
+    proceed.set()
+    stopper.join(5)
+
+    assert not stopper.is_alive()
+    assert len(api.completed) == 2
+    assert set(api.released).isdisjoint(api.completed)
+    assert api.leased == set() and len(api.queued) == 18
+    assert worker.stats["released"] == 3
+
+
+def test_heartbeat_renews_leases_and_skips_lost_ones(serve):
+    api, client = serve(["a", "b"])
+    api.lose = {"b"}
+    first_started, proceed = threading.Event(), threading.Event()
+    handled = []
+
+    def handle(lease):
+        handled.append(lease.job_id)
+        first_started.set()
+        proceed.wait(5)
+        return None
+
+    worker = Worker(client, handle, "sdk-w", concurrency=1, prefetch=1, heartbeat_seconds=0.02)
+    worker.start()
+    assert first_started.wait(5)
+    _wait_for(lambda: worker.stats.get("lost") == 1)
+    proceed.set()
+    _wait_for(lambda: api.completed == ["a"])
+    worker.stop(timeout=5)
+
+    assert handled == ["a"]
+    assert {"a", "b"} <= set(api.renewed)
+    assert api.released == []
+
+
+def test_claim_in_flight_at_stop_timeout_releases_its_leases(serve):
+    api, client = serve(["a", "b"])
+    started, proceed = threading.Event(), threading.Event()
+    handled = []
+
+    def handle(lease):
+        handled.append(lease.job_id)
+        started.set()
+        proceed.wait(5)
+        return None
+
+    worker = Worker(client, handle, "sdk-w", concurrency=1, prefetch=0)
+    worker.start()
+    assert started.wait(5)
+    # The next claim is sent once "a" commits, and hangs until the gate opens.
+    api.claim_gate = threading.Event()
+    proceed.set()
+    assert api.claim_waiting.wait(5)
+
+    worker.stop(timeout=0.2)
+    api.claim_gate.set()
+    _wait_for(lambda: api.released == ["b"])
+
+    assert handled == ["a"]
+    assert api.completed == ["a"]
+    assert api.leased == set()
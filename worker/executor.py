@@ -22,28 +22,41 @@ A job moves through the following phases inside the worker loop:
 
     3. EXECUTION
        The job payload is processed. Duration is bounded by LEASE_SECONDS.
-       If execution takes longer than the lease TTL, the post-execution
-       fence will catch it.
-
-    4. POST-EXECUTION FENCE
-       assert_fence(token=N) is called again after execution completes.
-       This catches the case where the lease expired during execution
-       (slow job, GC pause, network partition, etc.).
-
-    5. COMMIT
-       mark_succeeded() writes the ledger entry and transitions job state
-       atomically. The fencing_token check in the WHERE clause provides a
-       final database-layer guard even if assert_fence() is somehow bypassed.
-
-    6. EXIT or LOOP
+       If execution takes longer than the lease TTL, the fenced commit
+       will catch it.
+
+    4. FENCED COMMIT
+       mark_succeeded() runs one statement that locks the job row, checks
+       the token (stale_token) and the lease (lease_expired, e.g. a slow job,
+       GC pause or network partition), writes the ledger entry and
+       transitions the job. If the row is no longer running under this
+       owner it returns stale_commit. The ledger INSERT and the UPDATE
+       commit together or not at all; this replaces the separate
+       post-execution assert_fence(), ledger INSERT and guarded UPDATE.
+
+    5. EXIT or LOOP
        On success, the worker either exits (EXIT_ON_SUCCESS=1, used in tests)
        or continues polling. On stale detection, it either exits (EXIT_ON_STALE=1)
        or continues polling.
 
+Concurrency
+───────────
+With WORKER_CONCURRENCY=N the dispatcher keeps up to N jobs in flight and
+runs phases 2-4 for each on its own job thread and connection, so every
+job keeps its own fencing token, lease deadline and commit transaction.
+WORKER_EXECUTOR=process moves only phase 3 into a process pool; fencing
+and commit never leave the worker process.
+
+With FAULTLINE_GROUP_COMMIT=1, phase 4 for successful jobs is handed to a
+group-commit thread (services/worker/group_commit.py) that runs the same
+fenced commit for every job finished within a few milliseconds in one
+transaction, returning a status per job. Retries and failures still commit
+on the job's own connection.
+
 Exactly-Once Guarantee
 ──────────────────────
 The combination of:
-    - assert_fence() blocking stale workers before commit
+    - the fenced commit rejecting stale workers against the locked job row
     - ON CONFLICT (job_id, fencing_token) DO NOTHING on ledger_entries
     - fencing_token match in the UPDATE WHERE clause
 
@@ -55,6 +55,36 @@ This ensures:
     - Each row is claimed by exactly one worker per loop iteration
     - No thundering herd: workers skip locked rows immediately
 
+Batch Claims
+────────────
+With CLAIM_BATCH_SIZE=N the worker leases up to N rows per round trip
+(claim_batch()). The same SKIP LOCKED selection feeds a single UPDATE that
+advances every row's fencing_token, so each job in the batch holds its own
+epoch and is fenced, executed and committed independently. A stale job does
+not affect the rest of the batch. Leases a worker never started are handed
+back by release_leases() when it exits early.
+
+Jobs later in a batch keep their lease clock running while earlier ones
+execute, so N × job duration must fit inside LEASE_SECONDS.
+
+Lease Renewal
+─────────────
+With FAULTLINE_LEASE_HEARTBEAT=1 a heartbeat thread (services/worker/
+heartbeat.py) renews every in-flight lease each LEASE_SECONDS ×
+FAULTLINE_LEASE_RENEW_FRACTION (default 0.33), batched into one UPDATE:
+
+    UPDATE jobs
+    SET lease_expires_at = NOW() + INTERVAL '<n> seconds'
+    WHERE (id, fencing_token) IN <in-flight jobs>
+      AND lease_owner = <worker_id>
+      AND state = 'running'
+      AND lease_expires_at >= NOW()
+
+Renewal never advances the token and never revives an expired lease. A job
+whose row does not come back has lost its lease; the worker cancels it
+locally (lease_lost) and the fenced commit would reject it regardless.
+LEASE_SECONDS then bounds failover time after a crash, not job duration.
+
 Crash Recovery
 ──────────────
 When a worker crashes mid-execution, its lease expires naturally. The
@@ -68,7 +98,9 @@ job state. It converges state by joining jobs to ledger_entries.
 """
 
 # Lease duration default — overridden by LEASE_SECONDS env var in worker.py.
-# Should be set to at least 2× the p99 execution time of the slowest job type.
+# Without heartbeats, set it to at least 2× the p99 execution time of the
+# slowest job type; with FAULTLINE_LEASE_HEARTBEAT=1 it only needs to cover
+# a few renewal intervals.
 DEFAULT_LEASE_SECONDS = 30
 
 # The barrier table name used for deterministic concurrency testing.
@@ -32,6 +32,20 @@ can be run as a standalone process for higher reap throughput.
 
     recovered = reap_expired_leases(cur)
     # recovered = list of job IDs that were reset to 'queued'
+
+Draining (REAP_MODE=drain, the standalone default)
+────────────────────────────────────────────────────
+A fixed REAP_BATCH_SIZE per REAP_INTERVAL_SECONDS recovers 10k orphaned
+leases in minutes. In drain mode the reaper keeps running batches back to
+back, each in its own short transaction, for as long as they come back
+full. It sleeps only once the backlog is gone. Batch size adapts to the
+measured statement latency: it doubles while a full batch finishes well
+under REAP_TARGET_BATCH_MS and halves when a batch runs over, staying
+within [REAP_MIN_BATCH_SIZE, REAP_MAX_BATCH_SIZE]. REAP_MODE=fixed keeps
+one batch per interval.
+
+Reap lag (age of the oldest expired, still-running lease) is exported as
+faultline_reap_lag_seconds on REAP_METRICS_PORT.
 """
 
 import json
@@ -40,11 +54,80 @@ import time
 from datetime import datetime, timezone
 
 import psycopg2
+from prometheus_client import start_http_server
 from psycopg2 import OperationalError
 
+from services.common.queue_notify import notify_queue
+from services.worker import metrics, statements, transport_db
+
 REAP_INTERVAL_SECONDS = int(os.environ.get("REAP_INTERVAL_SECONDS", "10"))
 REAP_BATCH_SIZE = int(os.environ.get("REAP_BATCH_SIZE", "100"))
+REAP_MODE = os.environ.get("REAP_MODE", "drain")
+REAP_MIN_BATCH_SIZE = int(os.environ.get("REAP_MIN_BATCH_SIZE", "50"))
+REAP_MAX_BATCH_SIZE = int(os.environ.get("REAP_MAX_BATCH_SIZE", "5000"))
+REAP_TARGET_BATCH_MS = float(os.environ.get("REAP_TARGET_BATCH_MS", "200"))
+REAP_METRICS_PORT = int(os.environ.get("REAP_METRICS_PORT", "0"))
+
 
+_REAP_SQL = statements.layout_sql(
+    """
+    WITH expired AS (
+        SELECT id, lease_owner, fencing_token
+        FROM jobs
+        WHERE state = 'running'
+          AND lease_expires_at IS NOT NULL
+          AND lease_expires_at < NOW()
+        ORDER BY lease_expires_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE jobs j
+    SET state            = 'queued',
+        lease_owner      = NULL,
+        lease_expires_at = NULL,
+        next_run_at      = NOW(),
+        updated_at       = NOW()
+    FROM expired e
+    WHERE j.id = e.id
+    RETURNING j.id, e.lease_owner, e.fencing_token
+    """,
+    """
+    WITH expired AS (
+        SELECT job_id, lease_owner, fencing_token
+        FROM job_leases
+        WHERE state = 'running'
+          AND lease_expires_at IS NOT NULL
+          AND lease_expires_at < NOW()
+        ORDER BY lease_expires_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE job_leases j
+    SET state            = 'queued',
+        lease_owner      = NULL,
+        lease_expires_at = NULL,
+        next_run_at      = NOW(),
+        updated_at       = NOW()
+    FROM expired e
+    WHERE j.job_id = e.job_id
+    RETURNING j.job_id, e.lease_owner, e.fencing_token
+    """,
+)
+
+_REAP_LAG_SQL = statements.layout_sql(
+    """
+    SELECT COALESCE(EXTRACT(EPOCH FROM (NOW() - MIN(lease_expires_at))), 0)::float8
+    FROM jobs
+    WHERE state = 'running'
+      AND lease_expires_at < NOW()
+    """,
+    """
+    SELECT COALESCE(EXTRACT(EPOCH FROM (NOW() - MIN(lease_expires_at))), 0)::float8
+    FROM job_leases
+    WHERE state = 'running'
+      AND lease_expires_at < NOW()
+    """,
+)
 
 def _log(event, **fields):
     print(json.dumps({
@@ -54,7 +137,7 @@ def _log(event, **fields):
     }), flush=True)
 
 
-def reap_expired_leases(cur) -> list:
+def reap_expired_leases(cur, batch_size: int = REAP_BATCH_SIZE) -> list:
     """
     Reset jobs stuck in 'running' with an expired lease back to 'queued'.
 
@@ -75,31 +158,11 @@ def reap_expired_leases(cur) -> list:
 
     Returns list of reaped job IDs.
     """
-    cur.execute(
-        """
-        WITH expired AS (
-            SELECT id, lease_owner, fencing_token
-            FROM jobs
-            WHERE state = 'running'
-              AND lease_expires_at IS NOT NULL
-              AND lease_expires_at < NOW()
-            ORDER BY lease_expires_at
-            LIMIT %s
-            FOR UPDATE SKIP LOCKED
-        )
-        UPDATE jobs
-        SET state            = 'queued',
-            lease_owner      = NULL,
-            lease_expires_at = NULL,
-            next_run_at      = NOW(),
-            updated_at       = NOW()
-        WHERE id IN (SELECT id FROM expired)
-        RETURNING id, (SELECT lease_owner FROM expired WHERE expired.id = jobs.id),
-                       (SELECT fencing_token FROM expired WHERE expired.id = jobs.id)
-        """,
-        (REAP_BATCH_SIZE,),
-    )
+    cur.execute(_REAP_SQL, (batch_size,))
     rows = cur.fetchall()
+    if rows:
+        notify_queue(cur)
+        metrics.reaped_jobs_total.inc(len(rows))
 
     for job_id, stale_owner, token in rows:
         _log(
@@ -112,26 +175,92 @@ def reap_expired_leases(cur) -> list:
     return [r[0] for r in rows]
 
 
+def reap_lag_seconds(cur) -> float:
+    """Age of the oldest expired lease still marked running (0 when none)."""
+    cur.execute(_REAP_LAG_SQL)
+    lag = cur.fetchone()[0]
+    metrics.reap_lag_seconds.set(lag)
+    return lag
+
+
+class AdaptiveBatchSize:
+    """
+    Batch size steered by statement latency.
+
+    A full batch that finished in under half the target doubles the next
+    batch; any batch over the target halves it.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_seconds: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_seconds = target_seconds
+        self.size = min(max(initial, self.minimum), self.maximum)
+
+    def observe(self, reaped: int, elapsed_seconds: float) -> int:
+        if elapsed_seconds > self.target_seconds:
+            self.size = max(self.minimum, self.size // 2)
+        elif reaped >= self.size and elapsed_seconds < self.target_seconds / 2:
+            self.size = min(self.maximum, self.size * 2)
+        metrics.reap_batch_size.set(self.size)
+        return self.size
+
+
+def drain_expired_leases(sizer: AdaptiveBatchSize) -> int:
+    """
+    Reap back-to-back batches until one comes back short.
+
+    Each batch commits on its own, so row locks are held for one batch
+    only. Returns the number of jobs reaped.
+    """
+    total = 0
+    while True:
+        batch_size = sizer.size
+        started = time.monotonic()
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                reaped = reap_expired_leases(cur, batch_size)
+            conn.commit()
+        sizer.observe(len(reaped), time.monotonic() - started)
+        total += len(reaped)
+        if len(reaped) < batch_size:
+            return total
+
+
 def get_conn(database_url=None):
-    url = database_url or os.getenv("DATABASE_URL")
-    if not url:
-        raise RuntimeError("DATABASE_URL is not set")
-    return psycopg2.connect(url)
+    """Pooled connection from transport_db; an explicit URL gets a dedicated one."""
+    if database_url:
+        return psycopg2.connect(database_url)
+    return transport_db.get_conn()
 
 
 if __name__ == "__main__":
     """Run as a standalone reaper process."""
-    _log("reaper_started", interval=REAP_INTERVAL_SECONDS, batch_size=REAP_BATCH_SIZE)
+    _log("reaper_started", interval=REAP_INTERVAL_SECONDS, batch_size=REAP_BATCH_SIZE, mode=REAP_MODE)
+    if REAP_METRICS_PORT:
+        start_http_server(REAP_METRICS_PORT)
 
+    sizer = AdaptiveBatchSize(
+        REAP_BATCH_SIZE, REAP_MIN_BATCH_SIZE, REAP_MAX_BATCH_SIZE, REAP_TARGET_BATCH_MS / 1000
+    )
     while True:
         try:
+            if REAP_MODE == "drain":
+                reaped = drain_expired_leases(sizer)
+                if reaped:
+                    _log("reap_batch_complete", count=reaped, batch_size=sizer.size)
+            else:
+                with get_conn() as conn:
+                    with conn.cursor() as cur:
+                        reaped = reap_expired_leases(cur)
+                        if reaped:
+                            _log("reap_batch_complete", count=len(reaped))
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    reaped = reap_expired_leases(cur)
-                    if reaped:
-                        _log("reap_batch_complete", count=len(reaped))
+                    reap_lag_seconds(cur)
+                conn.rollback()
         except OperationalError as e:
             _log("reaper_db_error", error=str(e))
             time.sleep(2)
 
-        time.sleep(REAP_INTERVAL_SECONDS)
\ No newline at end of file
+        time.sleep(REAP_INTERVAL_SECONDS)